@@ -0,0 +1,281 @@
+# brain/autotune.py
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from config import LLM_MODEL_PATH, LLM_TUNING_PROFILE_PATH
+
+# Settings jo profile se Llama() tak jaati hain (baaki keys ignore)
+PROFILE_KEYS = ("n_threads", "n_threads_batch", "n_batch", "n_ubatch", "use_mmap", "use_mlock")
+
+# "Typical voice turn" jiske hisaab se configs compare hote hain:
+# itne prompt tokens evaluate (history + system prompt ka naya hissa) + itne reply tokens
+TURN_PROMPT_TOKENS = 600
+TURN_GEN_TOKENS = 150
+
+_BENCH_TEXT = (
+    "Jarvis ek offline voice assistant hai jo Abhay ke laptop pe chalta hai. "
+    "It listens with whisper, thinks with a local LLaMA model and speaks back in Hinglish. "
+    "Aaj ka plan: emails check karo, phir Python script ka bug fix karo, "
+    "aur shaam ko Pune wali meeting ke notes summarize karo. "
+)
+
+
+def _thread_candidates(limit: Optional[int] = None) -> List[int]:
+    n = os.cpu_count() or 4
+    if limit:
+        n = min(n, limit)
+    cands = {1, 2, n // 2, n - 1, n}
+    t = 4
+    while t < n:
+        cands.add(t)
+        t += 2 if t < 8 else 4
+    return sorted(c for c in cands if c >= 1)
+
+
+def _turn_seconds(pp_tok_s: float, tg_tok_s: float) -> float:
+    if pp_tok_s <= 0 or tg_tok_s <= 0:
+        return float("inf")
+    return TURN_PROMPT_TOKENS / pp_tok_s + TURN_GEN_TOKENS / tg_tok_s
+
+
+class _Bench:
+    """Ek loaded Llama pe prompt-eval / generation tokens/s (threads bina reload badalte hain)."""
+
+    def __init__(self, model_path: str, n_ctx: int, n_batch: int, use_mmap: bool, use_mlock: bool):
+        from llama_cpp import Llama
+
+        t0 = time.perf_counter()
+        self.llm = Llama(
+            model_path=model_path,
+            n_ctx=n_ctx,
+            n_batch=n_batch,
+            n_ubatch=n_batch,
+            use_mmap=use_mmap,
+            use_mlock=use_mlock,
+            logits_all=False,
+            verbose=False,
+        )
+        self.load_s = time.perf_counter() - t0
+        tokens = self.llm.tokenize(_BENCH_TEXT.encode("utf-8"), add_bos=False)
+        self.tokens = list(tokens) * (n_ctx // max(1, len(tokens)) + 1)
+
+    def set_threads(self, n_threads: int, n_threads_batch: int) -> None:
+        import llama_cpp
+
+        llama_cpp.llama_set_n_threads(self.llm._ctx.ctx, n_threads, n_threads_batch)
+
+    def prompt_eval(self, n_tokens: int, repeat: int) -> float:
+        best = 0.0
+        for _ in range(repeat):
+            self.llm.reset()
+            t0 = time.perf_counter()
+            self.llm.eval(self.tokens[:n_tokens])
+            best = max(best, n_tokens / (time.perf_counter() - t0))
+        return best
+
+    def generate(self, n_tokens: int, repeat: int) -> float:
+        # llama-bench jaisa: chhote context pe ek ek token decode (sampling cost alag)
+        best = 0.0
+        for _ in range(repeat):
+            self.llm.reset()
+            self.llm.eval(self.tokens[:16])
+            t0 = time.perf_counter()
+            for tok in self.tokens[16:16 + n_tokens]:
+                self.llm.eval([tok])
+            best = max(best, n_tokens / (time.perf_counter() - t0))
+        return best
+
+    def close(self) -> None:
+        close = getattr(self.llm, "close", None)
+        if close is not None:
+            close()
+        self.llm = None
+
+
+def calibrate(
+    model_path: str = LLM_MODEL_PATH,
+    threads: Optional[Sequence[int]] = None,
+    batches: Sequence[int] = (128, 256, 512, 1024),
+    memory: Sequence[tuple] = ((True, False), (True, True), (False, False)),
+    prompt_tokens: int = 512,
+    gen_tokens: int = 64,
+    repeat: int = 2,
+) -> Dict[str, Any]:
+    """
+    Is machine pe llama.cpp settings ka benchmark; best profile return.
+
+    1. mmap / mlock combos: load time + default threads pe turn time.
+    2. Best memory setting pe har n_batch ke liye ek load; usme threads bina
+       reload badal ke generation (n_threads) aur prompt eval (n_threads_batch)
+       alag alag tune. Generation n_batch pe depend nahi karti, ek baar hi.
+    Score: TURN_PROMPT_TOKENS prompt + TURN_GEN_TOKENS reply ka total time.
+    """
+    threads = list(threads or _thread_candidates())
+    n_ctx = max(2048, prompt_tokens + gen_tokens + 32)
+    cpu = os.cpu_count() or 4
+    runs: List[dict] = []
+
+    # --- 1. baseline + memory settings ---
+    default_threads = max(cpu // 2, 1)
+    mem_best = None
+    for use_mmap, use_mlock in memory:
+        try:
+            bench = _Bench(model_path, n_ctx, 512, use_mmap, use_mlock)
+        except Exception as e:
+            # mlock ko RLIMIT_MEMLOCK / RAM ki wajah se fail hona aam hai
+            print(f"[Autotune] mmap={use_mmap} mlock={use_mlock} skipped: {e}")
+            continue
+        try:
+            bench.set_threads(default_threads, cpu)
+            pp = bench.prompt_eval(prompt_tokens, repeat)
+            tg = bench.generate(gen_tokens, repeat)
+        finally:
+            bench.close()
+        row = dict(stage="memory", use_mmap=use_mmap, use_mlock=use_mlock, n_batch=512,
+                   n_threads=default_threads, n_threads_batch=cpu, load_s=bench.load_s,
+                   pp_tok_s=pp, tg_tok_s=tg, turn_s=_turn_seconds(pp, tg))
+        runs.append(row)
+        print(f"[Autotune] mmap={use_mmap} mlock={use_mlock}: load {bench.load_s:.1f}s, "
+              f"pp {pp:.1f} t/s, tg {tg:.1f} t/s")
+        # barabar turn time pe (2% ke andar) jaldi load hone wala
+        if mem_best is None or row["turn_s"] < mem_best["turn_s"] * 0.98 or (
+            row["turn_s"] <= mem_best["turn_s"] * 1.02 and row["load_s"] < mem_best["load_s"]
+        ):
+            mem_best = row
+    if mem_best is None:
+        raise RuntimeError("model load failed for every mmap/mlock setting")
+    # llama.cpp default (mmap on, mlock off) se comparison ke liye
+    baseline = next((r for r in runs if r["use_mmap"] and not r["use_mlock"]), runs[0])
+
+    # --- 2. n_batch x threads ---
+    best_tg = (0.0, default_threads)
+    best_pp = (0.0, 512, cpu)
+    tg_measured = False
+    for n_batch in batches:
+        try:
+            bench = _Bench(model_path, n_ctx, n_batch, mem_best["use_mmap"], mem_best["use_mlock"])
+        except Exception as e:
+            print(f"[Autotune] n_batch={n_batch} skipped: {e}")
+            continue
+        try:
+            for t in threads:
+                bench.set_threads(t, t)
+                pp = bench.prompt_eval(prompt_tokens, repeat)
+                row = dict(stage="threads", n_batch=n_batch, n_threads_batch=t, pp_tok_s=pp)
+                if not tg_measured:
+                    tg = bench.generate(gen_tokens, repeat)
+                    row.update(n_threads=t, tg_tok_s=tg)
+                    if tg > best_tg[0]:
+                        best_tg = (tg, t)
+                runs.append(row)
+                print(f"[Autotune] n_batch={n_batch} threads={t}: pp {pp:.1f} t/s"
+                      + (f", tg {row['tg_tok_s']:.1f} t/s" if "tg_tok_s" in row else ""))
+                if pp > best_pp[0]:
+                    best_pp = (pp, n_batch, t)
+            tg_measured = True
+        finally:
+            bench.close()
+
+    llama_kwargs = dict(
+        n_threads=best_tg[1],
+        n_threads_batch=best_pp[2],
+        n_batch=best_pp[1],
+        n_ubatch=best_pp[1],
+        use_mmap=mem_best["use_mmap"],
+        use_mlock=mem_best["use_mlock"],
+    )
+    return {
+        "model": Path(model_path).name,
+        "model_size": os.path.getsize(model_path),
+        "cpu_count": cpu,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "llama_kwargs": llama_kwargs,
+        "pp_tok_s": best_pp[0],
+        "tg_tok_s": best_tg[0],
+        "turn_s": _turn_seconds(best_pp[0], best_tg[0]),
+        "baseline": {k: baseline[k] for k in ("pp_tok_s", "tg_tok_s", "turn_s")},
+        "runs": runs,
+    }
+
+
+def save_profile(profile: Dict[str, Any], path=LLM_TUNING_PROFILE_PATH) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(profile, indent=2), encoding="utf-8")
+
+
+def load_profile(model_path: str = LLM_MODEL_PATH, path=LLM_TUNING_PROFILE_PATH) -> Dict[str, Any]:
+    """
+    BrainLLM ke liye Llama() kwargs. Profile na ho, ya kisi aur model / machine
+    ka ho (fleet me config copy ho jaata hai), to {} => llama.cpp defaults.
+    """
+    path = Path(path)
+    if not path.exists():
+        return {}
+    try:
+        profile = json.loads(path.read_text(encoding="utf-8"))
+    except Exception as e:
+        print("[Autotune] profile read error:", e)
+        return {}
+
+    try:
+        size = os.path.getsize(model_path)
+    except OSError:
+        size = None
+    if profile.get("model") != Path(model_path).name or profile.get("model_size") != size:
+        print("[Autotune] tuning profile kisi aur model ka hai – ignore (python -m brain.autotune)")
+        return {}
+    if profile.get("cpu_count") != os.cpu_count():
+        print("[Autotune] tuning profile kisi aur CPU ka hai – ignore (python -m brain.autotune)")
+        return {}
+
+    kwargs = {k: v for k, v in (profile.get("llama_kwargs") or {}).items() if k in PROFILE_KEYS}
+    print("[Autotune] Using tuning profile:", kwargs)
+    return kwargs
+
+
+def print_report(profile: Dict[str, Any]) -> None:
+    base = profile["baseline"]
+    print(f"\nBest settings: {profile['llama_kwargs']}")
+    print(f"{'':<10}{'pp t/s':>10}{'tg t/s':>10}{'turn s':>10}")
+    print(f"{'default':<10}{base['pp_tok_s']:>10.1f}{base['tg_tok_s']:>10.1f}{base['turn_s']:>10.2f}")
+    print(f"{'tuned':<10}{profile['pp_tok_s']:>10.1f}{profile['tg_tok_s']:>10.1f}{profile['turn_s']:>10.2f}")
+
+
+def _int_list(text: str) -> List[int]:
+    return [int(x) for x in text.split(",") if x.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="llama.cpp threads / n_batch / mmap autotuner")
+    parser.add_argument("--model", default=str(LLM_MODEL_PATH))
+    parser.add_argument("--out", default=str(LLM_TUNING_PROFILE_PATH))
+    parser.add_argument("--threads", type=_int_list, default=None, help="e.g. 2,4,6,8 (default: auto)")
+    parser.add_argument("--batches", type=_int_list, default=[128, 256, 512, 1024])
+    parser.add_argument("--no-mlock", action="store_true", help="mlock combos skip karo")
+    parser.add_argument("--prompt-tokens", type=int, default=512)
+    parser.add_argument("--gen-tokens", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=2)
+    parser.add_argument("--dry-run", action="store_true", help="sirf report, profile save nahi")
+    args = parser.parse_args()
+
+    memory = ((True, False), (False, False)) if args.no_mlock else ((True, False), (True, True), (False, False))
+    result = calibrate(
+        model_path=args.model,
+        threads=args.threads,
+        batches=args.batches,
+        memory=memory,
+        prompt_tokens=args.prompt_tokens,
+        gen_tokens=args.gen_tokens,
+        repeat=args.repeat,
+    )
+    print_report(result)
+    if not args.dry_run:
+        save_profile(result, args.out)
+        print(f"Saved profile to {args.out} (BrainLLM agli baar se yahi settings use karega)")
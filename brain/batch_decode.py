@@ -0,0 +1,245 @@
+# brain/batch_decode.py
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Sampling (temperature > 0) sirf top-k candidates pe: poore vocab (128k) ka
+# sort har token pe mehenga hai
+_TOP_K = 40
+
+
+def _sample(logits: np.ndarray, temperature: float, top_p: float, rng: np.random.Generator) -> int:
+    if temperature <= 0.0:
+        return int(np.argmax(logits))
+    k = min(_TOP_K, len(logits))
+    cand = np.argpartition(logits, -k)[-k:]
+    z = logits[cand].astype(np.float64) / temperature
+    order = np.argsort(-z)
+    cand, z = cand[order], z[order]
+    p = np.exp(z - z[0])
+    p /= p.sum()
+    if top_p < 1.0:
+        keep = int(np.searchsorted(np.cumsum(p), top_p)) + 1
+        cand, p = cand[:keep], p[:keep] / p[:keep].sum()
+    return int(rng.choice(cand, p=p))
+
+
+class _Slot:
+    __slots__ = ("index", "feed", "fed", "pos", "out", "last", "max_tokens", "stops")
+
+    def __init__(self, index: int, feed: List[int], pos: int, max_tokens: int, stops: List[str]):
+        self.index = index
+        self.feed = feed          # prompt tokens (shared prefix ke baad wale)
+        self.fed = 0
+        self.pos = pos
+        self.out: List[int] = []
+        self.last: Optional[int] = None
+        self.max_tokens = max_tokens
+        self.stops = stops
+
+    @property
+    def decoding(self) -> bool:
+        return self.fed >= len(self.feed)
+
+
+class BatchDecoder:
+    """
+    Ek hi model pe kai prompts ek saath: llama.cpp multi-sequence batch decode.
+
+    - Alag llama_context (n_seq_max = n_parallel, KV = n_parallel x seq_ctx) jo
+      main chat context ko nahi chhoota; call khatam hote hi free (KV ki RAM wapas).
+    - Har decode step me har active sequence ka ek token (+ naye prompts ke
+      prefill chunks) ek hi llama_batch me: weights har step ek baar memory se
+      padhe jaate hain, isliye CPU pe throughput sequences ke saath badhta hai.
+    - Continuous batching: koi sequence khatam hui to agla prompt usi slot me.
+    - Sab prompts ka common token prefix (system prompt / template) ek hi baar
+      evaluate hota hai aur baaki sequences me KV copy.
+    - `run()` generator hai: har decode step ke baad None yield (worker wahin
+      preempt kar sakta hai), item khatam hone par (index, text). Jo prompt
+      seq_ctx me fit nahi hota uske liye (index, None) – caller normal path le.
+    """
+
+    def __init__(self, llm, n_parallel: int = 4, seq_ctx: int = 2560, seed: int = 0):
+        self.llm = llm
+        self.n_parallel = max(1, n_parallel)
+        self.seq_ctx = seq_ctx
+        self.rng = np.random.default_rng(seed)
+        self._formatter = None
+
+    # ------------- prompt formatting ------------ #
+
+    def _format(self, messages: List[Dict[str, str]]) -> Tuple[List[int], List[str]]:
+        from llama_cpp import llama_chat_format
+
+        if self._formatter is None:
+            template = self.llm.metadata.get("tokenizer.chat_template")
+            if template:
+                model = self.llm._model
+                eos, bos = model.token_eos(), model.token_bos()
+                self._formatter = llama_chat_format.Jinja2ChatFormatter(
+                    template=template,
+                    eos_token=model.token_get_text(eos) if eos != -1 else "",
+                    bos_token=model.token_get_text(bos) if bos != -1 else "",
+                )
+            else:
+                # GGUF me template na ho: hamara default model Llama-3 hai
+                self._formatter = llama_chat_format.format_llama3
+
+        result = self._formatter(messages=messages)
+        tokens = self.llm.tokenize(
+            result.prompt.encode("utf-8"),
+            add_bos=not getattr(result, "added_special", False),
+            special=True,
+        )
+        stops = result.stop if isinstance(result.stop, list) else [result.stop] if result.stop else []
+        return list(tokens), [s for s in stops if s]
+
+    # ------------- llama.cpp context ------------ #
+
+    def _new_context(self):
+        import llama_cpp
+        from llama_cpp import _internals
+
+        base = self.llm.context_params
+        params = llama_cpp.llama_context_default_params()
+        params.n_ctx = self.n_parallel * self.seq_ctx
+        params.n_batch = base.n_batch
+        params.n_ubatch = base.n_ubatch
+        params.n_threads = base.n_threads
+        params.n_threads_batch = base.n_threads_batch
+        params.n_seq_max = self.n_parallel
+        if hasattr(params, "kv_unified"):
+            # ek shared KV pool: shared prefix ka seq_cp sirf metadata copy hai
+            params.kv_unified = True
+        ctx = _internals.LlamaContext(model=self.llm._model, params=params, verbose=False)
+        batch = _internals.LlamaBatch(n_tokens=base.n_batch, embd=0, n_seq_max=1, verbose=False)
+        return ctx, batch
+
+    def _is_eog(self, token: int) -> bool:
+        import llama_cpp
+
+        fn = getattr(llama_cpp, "llama_vocab_is_eog", None) or llama_cpp.llama_token_is_eog
+        return bool(fn(self.llm._model.vocab, token))
+
+    @staticmethod
+    def _add(batch, token: int, pos: int, seq_id: int, logits: bool) -> int:
+        b = batch.batch
+        j = b.n_tokens
+        b.token[j] = token
+        b.pos[j] = pos
+        b.seq_id[j][0] = seq_id
+        b.n_seq_id[j] = 1
+        b.logits[j] = logits
+        b.n_tokens = j + 1
+        return j
+
+    # ------------- generation ------------ #
+
+    def run(self, messages_list: Sequence[List[Dict[str, str]]], params: dict) -> Iterator[Optional[tuple]]:
+        max_tokens = int(params.get("max_tokens") or 512)
+        temperature = float(params.get("temperature", 0.0))
+        top_p = float(params.get("top_p", 1.0))
+
+        prompts: Dict[int, Tuple[List[int], List[str]]] = {}
+        for i, messages in enumerate(messages_list):
+            tokens, stops = self._format(messages)
+            if len(tokens) + 8 > self.seq_ctx:
+                yield i, None
+                continue
+            prompts[i] = (tokens, stops)
+        if not prompts:
+            return
+
+        # common prefix; har prompt ka kam se kam ek token apni sequence me
+        # (uske logits se pehla output token aata hai)
+        token_lists = [t for t, _ in prompts.values()]
+        shared = min(len(t) for t in token_lists) - 1
+        first = token_lists[0]
+        for t in token_lists[1:]:
+            n = 0
+            while n < shared and t[n] == first[n]:
+                n += 1
+            shared = n
+        if len(prompts) == 1:
+            shared = 0
+
+        ctx, batch = self._new_context()
+        n_batch = self.llm.context_params.n_batch
+        n_vocab = self.llm.n_vocab()
+        try:
+            slots_used = min(self.n_parallel, len(prompts))
+            for start in range(0, shared, n_batch):
+                batch.reset()
+                for pos in range(start, min(shared, start + n_batch)):
+                    self._add(batch, first[pos], pos, 0, False)
+                ctx.decode(batch)
+                yield None
+            for s in range(1, slots_used):
+                if shared:
+                    ctx.kv_cache_seq_cp(0, s, 0, shared)
+
+            pending = deque(prompts)
+            slots: List[Optional[_Slot]] = [None] * slots_used
+
+            def fill(s: int) -> None:
+                if pending:
+                    i = pending.popleft()
+                    tokens, stops = prompts[i]
+                    limit = min(max_tokens, self.seq_ctx - len(tokens))
+                    slots[s] = _Slot(i, tokens[shared:], shared, limit, stops)
+                else:
+                    slots[s] = None
+
+            for s in range(slots_used):
+                fill(s)
+
+            while any(slots):
+                batch.reset()
+                wants: List[Tuple[int, int]] = []   # (slot, batch index jiske logits chahiye)
+                for s, slot in enumerate(slots):
+                    if slot is not None and slot.decoding and slot.last is not None:
+                        wants.append((s, self._add(batch, slot.last, slot.pos, s, True)))
+                        slot.pos += 1
+                for s, slot in enumerate(slots):
+                    if slot is None or slot.decoding:
+                        continue
+                    room = n_batch - batch.batch.n_tokens
+                    if room <= 0:
+                        break
+                    chunk = slot.feed[slot.fed:slot.fed + room]
+                    for k, token in enumerate(chunk):
+                        last = slot.fed + k == len(slot.feed) - 1
+                        j = self._add(batch, token, slot.pos, s, last)
+                        slot.pos += 1
+                        if last:
+                            wants.append((s, j))
+                    slot.fed += len(chunk)
+
+                ctx.decode(batch)
+
+                for s, j in wants:
+                    slot = slots[s]
+                    logits = np.ctypeslib.as_array(ctx.get_logits_ith(j), shape=(n_vocab,))
+                    token = _sample(logits, temperature, top_p, self.rng)
+                    done = self._is_eog(token)
+                    if not done:
+                        slot.out.append(token)
+                        slot.last = token
+                        done = len(slot.out) >= slot.max_tokens
+                    text = self.llm.detokenize(slot.out).decode("utf-8", errors="ignore")
+                    for stop in slot.stops:
+                        cut = text.find(stop)
+                        if cut != -1:
+                            text, done = text[:cut], True
+                    if done:
+                        yield slot.index, text.strip()
+                        # prefix rakho, baaki KV hata ke slot agle prompt ko
+                        ctx.kv_cache_seq_rm(s, shared, -1)
+                        fill(s)
+                yield None
+        finally:
+            batch.close()
+            ctx.close()
@@ -0,0 +1,185 @@
+# brain/bench_decoding.py
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Dict, List
+
+from config import LLM_MODEL_PATH
+
+from .autotune import load_profile
+from .llm_offline import LLM_BATCH_PARALLEL, LLM_BATCH_SEQ_CTX, LLM_CTX, LLM_PROMPT_LOOKUP_TOKENS
+from .llm_worker import LLMEngine
+
+# Fixed prompt set: copy-heavy (jahan prompt-lookup ka fayda hona chahiye)
+# + ek normal chat prompt (jahan nahi hona chahiye), taaki dono taraf dikhe.
+_CODE = '''def load_users(path):
+    users = []
+    with open(path) as f:
+        for line in f:
+            name, age = line.strip().split(",")
+            users.append({"name": name, "age": int(age)})
+    return users
+'''
+
+BENCH_PROMPTS: Dict[str, str] = {
+    "code_edit": (
+        "Add a docstring and type hints to this function. Return only the full code.\n\n" + _CODE
+    ),
+    "translate": (
+        "Translate the following text into natural Hinglish. Only give the translation.\n\n"
+        "Text:\nThe Raspberry Pi 5 uses a Broadcom BCM2712 chip, and Python 3.11 runs "
+        "the llama.cpp server with the Mistral 7B model in 4-bit GGUF format."
+    ),
+    "summary": (
+        "Summarize this part in at most 6 short bullet points. Keep names, numbers and decisions.\n\n"
+        "PART 1:\nIn the March meeting, Priya Sharma proposed moving the Pune warehouse to Nashik. "
+        "The board approved a budget of 4.5 crore rupees. Rahul Verma will lead the migration, "
+        "which must finish before 30 September. The old Pune warehouse lease ends in October. "
+        "Inventory audits will run every two weeks during the move."
+    ),
+    "chat": "Mujhe ek chhoti si motivational baat batao, do lines me.",
+}
+
+
+def _run(engine: LLMEngine, prompt: str, max_tokens: int, speculative: bool) -> tuple:
+    engine.set_speculative(speculative)
+    t0 = time.perf_counter()
+    res = engine.llm.create_chat_completion(
+        messages=[{"role": "user", "content": prompt}],
+        max_tokens=max_tokens,
+        temperature=0.0,
+    )
+    elapsed = time.perf_counter() - t0
+    text = res["choices"][0]["message"]["content"]
+    tokens = int(res.get("usage", {}).get("completion_tokens") or 0)
+    return text, tokens, elapsed
+
+
+def _engine(model_path: str, num_pred_tokens: int) -> LLMEngine:
+    # in-process engine (worker nahi) – timing me IPC ka noise nahi chahiye
+    engine = LLMEngine(
+        model_path=model_path,
+        n_ctx=LLM_CTX,
+        prefix_cache_mb=0,
+        prompt_lookup_tokens=num_pred_tokens,
+        llama_kwargs=load_profile(model_path),
+    )
+    # prefix cache off: dono modes ka prompt eval barabar ho
+    engine.llm.set_cache(None)
+    _run(engine, "hi", 4, num_pred_tokens > 0)  # warm-up
+    return engine
+
+
+def _close(engine: LLMEngine) -> None:
+    close = getattr(engine.llm, "close", None)
+    if close is not None:
+        close()
+
+
+def _time_mode(model_path: str, num_pred_tokens: int, max_tokens: int, repeat: int) -> Dict[str, tuple]:
+    """Har prompt: (total seconds, total tokens, last text) – ek engine pe, phir engine band."""
+    engine = _engine(model_path, num_pred_tokens)
+    speculative = num_pred_tokens > 0
+    out = {}
+    try:
+        for name, prompt in BENCH_PROMPTS.items():
+            total_s, total_tokens, text = 0.0, 0, ""
+            for _ in range(repeat):
+                engine.llm.reset()
+                text, n, elapsed = _run(engine, prompt, max_tokens, speculative)
+                total_s += elapsed
+                total_tokens += n
+            out[name] = (total_s, total_tokens, text)
+    finally:
+        _close(engine)
+    return out
+
+
+def run_bench(model_path: str, num_pred_tokens: int, max_tokens: int, repeat: int) -> List[dict]:
+    # Baseline asli default decoder pe: draft model wala engine llama_cpp se har
+    # position ke logits rakhwata hai (logits_all), jo speculative=False pe bhi lagta.
+    # Isliye dono modes alag engines pe; ek ke baad ek load (RAM me ek hi model).
+    default = _time_mode(model_path, 0, max_tokens, repeat)
+    lookup = _time_mode(model_path, num_pred_tokens, max_tokens, repeat)
+
+    rows = []
+    for name in BENCH_PROMPTS:
+        d_s, d_tok, d_text = default[name]
+        l_s, l_tok, l_text = lookup[name]
+        rows.append({
+            "prompt": name,
+            "default_tok_s": d_tok / d_s if d_s else 0.0,
+            "lookup_tok_s": l_tok / l_s if l_s else 0.0,
+            "default_s": d_s / repeat,
+            "lookup_s": l_s / repeat,
+            "same_output": d_text.strip() == l_text.strip(),
+        })
+    return rows
+
+
+def run_batch_bench(model_path: str, n_prompts: int, n_parallel: int, max_tokens: int) -> dict:
+    """Ek ek complete() vs complete_many() (multi-sequence batch) – total tokens/s."""
+    engine = LLMEngine(
+        model_path=model_path,
+        n_ctx=LLM_CTX,
+        prefix_cache_mb=0,
+        batch_parallel=n_parallel,
+        batch_seq_ctx=LLM_BATCH_SEQ_CTX,
+        llama_kwargs=load_profile(model_path),
+    )
+    engine.llm.set_cache(None)
+    base = list(BENCH_PROMPTS.values())
+    messages_list = [
+        [{"role": "user", "content": f"({i + 1}) " + base[i % len(base)]}] for i in range(n_prompts)
+    ]
+    params = dict(max_tokens=max_tokens, temperature=0.0)
+
+    t0 = time.perf_counter()
+    sequential = [engine.complete(m, params) for m in messages_list]
+    seq_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    batched = [""] * n_prompts
+    for item in engine.complete_many(messages_list, params):
+        if item is not None:
+            batched[item[0]] = item[1]
+    batch_s = time.perf_counter() - t0
+
+    tokens = sum(engine.tokenize(t) for t in batched)
+    return {
+        "prompts": n_prompts,
+        "parallel": n_parallel,
+        "sequential_s": seq_s,
+        "batched_s": batch_s,
+        "batched_tok_s": tokens / batch_s if batch_s else 0.0,
+        "speedup": seq_s / batch_s if batch_s else 0.0,
+        "same_output": sum(a.strip() == b.strip() for a, b in zip(sequential, batched)),
+    }
+
+
+def print_report(rows: List[dict]) -> None:
+    print(f"{'prompt':<12}{'default s':>11}{'lookup s':>10}{'default t/s':>13}{'lookup t/s':>12}{'speedup':>9}  same")
+    for r in rows:
+        speedup = r["default_s"] / r["lookup_s"] if r["lookup_s"] else 0.0
+        print(
+            f"{r['prompt']:<12}{r['default_s']:>11.2f}{r['lookup_s']:>10.2f}"
+            f"{r['default_tok_s']:>13.1f}{r['lookup_tok_s']:>12.1f}{speedup:>8.2f}x  {r['same_output']}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Decoding benchmarks: prompt-lookup vs default, batched vs sequential")
+    parser.add_argument("--model", default=str(LLM_MODEL_PATH))
+    parser.add_argument("--num-pred-tokens", type=int, default=LLM_PROMPT_LOOKUP_TOKENS or 10)
+    parser.add_argument("--max-tokens", type=int, default=256)
+    parser.add_argument("--repeat", type=int, default=2)
+    parser.add_argument("--batch", type=int, default=0,
+                        help="N prompts: sequential complete() vs batched complete_many()")
+    parser.add_argument("--parallel", type=int, default=LLM_BATCH_PARALLEL)
+    args = parser.parse_args()
+
+    if args.batch:
+        print(run_batch_bench(args.model, args.batch, args.parallel, args.max_tokens))
+    else:
+        print_report(run_bench(args.model, args.num_pred_tokens, args.max_tokens, args.repeat))
@@ -0,0 +1,84 @@
+# brain/cancellation.py
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+# CancelToken.reason values
+REASON_CANCELLED = "cancelled"
+REASON_BARGE_IN = "barge-in"
+REASON_TIMEOUT = "timeout"
+
+
+class CancelToken:
+    """
+    Ek LLM generation (ya poore turn / background job) ko beech me rokne ka handle.
+
+    - `cancel(reason)` kisi bhi thread se; worker agle token pe ruk jaata hai
+      (prompt eval ke beech bhi, llama.cpp abort callback se) aur ab tak ka
+      partial text milta hai.
+    - `timeout_s`: wall-clock deadline – `check()` expire hone par khud cancel.
+    - `max_tokens`: token deadline – BrainLLM call ke max_tokens ko isse cap karta hai.
+
+        token = CancelToken(timeout_s=20)
+        with cancel_scope(token):
+            reply = brain.chat(history)     # ya token=token explicitly
+        if token.cancelled: ...
+    """
+
+    def __init__(self, timeout_s: Optional[float] = None, max_tokens: Optional[int] = None):
+        self.deadline = time.monotonic() + timeout_s if timeout_s is not None else None
+        self.max_tokens = max_tokens
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+
+    def cancel(self, reason: str = REASON_CANCELLED) -> None:
+        if self.reason is None:
+            self.reason = reason
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.check() is not None
+
+    def check(self) -> Optional[str]:
+        """Cancel reason (deadline nikal gayi ho to "timeout"), warna None."""
+        if not self._event.is_set() and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel(REASON_TIMEOUT)
+        return self.reason
+
+    def remaining(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def cap_tokens(self, max_tokens: int) -> int:
+        return min(max_tokens, self.max_tokens) if self.max_tokens is not None else max_tokens
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Cancel hone tak (ya timeout / deadline tak) block."""
+        remaining = self.remaining()
+        if remaining is not None:
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        self._event.wait(timeout)
+        return self.cancelled
+
+
+_local = threading.local()
+
+
+def current_cancel_token() -> Optional[CancelToken]:
+    """Is thread ki active scope ka token (BrainLLM calls isse default lete hain)."""
+    return getattr(_local, "token", None)
+
+
+@contextmanager
+def cancel_scope(token: Optional[CancelToken]):
+    prev = current_cancel_token()
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = prev
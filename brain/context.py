@@ -0,0 +1,241 @@
+# brain/context.py
+from __future__ import annotations
+
+import threading
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+# Verbatim history ka default token budget (system prompt + reply ke alawa).
+# BrainLLM apna `history_budget` (LLM_CTX ke hisaab se) de to woh use hota hai.
+HISTORY_BUDGET_TOKENS = 1536
+# Budget cross hone par itne fraction tak trim (har turn pe summary na chale)
+HISTORY_LOW_WATER = 0.75
+# Itne latest messages hamesha verbatim (budget se bade hon tab bhi)
+HISTORY_KEEP_MIN = 2
+# Summary message ka per-message template overhead (approx tokens)
+_MSG_OVERHEAD = 6
+
+
+def _count_tokens_fallback(text: str) -> int:
+    # tokenizer na ho (replay stand-ins): ~4 chars per token
+    return max(1, len(text) // 4)
+
+
+class ChatContext:
+    """
+    Token-budgeted chat history.
+
+    - Latest turns verbatim rehte hain jab tak unka total `budget_tokens` ke andar hai
+      (tokens model ke apne tokenizer se – `brain.count_tokens`).
+    - Budget cross hua to sabse purane messages nikal kar background thread me
+      `brain.summarize_history(summary, messages)` se ek rolling summary me fold
+      ho jaate hain. Summary prompt me ek system message ke roop me jaati hai.
+    - Isliye session kitna bhi lamba chale, prompt size (aur prompt-eval latency)
+      bounded rehti hai.
+
+    List jaisa API (`append`, `len`, iterate) bhi hai, taaki purana code jo
+    `chat_history.append({...})` karta hai bina badle chale.
+    """
+
+    def __init__(
+        self,
+        brain=None,
+        budget_tokens: Optional[int] = None,
+        keep_min: int = HISTORY_KEEP_MIN,
+        background: bool = True,
+    ):
+        self.brain = brain
+        self._budget = budget_tokens
+        self.keep_min = keep_min
+        self.background = background
+
+        self._lock = threading.Lock()
+        self._messages: Deque[Tuple[Dict[str, str], int]] = deque()
+        self._tokens = 0
+        self._pending: List[Dict[str, str]] = []
+        self._summary = ""
+        self._summary_tokens = 0
+        self._worker: Optional[threading.Thread] = None
+        self._idle = threading.Event()
+        self._idle.set()
+
+    # ------------- budget / tokens ------------ #
+
+    @property
+    def budget_tokens(self) -> int:
+        if self._budget is None:
+            # brain lazy proxy ho sakta hai: pehli zarurat pe hi resolve
+            self._budget = int(getattr(self.brain, "history_budget", 0) or HISTORY_BUDGET_TOKENS)
+        return self._budget
+
+    def count_tokens(self, text: str) -> int:
+        counter = getattr(self.brain, "count_tokens", None)
+        if counter is not None:
+            try:
+                return int(counter(text))
+            except Exception as e:
+                print("[ChatContext] count_tokens error:", e)
+        return _count_tokens_fallback(text)
+
+    # ------------- list compatibility ------------ #
+
+    def append(self, message: Dict[str, str]) -> None:
+        content = (message.get("content") or "").strip()
+        if not content:
+            return
+        msg = {"role": message.get("role", "user"), "content": content}
+        n = self.count_tokens(content) + _MSG_OVERHEAD
+        with self._lock:
+            self._messages.append((msg, n))
+            self._tokens += n
+        self._trim()
+
+    def extend(self, messages) -> None:
+        for m in messages:
+            self.append(m)
+
+    def add_turn(self, user_text: str, reply: str) -> None:
+        self.append({"role": "user", "content": user_text})
+        self.append({"role": "assistant", "content": reply})
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def __bool__(self) -> bool:
+        return bool(self._messages) or bool(self._summary)
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        return iter(self.messages())
+
+    # ------------- prompt building ------------ #
+
+    @property
+    def summary(self) -> str:
+        return self._summary
+
+    def token_count(self) -> int:
+        """Abhi prompt me jaane wale history tokens (summary + verbatim)."""
+        with self._lock:
+            return self._tokens + self._summary_tokens
+
+    def messages(self, user_text: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        LLM ko bhejne layak history: [summary] + recent verbatim turns (+ naya user text).
+        """
+        with self._lock:
+            out: List[Dict[str, str]] = []
+            if self._summary:
+                out.append({
+                    "role": "system",
+                    "content": "Summary of the earlier conversation:\n" + self._summary,
+                })
+            out.extend(dict(m) for m, _ in self._messages)
+        if user_text:
+            out.append({"role": "user", "content": user_text})
+        return out
+
+    # ------------- trimming + rolling summary ------------ #
+
+    def _trim(self) -> None:
+        # lock ke bahar: budget_tokens lazy brain proxy resolve kar sakta hai (model
+        # load / worker RPC), tab tak baaki append() / messages() block na hon
+        total = self.budget_tokens
+        with self._lock:
+            budget = max(0, total - self._summary_tokens)
+            if self._tokens <= budget:
+                return
+            target = int(budget * HISTORY_LOW_WATER)
+            while self._tokens > target and len(self._messages) > self.keep_min:
+                msg, n = self._messages.popleft()
+                self._tokens -= n
+                self._pending.append(msg)
+            if not self._pending:
+                return
+            start = self._worker is None or not self._worker.is_alive()
+            if start:
+                self._idle.clear()
+                self._worker = threading.Thread(
+                    target=self._summarize_loop, name="chat-summary", daemon=True
+                )
+
+        if not start:
+            return
+        if self.background:
+            self._worker.start()
+        else:
+            self._summarize_loop()
+
+    def _summarize_loop(self) -> None:
+        try:
+            while True:
+                with self._lock:
+                    pending, self._pending = self._pending, []
+                    summary = self._summary
+                    if not pending:
+                        # naye pending aaye to _trim naya worker start karega
+                        self._worker = None
+                        break
+
+                summarize = getattr(self.brain, "summarize_history", None)
+                if summarize is None:
+                    # summarizer nahi hai: purane turns bas drop
+                    continue
+                try:
+                    new_summary = (summarize(summary, pending) or "").strip()
+                except Exception as e:
+                    print("[ChatContext] summarize error:", e)
+                    continue
+                if not new_summary:
+                    continue
+                n = self.count_tokens(new_summary) + _MSG_OVERHEAD
+                with self._lock:
+                    self._summary = new_summary
+                    self._summary_tokens = n
+        finally:
+            self._idle.set()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Background summary khatam hone tak wait (session save / tests ke liye)."""
+        return self._idle.wait(timeout)
+
+    # ------------- persistence (brain.session) ------------ #
+
+    def state(self) -> Dict[str, object]:
+        """JSON-serializable snapshot: summary + verbatim turns + fold hone wale turns."""
+        with self._lock:
+            return {
+                "summary": self._summary,
+                "pending": [dict(m) for m in self._pending],
+                "messages": [dict(m) for m, _ in self._messages],
+            }
+
+    def restore(self, state: Dict[str, object]) -> None:
+        """
+        state() ka snapshot wapas. Restore se pehle naye turns aa chuke hon to
+        purane messages unse pehle lagte hain (order wahi rehta hai).
+        """
+        sized = []
+        for m in state.get("messages") or []:
+            content = (m.get("content") or "").strip()
+            if content:
+                msg = {"role": m.get("role", "user"), "content": content}
+                sized.append((msg, self.count_tokens(content) + _MSG_OVERHEAD))
+        summary = str(state.get("summary") or "").strip()
+        summary_tokens = self.count_tokens(summary) + _MSG_OVERHEAD if summary else 0
+
+        with self._lock:
+            self._messages.extendleft(reversed(sized))
+            self._tokens += sum(n for _, n in sized)
+            self._pending = [dict(m) for m in state.get("pending") or []] + self._pending
+            if summary and not self._summary:
+                self._summary = summary
+                self._summary_tokens = summary_tokens
+        self._trim()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._messages.clear()
+            self._tokens = 0
+            self._pending = []
+            self._summary = ""
+            self._summary_tokens = 0
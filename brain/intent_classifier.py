@@ -0,0 +1,393 @@
+# brain/intent_classifier.py
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import INTENT_EXAMPLES_PATH, INTENT_MIN_CONFIDENCE, INTENT_MODEL_PATH
+
+# Hashed feature space: char 3..5-grams + words. 2^14 * ~17 labels float32 ~ 1 MB.
+N_FEATURES = 1 << 14
+NGRAM_RANGE = (3, 5)
+
+_NON_WORD = re.compile(r"[^\w\s./]+")
+_WS = re.compile(r"\s+")
+
+
+def _normalize(text: str) -> str:
+    # punctuation hatao lekin "youtube.com/watch" jaise links bache rahein
+    return _WS.sub(" ", _NON_WORD.sub(" ", (text or "").lower())).strip()
+
+
+def featurize(text: str, n_features: int = N_FEATURES) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sparse hashed features: (indices, values), L2-normalised.
+    crc32 hash (Python ka hash() har process me alag hota hai, model save nahi hoga).
+    """
+    t = _normalize(text)
+    counts: Dict[int, float] = {}
+    padded = f" {t} "
+    lo, hi = NGRAM_RANGE
+    for n in range(lo, hi + 1):
+        for i in range(len(padded) - n + 1):
+            h = zlib.crc32(padded[i:i + n].encode("utf-8")) % n_features
+            counts[h] = counts.get(h, 0.0) + 1.0
+    for w in t.split():
+        h = zlib.crc32(b"w:" + w.encode("utf-8")) % n_features
+        counts[h] = counts.get(h, 0.0) + 1.0
+
+    if not counts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    idx = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    val = np.log1p(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+    val /= float(np.linalg.norm(val)) or 1.0
+    return idx, val
+
+
+def _dense(texts: Sequence[str], n_features: int) -> np.ndarray:
+    X = np.zeros((len(texts), n_features), dtype=np.float32)
+    for row, text in enumerate(texts):
+        idx, val = featurize(text, n_features)
+        np.add.at(X[row], idx, val)
+    return X
+
+
+def _softmax(z: np.ndarray) -> np.ndarray:
+    z = z - z.max(axis=-1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+def _fit_logreg(X: np.ndarray, y: np.ndarray, n_labels: int, epochs: int = 100,
+                lr: float = 0.5, l2: float = 1e-4) -> Tuple[np.ndarray, np.ndarray]:
+    """Multinomial logistic regression, full-batch gradient descent (Adam)."""
+    # sirf woh columns jo kisi example me aaye (baaki hashed space ke weights 0 hi rahenge)
+    n_features = X.shape[1]
+    cols = np.flatnonzero(np.abs(X).sum(axis=0) > 0)
+    X = X[:, cols]
+    n, d = X.shape
+    W = np.zeros((n_labels, d), dtype=np.float32)
+    b = np.zeros(n_labels, dtype=np.float32)
+    Y = np.eye(n_labels, dtype=np.float32)[y]
+    mW, vW = np.zeros_like(W), np.zeros_like(W)
+    mb, vb = np.zeros_like(b), np.zeros_like(b)
+    beta1, beta2, eps = 0.9, 0.999, 1e-8
+    for step in range(1, epochs + 1):
+        P = _softmax(X @ W.T + b)
+        G = (P - Y) / n
+        gW = G.T @ X + l2 * W
+        gb = G.sum(axis=0)
+        mW = beta1 * mW + (1 - beta1) * gW
+        vW = beta2 * vW + (1 - beta2) * gW * gW
+        mb = beta1 * mb + (1 - beta1) * gb
+        vb = beta2 * vb + (1 - beta2) * gb * gb
+        c1, c2 = 1 - beta1 ** step, 1 - beta2 ** step
+        W -= lr * (mW / c1) / (np.sqrt(vW / c2) + eps)
+        b -= lr * (mb / c1) / (np.sqrt(vb / c2) + eps)
+    full = np.zeros((n_labels, n_features), dtype=np.float32)
+    full[:, cols] = W
+    return full, b
+
+
+def _folds(y: np.ndarray, k: int, seed: int = 0) -> List[np.ndarray]:
+    # stratified: har label ke examples folds me baraabar baante
+    rng = np.random.default_rng(seed)
+    fold_of = np.zeros(len(y), dtype=np.int64)
+    for label in np.unique(y):
+        idx = np.flatnonzero(y == label)
+        rng.shuffle(idx)
+        fold_of[idx] = np.arange(len(idx)) % k
+    return [np.flatnonzero(fold_of == f) for f in range(k)]
+
+
+def _fit_temperature(logits: np.ndarray, y: np.ndarray) -> float:
+    # temperature scaling: held-out logits pe NLL minimum wala T
+    best_t, best_nll = 1.0, float("inf")
+    for t in np.exp(np.linspace(np.log(0.05), np.log(10.0), 80)):
+        p = _softmax(logits / t)[np.arange(len(y)), y]
+        nll = float(-np.log(np.clip(p, 1e-12, 1.0)).mean())
+        if nll < best_nll:
+            best_t, best_nll = float(t), nll
+    return best_t
+
+
+def expected_calibration_error(conf: np.ndarray, correct: np.ndarray, bins: int = 10) -> float:
+    ece = 0.0
+    edges = np.linspace(0.0, 1.0, bins + 1)
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        mask = (conf > lo) & (conf <= hi)
+        if mask.any():
+            ece += mask.mean() * abs(conf[mask].mean() - correct[mask].mean())
+    return float(ece)
+
+
+def file_digest(path: Path) -> str:
+    """Examples file ka sha1 – saved model isse match na kare to stale hai."""
+    return hashlib.sha1(Path(path).read_bytes()).hexdigest()
+
+
+def load_examples(paths: Iterable[Path]) -> Tuple[List[str], List[str]]:
+    """JSONL: {"text": "...", "intent": "..."} per line."""
+    texts: List[str] = []
+    labels: List[str] = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                row = json.loads(line)
+                if row.get("text") and row.get("intent"):
+                    texts.append(row["text"])
+                    labels.append(row["intent"])
+    return texts, labels
+
+
+class IntentClassifier:
+    """
+    Local intent classifier (LLM round-trip ke bina, ~sub-millisecond).
+
+    - Features: hashed char n-grams + words (Hinglish spelling variations
+      "karo/kro", "kholo/kholna" n-grams se pakde jaate hain).
+    - Model: multinomial logistic regression (pure numpy).
+    - Confidence: temperature-scaled softmax; T cross-validation ke out-of-fold
+      logits pe fit hota hai. Threshold phir bhi eval se chuno (chhote dataset pe
+      calibration loose hai): `eval` har threshold ki accuracy / coverage deta hai.
+    - `sources` = {examples file: sha1}; file edit hui to get_intent_classifier retrain karta hai.
+    - `python -m brain.intent_classifier train|eval|predict`.
+    """
+
+    def __init__(self, labels: Sequence[str], W: np.ndarray, b: np.ndarray,
+                 temperature: float = 1.0, n_features: int = N_FEATURES,
+                 sources: Optional[Dict[str, str]] = None):
+        self.labels = list(labels)
+        self.W = np.asarray(W, dtype=np.float32)
+        self.b = np.asarray(b, dtype=np.float32)
+        self.temperature = float(temperature)
+        self.n_features = n_features
+        self.sources = dict(sources or {})
+        self._index = {label: i for i, label in enumerate(self.labels)}
+
+    # ------------- training ------------ #
+
+    @classmethod
+    def train(cls, texts: Sequence[str], labels: Sequence[str], folds: int = 5,
+              n_features: int = N_FEATURES) -> "IntentClassifier":
+        names = sorted(set(labels))
+        y = np.array([names.index(label) for label in labels], dtype=np.int64)
+        X = _dense(texts, n_features)
+
+        temperature = 1.0
+        if folds > 1 and len(texts) >= 2 * folds:
+            oof = np.zeros((len(texts), len(names)), dtype=np.float32)
+            for held in _folds(y, folds):
+                train = np.setdiff1d(np.arange(len(texts)), held)
+                W, b = _fit_logreg(X[train], y[train], len(names))
+                oof[held] = X[held] @ W.T + b
+            temperature = _fit_temperature(oof, y)
+
+        W, b = _fit_logreg(X, y, len(names))
+        return cls(names, W, b, temperature=temperature, n_features=n_features)
+
+    # ------------- persistence ------------ #
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(
+            path,
+            labels=np.array(self.labels),
+            W=self.W,
+            b=self.b,
+            temperature=np.float32(self.temperature),
+            n_features=np.int64(self.n_features),
+            sources=np.array(json.dumps(self.sources)),
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "IntentClassifier":
+        data = np.load(path)
+        return cls(
+            [str(x) for x in data["labels"]],
+            data["W"],
+            data["b"],
+            temperature=float(data["temperature"]),
+            n_features=int(data["n_features"]),
+            sources=json.loads(str(data["sources"])) if "sources" in data.files else {},
+        )
+
+    def is_stale(self) -> bool:
+        """Koi training file badli / hati, ya model purana (bina sources ke) hai."""
+        if not self.sources:
+            return True
+        try:
+            return any(file_digest(Path(p)) != h for p, h in self.sources.items())
+        except OSError:
+            return True
+
+    # ------------- inference ------------ #
+
+    def logits(self, text: str) -> np.ndarray:
+        idx, val = featurize(text, self.n_features)
+        return self.W[:, idx] @ val + self.b
+
+    def predict_proba(self, text: str, allowed: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """Calibrated probabilities; `allowed` diya ho to sirf unpe renormalise."""
+        z = self.logits(text) / self.temperature
+        if allowed is not None:
+            keep = [self._index[a] for a in allowed if a in self._index]
+            if not keep:
+                return {}
+            probs = _softmax(z[keep])
+            return {self.labels[i]: float(p) for i, p in zip(keep, probs)}
+        probs = _softmax(z)
+        return {label: float(p) for label, p in zip(self.labels, probs)}
+
+    def predict(self, text: str, allowed: Optional[Iterable[str]] = None) -> Tuple[str, float]:
+        """(intent, confidence). Koi allowed label model me na ho to ("chat", 0.0)."""
+        probs = self.predict_proba(text, allowed)
+        if not probs:
+            return "chat", 0.0
+        label = max(probs, key=probs.get)
+        return label, probs[label]
+
+
+def train_from_files(paths: Sequence[Path], folds: int = 5) -> IntentClassifier:
+    texts, labels = load_examples(paths)
+    clf = IntentClassifier.train(texts, labels, folds=folds)
+    clf.sources = {str(p): file_digest(p) for p in paths}
+    return clf
+
+
+# ------------- shared instance ------------ #
+
+_classifier: Optional[IntentClassifier] = None
+_classifier_lock = threading.Lock()
+_classifier_failed = False
+
+
+def get_intent_classifier() -> Optional[IntentClassifier]:
+    """
+    Saved model load karo; model file na ho, ya jin examples pe train hua tha
+    woh tab se edit hue hon, to dobara train karke save (ek second se kam).
+    Kuch bhi fail ho to None – callers purane rasta (keyword rules / LLM) pe chalte hain.
+    """
+    global _classifier, _classifier_failed
+    if _classifier is not None or _classifier_failed:
+        return _classifier
+    with _classifier_lock:
+        if _classifier is not None or _classifier_failed:
+            return _classifier
+        try:
+            path = Path(INTENT_MODEL_PATH)
+            clf = IntentClassifier.load(path) if path.exists() else None
+            if clf is None or clf.is_stale():
+                # `train` CLI ne extra files pe train kiya tha to unhi pe dobara
+                data = [Path(p) for p in clf.sources] if clf and clf.sources else [INTENT_EXAMPLES_PATH]
+                data = [p for p in data if p.exists()] or [INTENT_EXAMPLES_PATH]
+                clf = train_from_files(data)
+                clf.save(path)
+                print(f"[IntentClassifier] Trained on {', '.join(map(str, data))} -> {path}")
+            _classifier = clf
+        except Exception as e:
+            print("[IntentClassifier] Disabled:", e)
+            _classifier_failed = True
+    return _classifier
+
+
+# ---------------- train / eval CLI ---------------- #
+
+SWEEP_THRESHOLDS = (0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.97, 0.98, 0.99)
+
+
+def evaluate(texts: Sequence[str], labels: Sequence[str], folds: int = 5,
+             threshold: float = INTENT_MIN_CONFIDENCE, target_accuracy: float = 0.95) -> dict:
+    """
+    Stratified k-fold: accuracy, calibration error, per-intent accuracy, latency,
+    aur `threshold` pe coverage (kitne turns LLM ke bina) / us hisse ki accuracy.
+    `sweep` har SWEEP_THRESHOLDS ke liye yahi do numbers; `recommended_threshold`
+    sabse chhota threshold jiske upar accuracy >= target_accuracy (None = koi nahi).
+    """
+    names = sorted(set(labels))
+    y = np.array([names.index(label) for label in labels], dtype=np.int64)
+    conf = np.zeros(len(texts), dtype=np.float32)
+    pred = np.zeros(len(texts), dtype=np.int64)
+    latencies: List[float] = []
+    for held in _folds(y, folds):
+        train = np.setdiff1d(np.arange(len(texts)), held)
+        clf = IntentClassifier.train([texts[i] for i in train], [labels[i] for i in train], folds=folds)
+        for i in held:
+            t0 = time.perf_counter()
+            label, c = clf.predict(texts[i])
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+            pred[i] = names.index(label)
+            conf[i] = c
+
+    correct = (pred == y).astype(np.float32)
+    per_intent = {name: float(correct[y == i].mean()) for i, name in enumerate(names)}
+    confident = conf >= threshold
+    sweep = {}
+    recommended = None
+    for t in SWEEP_THRESHOLDS:
+        mask = conf >= t
+        acc = float(correct[mask].mean()) if mask.any() else 0.0
+        sweep[f"{t:.2f}"] = {"coverage": round(float(mask.mean()), 3), "accuracy": round(acc, 3)}
+        if recommended is None and mask.any() and acc >= target_accuracy:
+            recommended = t
+    return {
+        "examples": len(texts),
+        "accuracy": float(correct.mean()),
+        "ece": expected_calibration_error(conf, correct),
+        "threshold": threshold,
+        "coverage": float(confident.mean()),
+        "accuracy_above_threshold": float(correct[confident].mean()) if confident.any() else 0.0,
+        "sweep": sweep,
+        "target_accuracy": target_accuracy,
+        "recommended_threshold": recommended,
+        "per_intent": per_intent,
+        "predict_ms_p50": float(np.percentile(latencies, 50)),
+        "predict_ms_p95": float(np.percentile(latencies, 95)),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local intent classifier: train / eval / predict")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_train = sub.add_parser("train", help="train on labelled JSONL examples and save the model")
+    p_train.add_argument("data", nargs="*", default=[str(INTENT_EXAMPLES_PATH)])
+    p_train.add_argument("--out", default=str(INTENT_MODEL_PATH))
+    p_eval = sub.add_parser("eval", help="k-fold accuracy + calibration report")
+    p_eval.add_argument("data", nargs="*", default=[str(INTENT_EXAMPLES_PATH)])
+    p_eval.add_argument("--folds", type=int, default=5)
+    p_eval.add_argument("--target-accuracy", type=float, default=0.95,
+                        help="recommended_threshold: is accuracy ke liye sabse chhota confidence")
+    p_pred = sub.add_parser("predict", help="classify text with the saved model")
+    p_pred.add_argument("text", nargs="+")
+    args = parser.parse_args()
+
+    if args.cmd == "train":
+        clf = train_from_files([Path(p) for p in args.data])
+        clf.save(Path(args.out))
+        print(f"{len(clf.labels)} intents, T={clf.temperature:.2f} -> {args.out}")
+    elif args.cmd == "eval":
+        texts, labels = load_examples([Path(p) for p in args.data])
+        report = evaluate(texts, labels, folds=args.folds, target_accuracy=args.target_accuracy)
+        for name, acc in sorted(report.pop("per_intent").items(), key=lambda kv: kv[1]):
+            print(f"  {name:<16}{acc:6.2f}")
+        print("  threshold  coverage  accuracy")
+        for t, row in report.pop("sweep").items():
+            print(f"  {t:>9}{row['coverage']:10.2f}{row['accuracy']:10.3f}")
+        print(json.dumps(report, indent=2))
+    elif args.cmd == "predict":
+        clf = IntentClassifier.load(Path(INTENT_MODEL_PATH))
+        label, c = clf.predict(" ".join(args.text))
+        print(f"{label} ({c:.2f})")
@@ -1,13 +1,68 @@
 # brain/llm_offline.py
 from __future__ import annotations
-import json
-from typing import List, Dict, Any
-from llama_cpp import Llama
-from config import LLM_MODEL_PATH  # tumhare config.py me defined
+import time
+from typing import List, Dict, Iterator, Optional, Tuple
+from config import (  # tumhare config.py me defined
+    INTENT_MIN_CONFIDENCE,
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_LRU_SIZE,
+    LLM_CACHE_MAX_MB,
+    LLM_CACHE_PATH,
+    LLM_MODEL_PATH,
+)
+from utils.latency import get_latency_tracker, span
+from .autotune import load_profile
+from .cancellation import CancelToken, current_cancel_token
+from .intent_classifier import get_intent_classifier
+from .llm_worker import LLMWorkerClient
+from .priority import background_priority
+from .response_cache import ResponseCache, make_key
 
 # Optional defaults; agar future me config me add karna ho to easy hai
 LLM_CTX = 4096
 LLM_MAX_TOKENS = 512
+LLM_PREFIX_CACHE_MB = 1024   # KV states (system-prompt prefixes + recent turns)
+LLM_HISTORY_TOKENS = 1536    # verbatim chat history budget (brain.context.ChatContext)
+LLM_SUMMARY_TOKENS = 200     # rolling summary ki max length
+# Prompt-lookup decoding (copy-heavy calls: translate / code / summaries).
+# 0 => off. On karne se llama_cpp logits_all rakhta hai (zyada RAM), isliye
+# pehle benchmark dekho: python -m brain.bench_decoding
+LLM_PROMPT_LOOKUP_TOKENS = 0
+# chat_many: itne sequences ek llama.cpp batch me, har ek ka max context.
+# Batch KV alag context me sirf call ke dauraan (~n_parallel x seq_ctx tokens).
+LLM_BATCH_PARALLEL = 4
+LLM_BATCH_SEQ_CTX = 2560
+
+CLASSIFY_SYSTEM_PROMPT = (
+    "You are an intent classifier for a voice assistant named Jarvis.\n"
+    "Your job is ONLY to choose the best intent from a fixed list.\n"
+    "Respond with the intent label only, e.g.:\n"
+    "camera_check\n\n"
+    "Rules:\n"
+    " - Only choose from the allowed intents list.\n"
+    " - If you are not sure, use \"chat\".\n"
+    " - Do not add explanations.\n"
+)
+
+
+def intent_grammar(allowed_intents: List[str]) -> str:
+    """
+    GBNF grammar: output sirf allowed labels me se ek ho sakta hai.
+    Decoding isi se constrained hoti hai, to parse failure / unknown label nahi aata.
+    """
+    def lit(label: str) -> str:
+        return '"' + label.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+    return "root ::= " + " | ".join(lit(i) for i in allowed_intents) + "\n"
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You maintain a running summary of a conversation between Abhay and his "
+    "assistant Jarvis.\n"
+    "Update the summary with the new messages. Keep names, facts, preferences, "
+    "decisions and open tasks; drop small talk.\n"
+    "Write at most 6 short bullet points in the conversation's language. "
+    "Output only the summary.\n"
+)
 
 
 class BrainLLM:
@@ -18,15 +73,38 @@ class BrainLLM:
     - Hinglish friendly (English + Hindi mix).
     - ChatGPT-style reasoning + coding help.
     - Dev / coding tasks ke liye bahut detail code dega.
+
+    Model khud alag worker process me load hota hai (brain.llm_worker); yeh
+    class thin client hai. Main loop, background jobs aur history summary
+    kisi bhi thread se call kar sakte hain – worker requests ek ek karke chalata hai.
     """
 
     def __init__(self):
         print(f"[BrainLLM] Loading LLaMA model from: {LLM_MODEL_PATH}")
-        self.llm = Llama(
+        # Llama + prefix KV cache worker process me; constructor model load hone tak block
+        self.worker = LLMWorkerClient(
             model_path=LLM_MODEL_PATH,
             n_ctx=LLM_CTX,
-            logits_all=False,
-            n_threads=0,   # 0 => auto-detect based on CPU cores
+            prefix_cache_mb=LLM_PREFIX_CACHE_MB,
+            prompt_lookup_tokens=LLM_PROMPT_LOOKUP_TOKENS,
+            batch_parallel=LLM_BATCH_PARALLEL,
+            batch_seq_ctx=LLM_BATCH_SEQ_CTX,
+            # is machine ke tuned threads / n_batch / mmap (python -m brain.autotune)
+            llama_kwargs=load_profile(LLM_MODEL_PATH),
+        )
+        # chat_many ka har sequence (prompt + reply) isme fit hona chahiye, warna
+        # woh batch se bahar ek ek karke chalta hai (summarizer chunk size isi se)
+        self.batch_seq_ctx = LLM_BATCH_SEQ_CTX
+
+        # classify_intent: tuple(allowed_intents) -> (GBNF text, max_tokens);
+        # label token count ke liye har call pe worker RPC na ho
+        self._intent_specs: Dict[Tuple[str, ...], Tuple[str, int]] = {}
+
+        # Deterministic calls (classify / translate) ke replies: RAM LRU + SQLite
+        self.response_cache = (
+            ResponseCache(LLM_CACHE_PATH, max_bytes=LLM_CACHE_MAX_MB << 20, lru_size=LLM_CACHE_LRU_SIZE)
+            if LLM_CACHE_ENABLED
+            else None
         )
 
         # Base identity / behaviour prompt
@@ -63,17 +141,47 @@ class BrainLLM:
             "- Do not invent sensitive personal details.\n"
         )
 
-    # ---------------- core chat ---------------- #
+        # Prompt = system + history + reply: history ka token budget isi hisaab se
+        self.history_budget = min(
+            LLM_HISTORY_TOKENS,
+            LLM_CTX - LLM_MAX_TOKENS - self.count_tokens(self.system_prompt) - LLM_SUMMARY_TOKENS - 64,
+        )
 
-    def chat(self, history: List[Dict[str, str]]) -> str:
+    # ---------------- warm-up ---------------- #
+
+    def warm_up(self) -> None:
         """
-        :param history: list of {role: 'user'|'assistant'|'system', content: str}
+        Startup pe chhoti dummy completions: GGUF weights page-in ho jaate hain,
+        aur dono static system prompts (chat + classifier) ki KV state prefix
+        cache me pin ho jaati hai. Pehla real turn cold-start cost nahi deta.
         """
-        if not isinstance(history, list) or not history:
-            history = []
+        self.prime_prefix(CLASSIFY_SYSTEM_PROMPT)
+        self.prime_prefix(SUMMARY_SYSTEM_PROMPT)
+        self.prime_prefix(self.system_prompt)
+        print("[BrainLLM] Prefix cache primed:", self.worker.call("stats"))
+
+    def prime_prefix(self, system_prompt: str) -> None:
+        """
+        System prompt ko ek baar evaluate karke uski state pinned cache me rakh do.
+        Baad ke calls me (kisi bhi user text ke saath) yeh prefix dobara evaluate nahi hota.
+        """
+        with span("llm_prime"):
+            self.worker.call("prime", system_prompt=system_prompt)
+
+    def count_tokens(self, text: str) -> int:
+        """Model ke tokenizer se token count (chat history budgeting ke liye)."""
+        if not text:
+            return 0
+        return self.worker.call("tokenize", text=text)
 
-        # System message ko ensure karo
-        messages: List[Dict[str, str]] = [{"role": "system", "content": self.system_prompt}]
+    # ---------------- core chat ---------------- #
+
+    def _build_messages(self, history, system_prompt: Optional[str] = None) -> List[Dict[str, str]]:
+        # plain list ya brain.context.ChatContext (summary + recent turns)
+        history = list(history or [])
+
+        # System message ko ensure karo (`system_prompt` diya to persona ki jagah woh)
+        messages: List[Dict[str, str]] = [{"role": "system", "content": system_prompt or self.system_prompt}]
         for m in history:
             role = m.get("role", "user")
             content = m.get("content", "")
@@ -82,77 +190,267 @@ class BrainLLM:
             if role not in ("system", "user", "assistant"):
                 role = "user"
             messages.append({"role": role, "content": content})
+        return messages
 
-        # llama_cpp chat completion
-        res: Dict[str, Any] = self.llm.create_chat_completion(
-            messages=messages,
-            max_tokens=LLM_MAX_TOKENS,
-            temperature=0.7,
-            top_p=0.9,
-        )
+    @staticmethod
+    def _decode_params(speculative: bool, **params) -> dict:
+        # `speculative` sirf on hone par key me jaata hai: purane cache keys same rahein
+        if speculative:
+            params["speculative"] = True
+        return params
+
+    @staticmethod
+    def _cancel_token(cancel: Optional[CancelToken], max_tokens: int):
+        # explicit token, warna calling thread ki cancel_scope; token deadline max_tokens cap karti hai
+        token = cancel if cancel is not None else current_cancel_token()
+        return token, (token.cap_tokens(max_tokens) if token is not None else max_tokens)
+
+    @staticmethod
+    def _log_stopped(token: Optional[CancelToken]) -> bool:
+        reason = token.check() if token is not None else None
+        if reason is not None:
+            print(f"[BrainLLM] generation stopped early ({reason})")
+        return reason is not None
+
+    def chat(
+        self,
+        history: List[Dict[str, str]],
+        speculative: bool = False,
+        cancel: Optional[CancelToken] = None,
+        max_tokens: int = LLM_MAX_TOKENS,
+    ) -> str:
+        """
+        :param history: list of {role: 'user'|'assistant'|'system', content: str}
+        :param speculative: prompt-lookup decoding (LLM_PROMPT_LOOKUP_TOKENS > 0 ho tab);
+            jahan reply prompt ka bada hissa copy karta hai (code edit, translation)
+            wahan fast, normal chat me koi fayda nahi.
+        :param cancel: CancelToken (default: thread ki cancel_scope). Cancel /
+            deadline pe generation agle token pe rukti hai aur partial reply milta hai.
+        """
+        messages = self._build_messages(history)
+        token, max_tokens = self._cancel_token(cancel, max_tokens)
 
+        # llama_cpp chat completion (worker process me)
         try:
-            return res["choices"][0]["message"]["content"].strip()
-        except Exception:
+            with span("llm"):
+                reply = self.worker.call(
+                    "complete",
+                    cancel=token,
+                    messages=messages,
+                    params=self._decode_params(
+                        speculative, max_tokens=max_tokens, temperature=0.7, top_p=0.9
+                    ),
+                )
+            self._log_stopped(token)
+            return reply
+        except Exception as e:
+            print("[BrainLLM] chat error:", e)
             return "Mujhe reply generate karte waqt ek internal error aa gaya."
+
+    def _cached_completion(
+        self,
+        messages: List[Dict[str, str]],
+        grammar: Optional[str] = None,
+        cancel: Optional[CancelToken] = None,
+        **params,
+    ) -> str:
+        """
+        Fixed-prompt / low-temperature calls ke liye: same model + messages + params
+        pehle dekha ho to response cache se (milliseconds), warna inference + store.
+        `grammar` GBNF text hai (key me bhi jaata hai). Cancel hua partial reply
+        cache me nahi jaata.
+        """
+        key = make_key(LLM_MODEL_PATH, messages, dict(params, grammar=grammar))
+        if self.response_cache is not None:
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                return cached
+
+        reply = self.worker.call("complete", cancel=cancel, messages=messages, params=params, grammar=grammar)
+
+        if self._log_stopped(cancel if cancel is not None else current_cancel_token()):
+            return reply
+        if self.response_cache is not None and reply:
+            self.response_cache.put(key, reply)
+        return reply
+
+    def chat_deterministic(
+        self,
+        history,
+        max_tokens: int = LLM_MAX_TOKENS,
+        speculative: bool = False,
+        cancel: Optional[CancelToken] = None,
+        system_prompt: Optional[str] = None,
+    ) -> str:
+        """
+        chat() jaisa, lekin temperature 0 aur response cache ke saath.
+        Translation jaise kaamon ke liye jahan same input => same output chahiye.
+        `system_prompt`: Jarvis persona ki jagah (e.g. summarizer ka chhota prompt).
+        """
+        messages = self._build_messages(history, system_prompt)
+        token, max_tokens = self._cancel_token(cancel, max_tokens)
+        with span("llm"):
+            try:
+                return self._cached_completion(
+                    messages,
+                    cancel=token,
+                    **self._decode_params(speculative, max_tokens=max_tokens, temperature=0.0),
+                )
+            except Exception as e:
+                print("[BrainLLM] chat_deterministic error:", e)
+                return "Mujhe reply generate karte waqt ek internal error aa gaya."
+
+    def chat_many(
+        self,
+        histories: List[List[Dict[str, str]]],
+        max_tokens: int = LLM_MAX_TOKENS,
+        temperature: float = 0.0,
+        cancel: Optional[CancelToken] = None,
+        system_prompt: Optional[str] = None,
+    ) -> List[str]:
+        """
+        Kai independent prompts ek saath (memory items ki summary, chunk summaries,
+        lines ka translation). Worker me llama.cpp multi-sequence batch decode:
+        LLM_BATCH_PARALLEL sequences ek hi decode step me, common prefix ek baar.
+        Background priority se bulao to voice turn aane par beech me ruk jaata hai.
+
+        temperature 0 (default) => response cache: pehle dekhe prompts turant,
+        sirf baaki batch me jaate hain. Cancel hone par jo items poore nahi hue
+        unki jagah "" (ya partial) aata hai, aur kuch bhi cache nahi hota.
+        Har prompt + max_tokens self.batch_seq_ctx me fit ho tabhi batch me jaata hai.
+        """
+        if not histories:
+            return []
+        token, max_tokens = self._cancel_token(cancel, max_tokens)
+        params = dict(max_tokens=max_tokens, temperature=temperature)
+        messages_list = [self._build_messages(h, system_prompt) for h in histories]
+        replies: List[Optional[str]] = [None] * len(messages_list)
+
+        cacheable = temperature == 0.0 and self.response_cache is not None
+        keys = [make_key(LLM_MODEL_PATH, m, dict(params, grammar=None)) for m in messages_list]
+        if cacheable:
+            for i, key in enumerate(keys):
+                replies[i] = self.response_cache.get(key)
+        todo = [i for i, r in enumerate(replies) if r is None]
+
+        if todo:
+            try:
+                with span("llm_batch"):
+                    results = self.worker.call(
+                        "complete_many",
+                        cancel=token,
+                        messages_list=[messages_list[i] for i in todo],
+                        params=params,
+                    )
+            except Exception as e:
+                print("[BrainLLM] chat_many error:", e)
+                results = ["Mujhe reply generate karte waqt ek internal error aa gaya."] * len(todo)
+            else:
+                if cacheable and not self._log_stopped(token):
+                    for i, text in zip(todo, results):
+                        if text:
+                            self.response_cache.put(keys[i], text)
+            for i, text in zip(todo, results):
+                replies[i] = text
+
+        return [r or "" for r in replies]
+
+    def chat_stream(
+        self,
+        history: List[Dict[str, str]],
+        speculative: bool = False,
+        cancel: Optional[CancelToken] = None,
+        max_tokens: int = LLM_MAX_TOKENS,
+    ) -> Iterator[str]:
+        """
+        chat() ka streaming version: tokens generate hote hi text pieces yield karta hai
+        (llama_cpp stream=True). TTS sentence chunker inhe seedha bol sakta hai,
+        poore 512-token reply ka wait nahi. Cancel (barge-in / deadline) pe stream
+        agle token pe khatam ho jaata hai.
+        """
+        messages = self._build_messages(history)
+        token, max_tokens = self._cancel_token(cancel, max_tokens)
+        tracker = get_latency_tracker()
+        t0 = time.perf_counter()
+        first = True
+
+        try:
+            for piece in self.worker.stream(
+                cancel=token,
+                messages=messages,
+                params=self._decode_params(
+                    speculative, max_tokens=max_tokens, temperature=0.7, top_p=0.9
+                ),
+            ):
+                if first:
+                    tracker.record("llm_first_token", (time.perf_counter() - t0) * 1000.0)
+                    first = False
+                yield piece
+            self._log_stopped(token)
+        finally:
+            tracker.record("llm", (time.perf_counter() - t0) * 1000.0)
         
         # ------------------ NEW: Intent classifier ------------------ #
+    def _intent_spec(self, allowed_intents: List[str]) -> Tuple[str, int]:
+        key = tuple(allowed_intents)
+        spec = self._intent_specs.get(key)
+        if spec is None:
+            # sabse lamba label jitne tokens + EOS (+1 tokenization slack);
+            # grammar ke baad model ramble nahi kar sakta
+            max_tokens = max(self.count_tokens(i) for i in allowed_intents) + 2
+            spec = (intent_grammar(allowed_intents), max_tokens)
+            self._intent_specs[key] = spec
+        return spec
+
     def classify_intent(self, text: str, allowed_intents: list[str]) -> str:
         """
         LLaMA se poochta hai: user ne kya bola, aur in allowed_intents me se
         kaunsa sabse sahi intent hai?
 
-        Expected output from model (strict JSON):
-        {"intent": "camera_check"}
+        Pehle local n-gram classifier (brain.intent_classifier, < 1 ms); uski
+        calibrated confidence INTENT_MIN_CONFIDENCE se kam ho tabhi LLM call.
+        LLM decoding GBNF grammar se constrained hai (intent_grammar), isliye output
+        hamesha allowed list ka ek label hota hai, minimum tokens me.
         """
 
-        if not text or not text.strip():
+        if not text or not text.strip() or not allowed_intents:
             return "chat"
 
+        clf = get_intent_classifier()
+        if clf is not None:
+            with span("intent_local"):
+                label, confidence = clf.predict(text, allowed=allowed_intents)
+            if confidence >= INTENT_MIN_CONFIDENCE:
+                return label
+
         # Safety: agar model crash ho jaaye to fallback
         try:
-            system_prompt = (
-                "You are an intent classifier for a voice assistant named Jarvis.\n"
-                "Your job is ONLY to choose the best intent from a fixed list.\n"
-                "You MUST respond in strict JSON, e.g.:\n"
-                '{"intent": "camera_check"}\n\n'
-                "Rules:\n"
-                " - Only choose from the allowed intents list.\n"
-                " - If you are not sure, use \"chat\".\n"
-                " - Do not add explanations.\n"
-            )
-
+            # Allowed intents pehle, user text aakhir me: same intent list wale
+            # calls me system prompt + list ka prefix cache se reuse hota hai
             user_prompt = (
-                "User said (might be Hindi, English or Hinglish):\n"
-                f"\"{text}\"\n\n"
                 "Allowed intents:\n"
                 + ", ".join(f'"{i}"' for i in allowed_intents)
                 + "\n\n"
-                "Return JSON now."
-            )
-
-            res = self.llm.create_chat_completion(
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-                temperature=0.1,
-                max_tokens=64,
+                "User said (might be Hindi, English or Hinglish):\n"
+                f"\"{text}\"\n\n"
+                "Return the intent label now."
             )
+            grammar, max_tokens = self._intent_spec(allowed_intents)
 
-            reply = res["choices"][0]["message"]["content"].strip()
-
-            # Kabhi kabhi model JSON ke bahar text de deta hai, to thoda clean karte hain
-            # Try to find the first '{' and last '}' and parse between them
-            if "{" in reply and "}" in reply:
-                start = reply.index("{")
-                end = reply.rindex("}") + 1
-                reply = reply[start:end]
-
-            data = json.loads(reply)
-            intent = str(data.get("intent", "")).strip()
+            with span("llm_classify"):
+                intent = self._cached_completion(
+                    [
+                        {"role": "system", "content": CLASSIFY_SYSTEM_PROMPT},
+                        {"role": "user", "content": user_prompt},
+                    ],
+                    grammar=grammar,
+                    temperature=0.0,
+                    max_tokens=max_tokens,
+                )
 
-            if not intent or intent not in allowed_intents:
+            if intent not in allowed_intents:
+                # grammar ke saath sirf max_tokens cut hone par ho sakta hai
+                print(f"[BrainLLM.classify_intent] Unexpected label: {intent!r}")
                 return "chat"
 
             return intent
@@ -161,6 +459,35 @@ class BrainLLM:
             print("[BrainLLM.classify_intent] Error:", e)
             return "chat"
 
+    # ---------------- rolling history summary ---------------- #
+
+    def summarize_history(self, summary: str, messages: List[Dict[str, str]]) -> str:
+        """
+        Purani summary + history se nikle messages => nayi (chhoti) summary.
+        brain.context.ChatContext background thread se call karta hai.
+        """
+        lines = []
+        for m in messages:
+            who = "Abhay" if m.get("role") == "user" else "Jarvis"
+            lines.append(f"{who}: {m.get('content', '').strip()}")
+
+        user_prompt = (
+            "Current summary:\n"
+            + (summary.strip() or "(empty)")
+            + "\n\nNew messages:\n"
+            + "\n".join(lines)
+            + "\n\nUpdated summary:"
+        )
+        # summary kabhi voice turn ko block na kare
+        with span("llm_summary"), background_priority():
+            return self.worker.call(
+                "complete",
+                messages=[
+                    {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                    {"role": "user", "content": user_prompt},
+                ],
+                params=dict(max_tokens=LLM_SUMMARY_TOKENS, temperature=0.2),
+            )
 
     # ---------------- learning hook ---------------- #
 
@@ -0,0 +1,681 @@
+# brain/llm_worker.py
+from __future__ import annotations
+
+import atexit
+import heapq
+import itertools
+import multiprocessing as mp
+import queue
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+from .cancellation import CancelToken, current_cancel_token
+from .priority import current_priority
+
+# Wire protocol (multiprocessing queues):
+#   request:  (req_id, op, kwargs, priority)
+#   response: (req_id, kind, data)   kind = "ok" | "chunk" | "done" | "error"
+# req_id 0 = worker startup ("ok" => model loaded).
+# Cancel: client (req_id, "cancel", {}, 0) bhejta hai; intake thread use turant
+# cancelled set me daalta hai (sirf agar woh request queue me ya chal rahi ho –
+# khatam ho chuki request ka cancel ignore, warna set bina limit badhta). Generation agle token pe (prompt eval ke beech bhi,
+# llama.cpp abort callback se) rukti hai aur ab tak ka partial reply normal
+# "ok" / "done" ke saath jaata hai.
+
+
+class LLMEngine:
+    """
+    Llama instance ka maalik (worker process ke andar chalta hai).
+    Prefix KV cache aur parsed GBNF grammars bhi yahin rehte hain.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        n_ctx: int,
+        prefix_cache_mb: int,
+        prompt_lookup_tokens: int = 0,
+        batch_parallel: int = 4,
+        batch_seq_ctx: int = 2560,
+        llama_kwargs: Optional[Dict[str, Any]] = None,
+    ):
+        from llama_cpp import Llama
+
+        from .prefix_cache import PrefixCache
+
+        # Prompt-lookup speculative decoding: draft tokens prompt ke n-grams se
+        # (doosra model nahi). llama_cpp draft ke liye logits_all on karta hai,
+        # isliye sirf enable hone par; per call `speculative` param se on/off.
+        self._draft = None
+        if prompt_lookup_tokens > 0:
+            from llama_cpp.llama_speculative import LlamaPromptLookupDecoding
+
+            self._draft = LlamaPromptLookupDecoding(num_pred_tokens=prompt_lookup_tokens)
+
+        # llama_kwargs: tuning profile (brain.autotune) ke n_threads / n_batch / mmap ...
+        settings = dict(
+            n_threads=0,   # 0 => auto-detect based on CPU cores
+        )
+        settings.update(llama_kwargs or {})
+        self.llm = Llama(
+            model_path=model_path,
+            n_ctx=n_ctx,
+            logits_all=False,
+            draft_model=self._draft,
+            verbose=False,
+            **settings,
+        )
+        # Prompt evaluation CPU pe sabse mehenga hai: har call pe longest matching
+        # token prefix ki KV state reuse hoti hai, sirf naya suffix evaluate hota hai
+        self.prefix_cache = PrefixCache(capacity_bytes=prefix_cache_mb << 20)
+        self.llm.set_cache(self.prefix_cache)
+        self._grammars: Dict[str, Any] = {}
+        self.preemptions = 0
+        self.batch_parallel = batch_parallel
+        self.batch_seq_ctx = batch_seq_ctx
+        self.aborted = False
+        self._abort_cb = None
+        self._install_abort_callback()
+
+    def _install_abort_callback(self) -> None:
+        # llama_decode ke andar graph nodes ke beech poll hota hai: lamba prompt
+        # eval bhi cancel pe turant ruk jaata hai (decode RuntimeError deta hai)
+        import llama_cpp
+
+        setter = getattr(llama_cpp, "llama_set_abort_callback", None)
+        cb_type = getattr(llama_cpp, "ggml_abort_callback", None)
+        ctx = getattr(getattr(self.llm, "_ctx", None), "ctx", None)
+        if setter is None or cb_type is None or ctx is None:
+            return
+        self._abort_cb = cb_type(lambda _data: self.aborted)
+        setter(ctx, self._abort_cb, None)
+
+    def _grammar(self, gbnf: Optional[str]):
+        if gbnf is None:
+            return None
+        # grammar parse har call pe na ho; intent list aam taur pe fixed hoti hai
+        grammar = self._grammars.get(gbnf)
+        if grammar is None:
+            from llama_cpp import LlamaGrammar
+
+            grammar = LlamaGrammar.from_string(gbnf, verbose=False)
+            self._grammars[gbnf] = grammar
+        return grammar
+
+    def set_speculative(self, on: bool) -> None:
+        # generate() har step pe llm.draft_model padhta hai, isliye per call toggle
+        self.llm.draft_model = self._draft if on else None
+
+    def _params(self, params: dict) -> dict:
+        params = dict(params)
+        self.set_speculative(bool(params.pop("speculative", False)))
+        return params
+
+    # ------------- ops ------------ #
+
+    def complete(self, messages: List[Dict[str, str]], params: dict, grammar: Optional[str] = None) -> str:
+        res = self.llm.create_chat_completion(
+            messages=messages, grammar=self._grammar(grammar), **self._params(params)
+        )
+        return res["choices"][0]["message"]["content"].strip()
+
+    def stream(self, messages: List[Dict[str, str]], params: dict, grammar: Optional[str] = None) -> Iterator[str]:
+        for chunk in self.llm.create_chat_completion(
+            messages=messages, grammar=self._grammar(grammar), stream=True, **self._params(params)
+        ):
+            piece = chunk["choices"][0].get("delta", {}).get("content") or ""
+            if piece:
+                yield piece
+
+    def complete_many(self, messages_list: List[List[Dict[str, str]]], params: dict) -> Iterator[Optional[tuple]]:
+        """
+        Kai prompts ek saath (brain.batch_decode.BatchDecoder). Har decode step pe
+        None yield (preemption point), har khatam item pe (index, text).
+        """
+        from .batch_decode import BatchDecoder
+
+        params = self._params(params)  # prompt-lookup batch path me nahi
+        decoder = BatchDecoder(self.llm, n_parallel=self.batch_parallel, seq_ctx=self.batch_seq_ctx)
+        too_long = []
+        for item in decoder.run(messages_list, params):
+            if item is not None and item[1] is None:
+                too_long.append(item[0])
+                continue
+            yield item
+        # batch sequence me fit na hone wale prompts: main context (n_ctx) se ek ek
+        for i in too_long:
+            yield i, self.complete(messages_list[i], params)
+            yield None
+
+    def tokenize(self, text: str) -> int:
+        if not text:
+            return 0
+        return len(self.llm.tokenize(text.encode("utf-8"), add_bos=False))
+
+    def prime(self, system_prompt: str) -> None:
+        """System prompt evaluate karke uski state pinned prefix cache me rakh do."""
+        self.set_speculative(False)
+        with self.prefix_cache.pinned():
+            self.llm.create_chat_completion(
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": "hi"},
+                ],
+                max_tokens=1,
+                temperature=0.0,
+            )
+
+    def stats(self) -> dict:
+        return dict(self.prefix_cache.stats(), preemptions=self.preemptions)
+
+    # ------------- persisted session (brain.session) ------------ #
+
+    def save_session(self, path: str, messages: List[Dict[str, str]], meta: str) -> int:
+        """
+        `messages` (system + history) ka prompt KV me laao – prefix cache ki wajah se
+        zyada tar pehle se evaluated – aur state `path` (.npz) me likho.
+        `meta` (model fingerprint, system prompt hash) file ke andar hi jaata hai.
+        Return: saved tokens.
+        """
+        import numpy as np
+
+        self.set_speculative(False)
+        self.llm.create_chat_completion(messages=messages, max_tokens=1, temperature=0.0)
+        state = self.llm.save_state()
+        n = int(state.n_tokens)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                meta=np.array(meta),
+                input_ids=np.asarray(state.input_ids[:n], dtype=np.intc),
+                # sirf aakhri row: agla prompt hamesha lamba hota hai, llama_cpp
+                # logits naye tokens se hi leta hai (load_state row broadcast karta hai)
+                scores=np.asarray(state.scores[-1:], dtype=np.single),
+                llama_state=np.frombuffer(state.llama_state, dtype=np.uint8),
+                seed=np.array(state.seed),
+            )
+        return n
+
+    def load_session(self, path: str) -> int:
+        """
+        save_session() wali state context me load + prefix cache me (taaki beech me
+        classify / summary calls aayein tab bhi agla chat turn isi se shuru ho).
+        """
+        import numpy as np
+        from llama_cpp.llama import LlamaState
+
+        with np.load(path) as z:
+            ids = z["input_ids"]
+            n = len(ids)
+            if n == 0 or n >= self.llm.n_ctx():
+                return 0
+            input_ids = np.zeros(self.llm.n_ctx(), dtype=np.intc)
+            input_ids[:n] = ids
+            raw = z["llama_state"].tobytes()
+            state = LlamaState(
+                input_ids=input_ids,
+                scores=z["scores"],
+                n_tokens=n,
+                llama_state=raw,
+                llama_state_size=len(raw),
+                seed=int(z["seed"]),
+            )
+        self.llm.load_state(state)
+        self.prefix_cache[ids.tolist()] = state
+        return n
+
+    # ------------- preemption ------------ #
+
+    def snapshot(self):
+        """
+        Beech me rukti generation ki state: KV (LlamaState) + sampler chain.
+        llama_cpp generate() sampler (temp / top_p / GBNF grammar aur uski parse
+        state) Llama instance pe rakhta hai aur suspended generator har token pe
+        wahi padhta hai; foreground request use badal deti hai, isliye saath me save.
+        """
+        self.preemptions += 1
+        return (
+            self.llm.save_state(),
+            getattr(self.llm, "_sampler", None),
+            getattr(self.llm, "_mirostat_mu", None),
+        )
+
+    def restore(self, snapshot) -> None:
+        state, sampler, mirostat_mu = snapshot
+        self.llm.load_state(state)
+        if hasattr(self.llm, "_sampler"):
+            self.llm._sampler = sampler
+        if mirostat_mu is not None:
+            self.llm._mirostat_mu = mirostat_mu
+
+
+class _Task:
+    """Ek request; generation preempt ho to suspended generator + saved state yahin."""
+
+    __slots__ = ("req_id", "op", "kwargs", "priority", "pieces", "parts", "state")
+
+    def __init__(self, req_id: int, op: str, kwargs: dict, priority: int):
+        self.req_id = req_id
+        self.op = op
+        self.kwargs = kwargs
+        self.priority = priority
+        self.pieces: Optional[Iterator[str]] = None
+        self.parts: List[str] = []
+        self.state = None
+
+
+class _TaskHeap:
+    """Priority queue (priority, arrival order) jisme waiting priority peek ho sake."""
+
+    def __init__(self):
+        self._heap: list = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def put(self, task: Optional[_Task], priority: int, seq: Optional[int] = None) -> int:
+        seq = next(self._seq) if seq is None else seq
+        with self._cond:
+            heapq.heappush(self._heap, (priority, seq, task))
+            self._cond.notify()
+        return seq
+
+    def get(self):
+        with self._cond:
+            while not self._heap:
+                self._cond.wait()
+            return heapq.heappop(self._heap)
+
+    def best_priority(self) -> Optional[int]:
+        with self._cond:
+            return self._heap[0][0] if self._heap else None
+
+    def best_task(self) -> Optional[_Task]:
+        with self._cond:
+            return self._heap[0][2] if self._heap else None
+
+
+class _CancelSet:
+    """
+    Cancelled request ids, sirf un requests ke jo queue me hain ya chal rahi hain
+    (`track` se `done` tak). Intake aur worker loop alag threads hain, isliye lock.
+    """
+
+    def __init__(self):
+        self._live: set = set()
+        self._cancelled: set = set()
+        self._lock = threading.Lock()
+
+    def track(self, req_id: int) -> None:
+        with self._lock:
+            self._live.add(req_id)
+
+    def cancel(self, req_id: int) -> bool:
+        with self._lock:
+            if req_id not in self._live:
+                return False
+            self._cancelled.add(req_id)
+            return True
+
+    def done(self, req_id: int) -> None:
+        with self._lock:
+            self._live.discard(req_id)
+            self._cancelled.discard(req_id)
+
+    def __contains__(self, req_id: int) -> bool:
+        return req_id in self._cancelled
+
+
+def _intake(requests: mp.Queue, tasks: _TaskHeap, engine: LLMEngine, cancelled: _CancelSet, running: list) -> None:
+    while True:
+        req_id, op, kwargs, priority = requests.get()
+        if op == "cancel":
+            if cancelled.cancel(req_id) and running and running[0] == req_id:
+                engine.aborted = True
+            continue
+        if op == "shutdown":
+            # sabse aakhir me (pending requests pehle poore ho jaayein)
+            tasks.put(None, priority=1 << 30)
+            return
+        cancelled.track(req_id)
+        tasks.put(_Task(req_id, op, kwargs, priority), priority)
+
+
+def _finish(task: _Task, responses: mp.Queue) -> None:
+    if task.op == "complete_many":
+        responses.put((task.req_id, "ok", task.parts))
+    elif task.op == "stream":
+        responses.put((task.req_id, "done", None))
+    else:
+        responses.put((task.req_id, "ok", "".join(task.parts).strip()))
+
+
+def _run_batch_task(engine: LLMEngine, task: _Task, seq: int, tasks: _TaskHeap, responses: mp.Queue, cancelled: _CancelSet) -> bool:
+    if task.pieces is None:
+        task.parts = [""] * len(task.kwargs["messages_list"])
+        task.pieces = engine.complete_many(**task.kwargs)
+
+    try:
+        for item in task.pieces:
+            if item is not None:
+                index, text = item
+                task.parts[index] = text
+            if task.req_id in cancelled:
+                task.pieces.close()
+                break
+
+            best = tasks.best_task()
+            if best is not None and best.priority < task.priority and best.op != "complete_many":
+                # batch ka apna llama_context hai: main context ki state save karne ki
+                # zarurat nahi, bas generator suspend. Doosra batch beech me nahi aata
+                # (dono ek hi batch context nahi baant sakte).
+                tasks.put(task, task.priority, seq)
+                return False
+    except RuntimeError:
+        # lambe prompt ka main-context fallback abort callback se ruka
+        if task.req_id not in cancelled:
+            raise
+
+    _finish(task, responses)
+    return True
+
+
+def _run_task(engine: LLMEngine, task: _Task, seq: int, tasks: _TaskHeap, responses: mp.Queue, cancelled: _CancelSet) -> bool:
+    """False => task preempt hoke wapas queue me hai (baad me resume)."""
+    if task.op not in ("complete", "stream", "complete_many"):
+        responses.put((task.req_id, "ok", getattr(engine, task.op)(**task.kwargs)))
+        return True
+    if task.req_id in cancelled:
+        # queue me (ya preempted) rehte hue hi cancel: generation shuru/resume nahi
+        if task.pieces is not None:
+            task.pieces.close()
+        _finish(task, responses)
+        return True
+    if task.op == "complete_many":
+        return _run_batch_task(engine, task, seq, tasks, responses, cancelled)
+
+    if task.pieces is None:
+        task.pieces = engine.stream(**task.kwargs)
+    elif task.state is not None:
+        # preempted generation: apni KV state (aur decoding mode) wapas,
+        # suspended generator wahin se aage
+        engine.restore(task.state)
+        engine.set_speculative(bool(task.kwargs.get("params", {}).get("speculative")))
+        task.state = None
+
+    try:
+        for piece in task.pieces:
+            if task.req_id in cancelled:
+                task.pieces.close()
+                break
+            if task.op == "stream":
+                responses.put((task.req_id, "chunk", piece))
+            else:
+                task.parts.append(piece)
+
+            best = tasks.best_priority()
+            if best is not None and best < task.priority:
+                # zyada zaruri request wait kar rahi hai: token boundary pe ruk jao
+                task.state = engine.snapshot()
+                tasks.put(task, task.priority, seq)
+                return False
+    except RuntimeError:
+        # abort callback ne llama_decode beech me roka: cancel hi hai, error nahi
+        if task.req_id not in cancelled:
+            raise
+        print(f"[LLMWorker] request {task.req_id} aborted mid-decode")
+
+    _finish(task, responses)
+    return True
+
+
+def _worker_main(engine_kwargs: dict, requests: mp.Queue, responses: mp.Queue) -> None:
+    """
+    Worker process entry point: model load, phir requests priority order me serve.
+    Background generation ke beech foreground request aaye to background task
+    token boundary pe suspend (state save) hota hai aur baad me wahin se resume.
+    """
+    try:
+        engine = LLMEngine(**engine_kwargs)
+    except Exception as e:
+        responses.put((0, "error", f"model load failed: {e}"))
+        return
+    responses.put((0, "ok", None))
+
+    tasks = _TaskHeap()
+    cancelled = _CancelSet()
+    running: list = []   # abhi chal rahi request ka id (intake thread abort ke liye dekhta hai)
+    threading.Thread(
+        target=_intake, args=(requests, tasks, engine, cancelled, running), name="llm-intake", daemon=True
+    ).start()
+
+    while True:
+        _, seq, task = tasks.get()
+        if task is None:
+            break
+        running[:] = [task.req_id]
+        engine.aborted = task.req_id in cancelled
+        try:
+            finished = _run_task(engine, task, seq, tasks, responses, cancelled)
+        except Exception as e:
+            responses.put((task.req_id, "error", f"{type(e).__name__}: {e}"))
+            finished = True
+        running[:] = []
+        engine.aborted = False
+        if finished:
+            cancelled.done(task.req_id)
+
+
+class LLMWorkerError(RuntimeError):
+    pass
+
+
+class LLMWorkerClient:
+    """
+    Out-of-process LLM: Llama ek alag process (LLMEngine) me load hota hai, yeh
+    client multiprocessing queues se requests bhejta hai.
+
+    - Kai threads (main loop, background jobs, summary) ek saath call kar sakte
+      hain; worker requests ek ek karke chalata hai, llama.cpp context kabhi
+      concurrently use nahi hota.
+    - Har request calling thread ki priority (brain.priority) ke saath jaati hai:
+      foreground turns background generations ko token boundary pe preempt karte hain.
+    - Worker crash ho to pending callers ko LLMWorkerError milta hai aur agli
+      call pe worker dobara start hota hai (primed prefixes bhi dobara prime).
+    - Model ki RSS main process me nahi aati.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        n_ctx: int,
+        prefix_cache_mb: int,
+        prompt_lookup_tokens: int = 0,
+        batch_parallel: int = 4,
+        batch_seq_ctx: int = 2560,
+        llama_kwargs: Optional[Dict[str, Any]] = None,
+        start_timeout: Optional[float] = None,
+    ):
+        self.engine_kwargs = dict(
+            model_path=model_path,
+            n_ctx=n_ctx,
+            prefix_cache_mb=prefix_cache_mb,
+            prompt_lookup_tokens=prompt_lookup_tokens,
+            batch_parallel=batch_parallel,
+            batch_seq_ctx=batch_seq_ctx,
+            llama_kwargs=dict(llama_kwargs or {}),
+        )
+        self.start_timeout = start_timeout
+        # spawn: Windows pe default, aur Linux pe bhi parent ke threads fork nahi hote
+        self._ctx = mp.get_context("spawn")
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, "queue.Queue"] = {}
+        self._primed: List[str] = []
+        self._proc = None
+        self._requests = None
+        self._responses = None
+        self._reader: Optional[threading.Thread] = None
+        atexit.register(self.close)
+        self._ensure_worker()
+
+    # ------------- process management ------------ #
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._proc is not None and self._proc.is_alive():
+                return
+            restart = self._proc is not None
+            self._requests = self._ctx.Queue()
+            self._responses = self._ctx.Queue()
+            self._proc = self._ctx.Process(
+                target=_worker_main,
+                args=(self.engine_kwargs, self._requests, self._responses),
+                name="llm-worker",
+                daemon=True,
+            )
+            self._proc.start()
+
+            kind, data = self._wait_ready()
+            if kind != "ok":
+                raise LLMWorkerError(str(data))
+
+            self._reader = threading.Thread(
+                target=self._read_loop, args=(self._proc, self._responses), name="llm-worker-reader", daemon=True
+            )
+            self._reader.start()
+            print(f"[LLMWorker] Worker process ready (pid {self._proc.pid})")
+            primed = list(self._primed) if restart else []
+
+        for prompt in primed:
+            self.call("prime", system_prompt=prompt)
+
+    def _wait_ready(self):
+        # model load (GGUF mmap) me kaafi seconds lag sakte hain; process mar jaaye
+        # (e.g. segfault / OOM) to hamesha ke liye block na ho
+        waited = 0.0
+        while True:
+            try:
+                _, kind, data = self._responses.get(timeout=0.5)
+                return kind, data
+            except queue.Empty:
+                waited += 0.5
+                if not self._proc.is_alive():
+                    return "error", f"LLM worker exited during startup (code {self._proc.exitcode})"
+                if self.start_timeout is not None and waited >= self.start_timeout:
+                    self._proc.terminate()
+                    return "error", "LLM worker did not start in time"
+
+    def _read_loop(self, proc, responses) -> None:
+        while True:
+            try:
+                req_id, kind, data = responses.get(timeout=0.5)
+            except queue.Empty:
+                if proc.is_alive():
+                    continue
+                # worker mar gaya: sab waiting callers ko error
+                print(f"[LLMWorker] Worker process exited (code {proc.exitcode})")
+                with self._lock:
+                    pending, self._pending = self._pending, {}
+                for q in pending.values():
+                    q.put(("error", "LLM worker process crashed"))
+                return
+            except (EOFError, OSError):
+                return
+            with self._lock:
+                q = self._pending.get(req_id)
+            if q is not None:
+                q.put((kind, data))
+
+    def _submit(self, op: str, kwargs: dict):
+        self._ensure_worker()
+        req_id = next(self._ids)
+        q: "queue.Queue" = queue.Queue()
+        with self._lock:
+            self._pending[req_id] = q
+            self._requests.put((req_id, op, kwargs, current_priority()))
+        return req_id, q
+
+    def _release(self, req_id: int) -> None:
+        with self._lock:
+            self._pending.pop(req_id, None)
+
+    def _cancel(self, req_id: int) -> None:
+        try:
+            with self._lock:
+                self._requests.put((req_id, "cancel", {}, 0))
+        except Exception:
+            pass
+
+    def _get(self, req_id: int, q: "queue.Queue", cancel: Optional[CancelToken], poll: float = 0.05):
+        # cancel token (aur uski wall-clock deadline) chhote intervals pe check;
+        # cancel hua to worker ko batao aur uska (partial) jawab aane tak ruko
+        if cancel is None:
+            return q.get()
+        sent = False
+        while True:
+            # chunks lagatar aa rahe hon tab bhi har get se pehle check
+            if not sent and cancel.check() is not None:
+                self._cancel(req_id)
+                sent = True
+            try:
+                return q.get(timeout=poll)
+            except queue.Empty:
+                continue
+
+    # ------------- public API ------------ #
+
+    def call(self, op: str, cancel: Optional[CancelToken] = None, **kwargs) -> Any:
+        """
+        Blocking request (complete / complete_many / tokenize / prime / stats).
+        `cancel` (default: thread ki cancel_scope) cancel ho to generation agle
+        token pe rukti hai aur partial result return hota hai.
+        """
+        if op == "prime" and kwargs.get("system_prompt") not in self._primed:
+            self._primed.append(kwargs["system_prompt"])
+        if cancel is None:
+            cancel = current_cancel_token()
+        req_id, q = self._submit(op, kwargs)
+        try:
+            kind, data = self._get(req_id, q, cancel)
+        finally:
+            self._release(req_id)
+        if kind == "error":
+            raise LLMWorkerError(data)
+        return data
+
+    def stream(self, cancel: Optional[CancelToken] = None, **kwargs) -> Iterator[str]:
+        """
+        Streaming completion. Generator beech me close ho ya `cancel` token cancel
+        ho (default: thread ki cancel_scope) to worker generation rok deta hai.
+        """
+        if cancel is None:
+            cancel = current_cancel_token()
+        req_id, q = self._submit("stream", kwargs)
+        finished = False
+        try:
+            while True:
+                kind, data = self._get(req_id, q, cancel)
+                if kind == "chunk":
+                    yield data
+                elif kind == "done":
+                    finished = True
+                    return
+                else:
+                    finished = True
+                    raise LLMWorkerError(data)
+        finally:
+            if not finished:
+                self._cancel(req_id)
+            self._release(req_id)
+
+    def close(self) -> None:
+        proc = self._proc
+        if proc is None or not proc.is_alive():
+            return
+        try:
+            self._requests.put((0, "shutdown", {}, 0))
+            proc.join(timeout=2)
+        except Exception:
+            pass
+        if proc.is_alive():
+            proc.terminate()
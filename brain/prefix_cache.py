@@ -0,0 +1,77 @@
+# brain/prefix_cache.py
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import Sequence, Set, Tuple
+
+from llama_cpp import Llama, LlamaRAMCache
+
+
+class PrefixCache(LlamaRAMCache):
+    """
+    llama.cpp KV state cache (LlamaRAMCache) jisme static system-prompt prefixes
+    "pinned" rehte hain.
+
+    Llama.set_cache() ke baad har completion se pehle llama_cpp is cache me
+    prompt tokens ka longest matching prefix dhoondhta hai, woh state load karta
+    hai, aur sirf naya suffix evaluate hota hai. Completion ke baad state
+    (prompt + reply tokens) yahin save hoti hai.
+
+    Problem: plain LRU me lambi conversations ki states system-prompt wali
+    states ko evict kar deti hain, aur chat <-> classify_intent alternate ho to
+    har baar poora system prompt dobara evaluate hota. Isliye `pinned()` block
+    ke andar save hui states capacity eviction me kabhi nahi hatti.
+    """
+
+    def __init__(self, capacity_bytes: int = (1 << 30)):
+        super().__init__(capacity_bytes)
+        self._pinned: Set[Tuple[int, ...]] = set()
+        self._pin_next = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.reused_tokens = 0
+
+    @contextmanager
+    def pinned(self):
+        """Is block me save hui states pinned (static prefixes prime karne ke liye)."""
+        self._pin_next.on = True
+        try:
+            yield
+        finally:
+            self._pin_next.on = False
+
+    def __getitem__(self, key: Sequence[int]):
+        try:
+            value = super().__getitem__(key)
+        except KeyError:
+            self.misses += 1
+            raise
+        self.hits += 1
+        self.reused_tokens += Llama.longest_token_prefix(value.input_ids.tolist(), list(key))
+        return value
+
+    def __setitem__(self, key: Sequence[int], value) -> None:
+        key = tuple(key)
+        if getattr(self._pin_next, "on", False):
+            self._pinned.add(key)
+        if key in self.cache_state:
+            del self.cache_state[key]
+        self.cache_state[key] = value
+
+        # LRU eviction, lekin pinned prefixes ko chhod ke
+        while self.cache_size > self.capacity_bytes:
+            victim = next((k for k in self.cache_state if k not in self._pinned), None)
+            if victim is None:
+                break
+            del self.cache_state[victim]
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.cache_state),
+            "pinned": len(self._pinned),
+            "bytes": self.cache_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "reused_tokens": self.reused_tokens,
+        }
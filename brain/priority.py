@@ -0,0 +1,32 @@
+# brain/priority.py
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+
+# LLM scheduling classes: kam number => pehle. Foreground (voice turn) requests
+# background generations ko token boundary pe preempt kar dete hain.
+PRIORITY_FOREGROUND = 0
+PRIORITY_BACKGROUND = 10
+
+_local = threading.local()
+
+
+def current_priority() -> int:
+    """Is thread se jaane wali LLM requests ki priority (default foreground)."""
+    return getattr(_local, "priority", PRIORITY_FOREGROUND)
+
+
+@contextmanager
+def llm_priority(priority: int):
+    prev = current_priority()
+    _local.priority = priority
+    try:
+        yield
+    finally:
+        _local.priority = prev
+
+
+def background_priority():
+    """`with background_priority(): brain.chat(...)` – voice turn aaye to yeh ruk jaayega."""
+    return llm_priority(PRIORITY_BACKGROUND)
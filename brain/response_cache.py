@@ -0,0 +1,158 @@
+# brain/response_cache.py
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+_WS = re.compile(r"\s+")
+
+
+def make_key(model_path: str, messages: List[Dict[str, str]], params: Dict[str, Any]) -> str:
+    """
+    Cache key = model file + normalized messages + sampling params.
+    Normalization: content ka extra whitespace collapse (Whisper transcripts me
+    aksar double spaces / trailing newline hote hain), role as-is.
+    """
+    norm = [
+        {"role": m.get("role", "user"), "content": _WS.sub(" ", m.get("content", "")).strip()}
+        for m in messages
+    ]
+    payload = json.dumps(
+        {"model": str(model_path), "messages": norm, "params": params},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Deterministic LLM replies ka two-level cache.
+
+    - RAM: chhota LRU (OrderedDict), process ke andar repeat calls ke liye.
+    - Disk: SQLite table, restart ke baad bhi. Total size `max_bytes` se upar gaya
+      to sabse kam recently used entries delete.
+    - `stats()` – mem/disk hits aur misses.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = 64 << 20, lru_size: int = 512):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.lru_size = lru_size
+        self._lock = threading.Lock()
+        self._lru: "OrderedDict[str, str]" = OrderedDict()
+        self.mem_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        self._disk_bytes = 0
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+                " created REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used)")
+            self._db.commit()
+            row = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+            self._disk_bytes = int(row[0])
+        except Exception as e:
+            # disk cache na khule to bhi RAM LRU chalta rahe
+            print("[ResponseCache] Disk cache disabled:", e)
+            self._db = None
+
+    def _remember(self, key: str, value: str) -> None:
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                self.mem_hits += 1
+                return self._lru[key]
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+                    if row is not None:
+                        self._db.execute(
+                            "UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key)
+                        )
+                        self._db.commit()
+                        self._remember(key, row[0])
+                        self.disk_hits += 1
+                        return row[0]
+                except Exception as e:
+                    print("[ResponseCache] read error:", e)
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: str) -> None:
+        size = len(value.encode("utf-8")) + len(key)
+        with self._lock:
+            self._remember(key, value)
+            if self._db is None:
+                return
+            try:
+                now = time.time()
+                old = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, size, created, last_used)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (key, value, size, now, now),
+                )
+                self._disk_bytes += size - (old[0] if old else 0)
+                self._evict()
+                self._db.commit()
+            except Exception as e:
+                print("[ResponseCache] write error:", e)
+
+    def _evict(self) -> None:
+        # lock ke andar call hota hai
+        while self._disk_bytes > self.max_bytes:
+            rows = self._db.execute(
+                "SELECT key, size FROM responses ORDER BY last_used ASC LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self._disk_bytes = 0
+                break
+            for key, size in rows:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._lru.pop(key, None)
+                self._disk_bytes -= size
+                if self._disk_bytes <= self.max_bytes:
+                    break
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lru.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+            self._disk_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.mem_hits + self.disk_hits + self.misses
+            return {
+                "mem_hits": self.mem_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.mem_hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+                "lru_entries": len(self._lru),
+                "disk_bytes": self._disk_bytes,
+            }
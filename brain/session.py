@@ -0,0 +1,181 @@
+# brain/session.py
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from config import SESSION_DIR
+
+SESSION_FILE = "session.json"
+KV_FILE = "session_kv.npz"
+_FORMAT = 1
+# Fingerprint ke liye model file ke shuru / aakhir ke itne bytes (GGUF header me
+# saara metadata hota hai; poori multi-GB file hash karna startup pe mehenga hai)
+_FINGERPRINT_BYTES = 1 << 20
+
+
+def model_fingerprint(model_path: str, n_ctx: int = 0) -> str:
+    """Model file (size + head/tail bytes) + llama_cpp version + n_ctx ka hash."""
+    h = hashlib.sha256()
+    try:
+        size = os.path.getsize(model_path)
+        with open(model_path, "rb") as f:
+            h.update(f.read(_FINGERPRINT_BYTES))
+            f.seek(max(0, size - _FINGERPRINT_BYTES))
+            h.update(f.read(_FINGERPRINT_BYTES))
+    except OSError:
+        size = -1
+    try:
+        from importlib.metadata import version
+
+        # KV state ka binary format llama.cpp build ke saath badal sakta hai
+        lib = version("llama_cpp_python")
+    except Exception:
+        lib = "unknown"
+    h.update(f"{size}|{lib}|{n_ctx}".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()[:16]
+
+
+class SessionStore:
+    """
+    Conversation ko restarts ke paar le jaata hai.
+
+    - session.json: ChatContext snapshot (summary + turns) – har turn ke baad, sasta.
+    - session_kv.npz: system prompt + history ki llama.cpp KV state – exit pe.
+      Restore pe worker isse context + prefix cache me load karta hai, to agla
+      turn sirf naya user text evaluate karta hai.
+    - KV file ke andar model fingerprint + system prompt hash; kuch bhi badla to
+      KV discard, history text se phir bhi resume (ek baar normal prompt eval).
+      History KV se aage badh gayi ho (exit save se pehle crash) tab bhi KV
+      safe hai: llama_cpp sirf matching token prefix reuse karta hai.
+
+        session = SessionStore()
+        session.restore_async(brain, chat_history)
+        ...                                  # har turn ke baad
+        session.save(chat_history)
+        ...                                  # exit pe
+        session.save(chat_history, brain=brain)
+    """
+
+    def __init__(self, directory=SESSION_DIR):
+        self.dir = Path(directory)
+        self.path = self.dir / SESSION_FILE
+        self.kv_path = self.dir / KV_FILE
+        # restore chal raha ho to save ruke (warna aadhi history purani file overwrite kar de)
+        self._restored = threading.Event()
+        self._restored.set()
+
+    def _meta(self, brain) -> str:
+        kwargs = getattr(getattr(brain, "worker", None), "engine_kwargs", {})
+        return json.dumps({
+            "format": _FORMAT,
+            "model": model_fingerprint(kwargs.get("model_path", ""), kwargs.get("n_ctx", 0)),
+            "system_prompt": _text_hash(brain.system_prompt),
+        }, sort_keys=True)
+
+    # ------------- save ------------ #
+
+    def save(self, chat_history, brain=None) -> bool:
+        """
+        History snapshot likho. `brain` diya to KV state bhi (prompt eval + badi
+        file write – isliye sirf exit pe).
+        """
+        self._restored.wait()
+        try:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            if brain is not None:
+                # background summary poori ho jaaye, taaki KV usi prompt ki ho jo agla turn banega
+                chat_history.wait_idle(timeout=30)
+            data = dict(chat_history.state(), format=_FORMAT, saved_ts=time.time())
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print("[Session] save error:", e)
+            return False
+
+        if brain is not None:
+            try:
+                t0 = time.perf_counter()
+                tmp = self.kv_path.with_suffix(".tmp")
+                n = brain.worker.call(
+                    "save_session",
+                    path=str(tmp),
+                    messages=brain._build_messages(chat_history),
+                    meta=self._meta(brain),
+                )
+                os.replace(tmp, self.kv_path)
+                print(f"[Session] KV state saved ({n} tokens, {time.perf_counter() - t0:.1f}s)")
+            except Exception as e:
+                print("[Session] KV save error:", e)
+        return True
+
+    # ------------- restore ------------ #
+
+    def restore(self, brain, chat_history) -> bool:
+        """Pichla session (agar ho) chat_history me + KV state worker me."""
+        try:
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                return False
+            except Exception as e:
+                print("[Session] corrupt session file, starting fresh:", e)
+                return False
+            if data.get("format") != _FORMAT:
+                return False
+
+            chat_history.restore(data)
+            n_tokens = self._restore_kv(brain)
+            print(
+                f"[Session] Resumed {len(data.get('messages') or [])} messages"
+                + (f" (KV: {n_tokens} tokens, no re-eval)" if n_tokens else "")
+            )
+            return True
+        finally:
+            self._restored.set()
+
+    def restore_async(self, brain, chat_history) -> threading.Thread:
+        """
+        restore() background thread me: brain (worker) ready hone ka wait listening
+        ko nahi rokta. Pehle hi koi turn aa gaya to woh restored history ke baad lagta hai.
+        """
+        self._restored.clear()
+        t = threading.Thread(
+            target=self.restore, args=(brain, chat_history), name="session-restore", daemon=True
+        )
+        t.start()
+        return t
+
+    def _restore_kv(self, brain) -> int:
+        if not self.kv_path.exists():
+            return 0
+        try:
+            import numpy as np
+
+            with np.load(self.kv_path) as z:
+                saved = str(z["meta"])
+            if saved != self._meta(brain):
+                print("[Session] model / system prompt changed – discarding saved KV state")
+                self.kv_path.unlink()
+                return 0
+            return int(brain.worker.call("load_session", path=str(self.kv_path)) or 0)
+        except Exception as e:
+            print("[Session] KV restore error:", e)
+            return 0
+
+    def clear(self) -> None:
+        for p in (self.path, self.kv_path):
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
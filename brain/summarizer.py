@@ -0,0 +1,242 @@
+# brain/summarizer.py
+from __future__ import annotations
+
+import re
+from typing import Callable, Iterable, Iterator, List, Optional, Union
+
+# Ek map chunk ka max size (tokens). Brain batch decoding karta ho to isse bhi kam:
+# chunk + prompt + summary brain.batch_seq_ctx me fit hone chahiye (MapReduceSummarizer).
+CHUNK_TOKENS = 2048
+SUMMARY_TOKENS = 300
+# Itne chunk prompts ek saath brain ko (agar brain.chat_many ho to ek batch me)
+BATCH_SIZE = 4
+# Chat template (role headers, BOS / EOS) + tokenization slack, har prompt pe
+TEMPLATE_TOKENS = 64
+
+# Summary calls ka system prompt: Jarvis persona (~500 tokens) har chunk prompt me
+# jagah khaata aur batch sequence context se bahar kar deta
+SYSTEM_PROMPT = (
+    "You summarize text accurately and concisely. "
+    "Use only information from the given text."
+)
+
+MAP_PROMPT = (
+    "Below is part {index} of a longer {kind}.\n"
+    "Summarize this part in at most 6 short bullet points. Keep names, numbers, "
+    "decisions and key ideas. Do not add anything that is not in the text.\n\n"
+    "PART {index}:\n{text}\n"
+)
+REDUCE_PROMPT = (
+    "Below are summaries of consecutive parts of a longer {kind}.\n"
+    "Merge them into one summary of at most 8 bullet points, in order, "
+    "removing repetition.\n\n"
+    "PART SUMMARIES:\n{text}\n"
+)
+FINAL_PROMPT = (
+    "Below are notes covering a whole {kind}.\n"
+    "{instructions}\n\n"
+    "NOTES:\n{text}\n"
+)
+
+_PARA_SPLIT = re.compile(r"\n\s*\n")
+_SENT_SPLIT = re.compile(r"(?<=[.!?।])\s+")
+
+ProgressFn = Callable[[str, int], None]
+
+
+def _default_progress(stage: str, done: int) -> None:
+    print(f"[Summarizer] {stage}: {done}")
+
+
+class MapReduceSummarizer:
+    """
+    Lambe text (video transcripts, PDFs) ke liye hierarchical map-reduce summary.
+
+    - Map: text token-aware boundaries (paragraph > sentence > words) pe
+      `chunk_tokens` ke chunks me tootta hai; har chunk ki chhoti summary.
+      Brain me `chat_many` ho to chunks batch me jaate hain; tab default
+      chunk_tokens brain.batch_seq_ctx - prompt overhead - summary_tokens hai,
+      taaki har map prompt batch sequence me fit ho.
+    - Reduce: partial summaries ek "level" pe jama hoti hain; level bhar gaya
+      (budget se zyada tokens) to unki ek summary agle level pe. Binary counter
+      jaisa tree, isliye memory me kabhi O(levels x chunk) se zyada text nahi rehta.
+    - Input string ya text pieces ka iterator (e.g. PDF pages) – poora document
+      kabhi ek saath memory me nahi chahiye.
+    - `on_progress(stage, count)` har chunk / reduce step pe.
+    """
+
+    def __init__(
+        self,
+        brain,
+        chunk_tokens: Optional[int] = None,
+        summary_tokens: int = SUMMARY_TOKENS,
+        batch_size: int = BATCH_SIZE,
+        on_progress: Optional[ProgressFn] = _default_progress,
+    ):
+        self.brain = brain
+        self.summary_tokens = summary_tokens
+        self.chunk_tokens = chunk_tokens or self._fit_chunk_tokens()
+        self.batch_size = max(1, batch_size)
+        self.on_progress = on_progress or (lambda stage, done: None)
+
+    # ------------- tokens / splitting ------------ #
+
+    def count_tokens(self, text: str) -> int:
+        counter = getattr(self.brain, "count_tokens", None)
+        if counter is not None:
+            try:
+                return int(counter(text))
+            except Exception:
+                pass
+        return max(1, len(text) // 4)
+
+    def _fit_chunk_tokens(self) -> int:
+        seq_ctx = getattr(self.brain, "batch_seq_ctx", None)
+        if not seq_ctx or getattr(self.brain, "chat_many", None) is None:
+            return CHUNK_TOKENS
+        overhead = (
+            self.count_tokens(SYSTEM_PROMPT)
+            + self.count_tokens(MAP_PROMPT.format(index=9999, kind="video transcript", text=""))
+            + TEMPLATE_TOKENS
+        )
+        return max(256, min(CHUNK_TOKENS, seq_ctx - overhead - self.summary_tokens))
+
+    def _units(self, pieces: Iterable[str]) -> Iterator[tuple]:
+        # (text, tokens) units jo har ek chunk budget me fit hon
+        for piece in pieces:
+            for para in _PARA_SPLIT.split(piece or ""):
+                para = para.strip()
+                if not para:
+                    continue
+                n = self.count_tokens(para)
+                if n <= self.chunk_tokens:
+                    yield para, n
+                    continue
+                for sent in _SENT_SPLIT.split(para):
+                    n = self.count_tokens(sent)
+                    if n <= self.chunk_tokens:
+                        yield sent, n
+                        continue
+                    # ek sentence hi budget se bada (punctuation-less transcript): words pe todo
+                    words = sent.split()
+                    step = max(1, len(words) * self.chunk_tokens // (2 * n))
+                    for i in range(0, len(words), step):
+                        part = " ".join(words[i:i + step])
+                        yield part, self.count_tokens(part)
+
+    def chunks(self, text: Union[str, Iterable[str]]) -> Iterator[str]:
+        """Token-aware chunks (har ek <= chunk_tokens)."""
+        pieces = [text] if isinstance(text, str) else text
+        buf: List[str] = []
+        size = 0
+        for unit, n in self._units(pieces):
+            if buf and size + n > self.chunk_tokens:
+                yield "\n\n".join(buf)
+                buf, size = [], 0
+            buf.append(unit)
+            size += n
+        if buf:
+            yield "\n\n".join(buf)
+
+    # ------------- LLM calls ------------ #
+
+    def _ask_many(self, prompts: List[str]) -> List[str]:
+        histories = [[{"role": "user", "content": p}] for p in prompts]
+        chat_many = getattr(self.brain, "chat_many", None)
+        if chat_many is not None and len(prompts) > 1:
+            replies = chat_many(histories, max_tokens=self.summary_tokens, system_prompt=SYSTEM_PROMPT)
+        else:
+            # deterministic + response cache: same chunk dobara aaye to turant.
+            # Summaries source text ke naam/phrases copy karti hain: prompt-lookup decoding.
+            chat = getattr(self.brain, "chat_deterministic", None)
+            if chat is not None:
+                replies = [
+                    chat(h, max_tokens=self.summary_tokens, speculative=True, system_prompt=SYSTEM_PROMPT)
+                    for h in histories
+                ]
+            else:
+                replies = [self.brain.chat(h) for h in histories]
+        return [(r or "").strip() for r in replies]
+
+    # ------------- map-reduce ------------ #
+
+    def _reduce_once(self, summaries: List[str], kind: str) -> str:
+        return self._ask_many([REDUCE_PROMPT.format(kind=kind, text="\n\n".join(summaries))])[0]
+
+    def _push(self, levels: List[List[str]], summary: str, kind: str, level: int = 0) -> None:
+        # level pe summary jodo; level budget se bhar jaaye to ek upar reduce
+        while True:
+            if len(levels) <= level:
+                levels.append([])
+            levels[level].append(summary)
+            if sum(self.count_tokens(s) for s in levels[level]) <= self.chunk_tokens:
+                return
+            group, levels[level] = levels[level], []
+            summary = self._reduce_once(group, kind)
+            self.on_progress(f"reduce level {level + 1}", len(group))
+            level += 1
+
+    def _collapse(self, summaries: List[str], kind: str) -> List[str]:
+        # final prompt ke budget me aane tak baaki summaries ko reduce
+        while sum(self.count_tokens(s) for s in summaries) > self.chunk_tokens and len(summaries) > 1:
+            groups: List[List[str]] = [[]]
+            size = 0
+            for s in summaries:
+                n = self.count_tokens(s)
+                if groups[-1] and size + n > self.chunk_tokens:
+                    groups.append([])
+                    size = 0
+                groups[-1].append(s)
+                size += n
+            if len(groups) == 1:
+                # budget ke andar bas kuch tokens se zyada: do hisson me todo
+                half = max(1, len(summaries) // 2)
+                groups = [summaries[:half], summaries[half:]]
+            summaries = [self._reduce_once(g, kind) for g in groups]
+            self.on_progress("final reduce", len(groups))
+        return summaries
+
+    def summarize(
+        self,
+        text: Union[str, Iterable[str]],
+        instructions: str = "Write a clear summary with bullet points for the key takeaways.",
+        kind: str = "document",
+    ) -> str:
+        levels: List[List[str]] = []
+        batch: List[str] = []
+        done = 0
+
+        def flush() -> None:
+            nonlocal done, batch
+            prompts = [MAP_PROMPT.format(index=done + i + 1, kind=kind, text=c) for i, c in enumerate(batch)]
+            for summary in self._ask_many(prompts):
+                if summary:
+                    self._push(levels, summary, kind)
+            done += len(batch)
+            batch = []
+            self.on_progress("chunks summarized", done)
+
+        for chunk in self.chunks(text):
+            batch.append(chunk)
+            if len(batch) >= self.batch_size:
+                flush()
+        if batch:
+            flush()
+
+        # upar wale levels pehle (purana content), same level me order bana rehta hai
+        summaries = [s for level in reversed(levels) for s in level]
+        if not summaries:
+            return ""
+        summaries = self._collapse(summaries, kind)
+        final = self._ask_many([FINAL_PROMPT.format(kind=kind, instructions=instructions, text="\n\n".join(summaries))])[0]
+        self.on_progress("done", done)
+        return final
+
+
+def summarize_long_text(brain, text: Union[str, Iterable[str]], instructions: str = "", kind: str = "document",
+                        on_progress: Optional[ProgressFn] = _default_progress) -> str:
+    """Shortcut: `summarize_long_text(brain, transcript, instructions=..., kind="video transcript")`."""
+    summarizer = MapReduceSummarizer(brain, on_progress=on_progress)
+    if instructions:
+        return summarizer.summarize(text, instructions=instructions, kind=kind)
+    return summarizer.summarize(text, kind=kind)
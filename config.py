@@ -1,5 +1,4 @@
 from pathlib import Path
-import torch
 
 # ========= BASE PATHS =========
 
@@ -23,6 +22,10 @@ WHISPER_MODEL   = str(MODELS_DIR / "whisper" / "ggml-large-v3.bin")
 # models/llm/Llama-3-8B-Instruct.Q4_K_M.gguf
 LLM_MODEL_PATH = str(MODELS_DIR / "llm" / "Llama-3-8B-Instruct.Q4_K_M.gguf")
 
+# Is machine ke liye tuned llama.cpp settings (threads, n_batch, mmap/mlock).
+# Banane ke liye: python -m brain.autotune  (file na ho to llama.cpp defaults)
+LLM_TUNING_PROFILE_PATH = MODELS_DIR / "llm" / "tuning_profile.json"
+
 # Stable Diffusion model:
 # models/sd/v1-5-pruned-emaonly.safetensors
 SD_MODEL_PATH = str(MODELS_DIR / "sd" / "v1-5-pruned-emaonly.safetensors")
@@ -33,9 +36,83 @@ SVD_MODEL_PATH = str(MODELS_DIR / "sdxl" / "svd_xt_1_1.safetensors")
 
 # ========= RUNTIME CONFIG =========
 
-DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+# DEVICE ("cuda" / "cpu") lazily resolve hota hai (neeche __getattr__):
+# torch import me kai seconds lagte hain, aur sirf SD jaise skills ko chahiye.
 WAKE_WORD = "jarvis"
 
+# ========= WAKE WORD GATE =========
+# On => sirf wake word ke baad wala audio faster-whisper tak jaata hai.
+# Templates banane ke liye: python -m stt.wake_word enroll
+WAKE_WORD_ENABLED = True
+WAKE_WORD_TEMPLATES = MODELS_DIR / "wake_word" / "templates.npz"
+WAKE_WORD_THRESHOLD = 1.6       # normalised DTW distance; kam => strict, zyada => loose
+WAKE_WORD_ARMED_S = 8.0         # wake word ke baad itni der tak command ka wait
+
+# ========= STT / VAD ENDPOINTING =========
+# VAD on => recording speech start hone par shuru, aur itni silence ke baad band
+STT_VAD_ENABLED = True
+STT_VAD_SILENCE_MS = 700        # hangover: itni der chup => utterance khatam
+STT_VAD_MAX_UTTERANCE_S = 15    # ek utterance ki max length
+STT_VAD_MIN_RMS = 300.0         # int16 RMS; isse kam energy kabhi speech nahi maani jaayegi
+
+# Streaming partials: user bol hi raha ho tab bhi har itne ms me rolling window decode
+STT_PARTIAL_INTERVAL_MS = 300
+STT_PARTIAL_WINDOW_S = 4.0      # partial decode sirf last itne seconds ka audio dekhta hai
+# Early dispatch sirf pause me: user itni der chup ho tab partials decode hote hain, aur
+# ek hi pause ke do partials same hon tab command (~PAUSE + INTERVAL silence, aam
+# mid-sentence pause se lamba). Beech me phir bola ("scroll ... up") to chain reset.
+STT_EARLY_DISPATCH_PAUSE_MS = 300
+
+# Per-turn latency records (JSONL); report: python -m utils.latency
+LATENCY_LOG_PATH = BASE_DIR / "logs" / "latency.jsonl"
+LATENCY_LOG_MAX_MB = 16         # isse bada hua to latency.jsonl.1 ban jaata hai (ek hi purani file)
+LATENCY_LOG_TEXT = False        # True => user ka utterance bhi log me (debugging ke liye; privacy!)
+
+# Ek voice turn ki LLM generation ki wall-clock deadline (seconds); user beech me
+# phir bole (barge-in) to chal rahi generation turant cancel hoti hai
+LLM_TURN_TIMEOUT_S = 45.0
+# Poori book ka map-reduce summary (bahut saare LLM calls) voice turn me nahi,
+# background job me chalta hai; uski deadline
+BOOK_SUMMARY_TIMEOUT_S = 30 * 60
+
+# ========= LLM RESPONSE CACHE =========
+# Deterministic LLM calls (intent classify, translation) ke replies; same model +
+# same prompt + same params => disk/RAM se turant jawab
+LLM_CACHE_ENABLED = True
+LLM_CACHE_PATH = BASE_DIR / "cache" / "llm_responses.sqlite"
+LLM_CACHE_MAX_MB = 64           # disk store ka size limit (purane entries evict)
+LLM_CACHE_LRU_SIZE = 512        # in-memory LRU entries
+
+# ========= SESSION PERSISTENCE =========
+# Restart ke baad pichli baat-cheet wahin se: chat history har turn ke baad,
+# llama.cpp KV state exit pe (resume pe history dobara evaluate nahi hoti).
+# Model / system prompt badla to KV state apne aap discard (history phir bhi aati hai).
+SESSION_ENABLED = True
+SESSION_DIR = BASE_DIR / "cache" / "session"
+
+# ========= LOCAL INTENT CLASSIFIER =========
+# Char n-gram model (numpy) – keyword rules miss karein to router isse poochta hai,
+# aur classify_intent LLM tak sirf low confidence pe jaata hai.
+# Train / eval: python -m brain.intent_classifier train | eval
+INTENT_EXAMPLES_PATH = BASE_DIR / "brain" / "intent_examples.jsonl"
+INTENT_MODEL_PATH = MODELS_DIR / "intent" / "intent_clf.npz"
+# Thresholds eval se (5-fold, 210 examples): 0.6 => 71% coverage pe sirf 87% sahi,
+# 0.85 => 91%, 0.99 => 21% coverage pe 98%. Examples badlo to eval phir chalao
+# (recommended_threshold = >= 95% accuracy wala sabse chhota).
+INTENT_MIN_CONFIDENCE = 0.99    # classify_intent: isse kam confidence => LLM se poocho
+# Router fallback (keyword rules ne "chat" diya): galat skill chalna (app band,
+# download) galat chat reply se mehenga hai, isliye kam se kam utna hi strict
+INTENT_ROUTER_MIN_CONFIDENCE = 0.99
+
+# ========= FUZZY TRIGGERS =========
+# Whisper ke Hinglish spelling errors ("yad rakho", "bandh karo"): keyword rules miss
+# karein to phonetic + edit-distance index trigger phrase dhoondhta hai, aur sudhra
+# hua text phir se rules se route hota hai (classifier / LLM se pehle).
+# Eval: python -m skills.bench_triggers --fuzzy
+FUZZY_TRIGGERS_ENABLED = True
+FUZZY_MAX_EDITS = 2             # ek phrase me max typos (phonetic key pe)
+FUZZY_CHARS_PER_EDIT = 6        # phrase key ke har itne chars pe 1 typo allowed ("open" => 0)
+
 DOWNLOAD_DIR = BASE_DIR / "downloads"
 IMAGE_OUTPUT_DIR = BASE_DIR / "generated_images"
 VIDEO_OUTPUT_DIR = BASE_DIR / "generated_videos"
@@ -64,3 +141,22 @@ KNOWN_SOFTWARE_SOURCES = {
     },
 }
 
+
+
+# ========= LAZY ATTRIBUTES =========
+
+def _detect_device() -> str:
+    try:
+        import torch
+        return "cuda" if torch.cuda.is_available() else "cpu"
+    except Exception:
+        return "cpu"
+
+
+def __getattr__(name: str):
+    # `from config import DEVICE` bhi yahin aata hai (PEP 562)
+    if name == "DEVICE":
+        value = _detect_device()
+        globals()["DEVICE"] = value
+        return value
+    raise AttributeError(f"module 'config' has no attribute {name!r}")
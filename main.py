@@ -1,12 +1,24 @@
 # main.py
 
 from __future__ import annotations
+import re
+import threading
 import time
-from stt.whisper_cpp import WhisperSTT
-from brain.llm_offline import BrainLLM
+from typing import Callable, Iterator, List, Optional
+from brain.context import ChatContext
+from brain.session import SessionStore
+from config import SESSION_ENABLED, WAKE_WORD
 from skills.router import IntentRouter
-from tts.tts_edge import SimpleTTS
 from memory.background_learner import BackgroundLearner
+from utils.latency import get_latency_tracker
+from utils.lazy import components
+from utils.warmup import WarmupManager
+
+
+def _make_brain():
+    # llama_cpp import + GGUF load dono yahin, startup path se bahar
+    from brain.llm_offline import BrainLLM
+    return BrainLLM()
 
 
 EXIT_WORDS = {
@@ -20,12 +32,215 @@ EXIT_WORDS = {
 }
 
 
+# Partial transcript pe hi dispatch karne layak intents: chhoti control commands
+# jinka poora matlab trigger phrase me hi hota hai.
+EARLY_DISPATCH_INTENTS = {"browser"}
+
+
+def _normalize_command(text: str) -> str:
+    # Whisper "Quit." / "Scroll down!" jaisa punctuation laga deta hai
+    return (text or "").strip().lower().strip(" .,!?")
+
+
+def _words(text: str) -> List[str]:
+    return [w for w in (w.strip(".,!?") for w in text.split()) if w]
+
+
+def _strip_wake_word(text: str) -> str:
+    return " ".join(w for w in _words(text) if w != WAKE_WORD.lower())
+
+
+# "jarvis stop" / "stop jarvis" ke bina-wake-word roop; sirf tab match hote hain
+# jab text me wake word sach me tha – akela "stop" (reply beech me rokna,
+# "stop the music" ka partial) kabhi exit nahi
+_ADDRESSED_EXIT_WORDS = {_strip_wake_word(w) for w in EXIT_WORDS}
+
+_LEADING_WAKE_RE = re.compile(rf"^\s*{re.escape(WAKE_WORD)}\b[\s.,!?]*", re.IGNORECASE)
+
+
+def strip_leading_wake_word(text: str) -> str:
+    """
+    "Jarvis, open YouTube" => "open YouTube". Wake word gate ek saans wali
+    command poori utterance ke saath bhejta hai; skills ko wake word nahi chahiye.
+    """
+    return _LEADING_WAKE_RE.sub("", text or "", count=1) or (text or "")
+
+
+def is_exit_command(text: str) -> bool:
+    norm = _normalize_command(text)
+    if WAKE_WORD.lower() in _words(norm):
+        return _strip_wake_word(norm) in _ADDRESSED_EXIT_WORDS
+    return norm in EXIT_WORDS
+
+
+def make_early_dispatch(router):
+    """
+    Streaming STT ke partials ke liye callback.
+    STT partials sirf user ke pause (STT_EARLY_DISPATCH_PAUSE_MS) me deta hai;
+    dispatch tabhi jab usi pause ke do lagatar partials same hon aur woh exit
+    word ya EARLY_DISPATCH_INTENTS wala command ho.
+    `should_dispatch.reset()` STT har naye utterance pe, aur pause ke baad phir
+    bolne par bulata hai: warna "scroll" ... "up" me pause se pehle ka partial,
+    ya pichle utterance ka aakhri partial, "stable" maana jaata.
+    """
+    last = {"text": ""}
+
+    def should_dispatch(partial: str) -> bool:
+        norm = _normalize_command(partial)
+        stable = bool(norm) and norm == last["text"]
+        last["text"] = norm
+        if not stable:
+            return False
+        if is_exit_command(norm):
+            return True
+        try:
+            return router.detect_intent(strip_leading_wake_word(norm)) in EARLY_DISPATCH_INTENTS
+        except Exception:
+            return False
+
+    def reset() -> None:
+        last["text"] = ""
+
+    should_dispatch.reset = reset
+    return should_dispatch
+
+
+def _remember_turn(user_text: str, reply: str, brain, chat_history) -> None:
+    # ---- Chat history / learning ----
+    chat_history.append({"role": "user", "content": user_text})
+    chat_history.append({"role": "assistant", "content": reply})
+
+    try:
+        brain.learn_from_turn(user_text, reply)
+    except Exception as e:
+        print("[Main] learn_from_turn error:", e)
+
+    # Auto memory learning
+    try:
+        from skills import memory_skill
+        memory_skill.auto_learn_from_turn(user_text, reply, brain=brain)
+    except Exception as e:
+        print("[Main] auto memory error:", e)
+
+
+def _route_reply(user_text: str, router, brain, chat_history) -> str:
+    # ---- Route + Brain reply ----
+    try:
+        reply = router.handle(user_text, brain=brain, chat_history=chat_history)
+    except TypeError:
+        # In case router.handle brain/chat_history accept nahi karta ho
+        reply = router.handle(user_text)
+    except Exception as e:
+        print("[Main] Error in router.handle:", e)
+        reply = "Mujhe command samajhne mein thoda issue aa gaya."
+
+    reply = (reply or "").strip()
+    if not reply:
+        reply = "Mujhe samajh nahi aaya, ek baar phir se bol do."
+    return reply
+
+
+def handle_turn(user_text: str, router, brain, chat_history) -> str:
+    """
+    Ek turn ka poora logic (route + brain reply + history / learning).
+    Reply string return karta hai; speech output caller ka kaam hai.
+    """
+    user_text = strip_leading_wake_word(user_text)
+    reply = _route_reply(user_text, router, brain, chat_history)
+    _remember_turn(user_text, reply, brain, chat_history)
+    return reply
+
+
+class TurnStream:
+    """
+    handle_turn_stream() ka result: reply ke text pieces (LLM tokens) ka iterator,
+    aur `after()` – history / learning (+ `then()` hooks, e.g. session save).
+
+    Bookkeeping iterator ke andar nahi: ChatContext ka count_tokens RPC brain load
+    tak block kar sakta hai, aur SentenceChunker aakhri (ya akela chhota) sentence
+    stream khatam hone par hi deta hai. Isliye consumer pehle poora iterate karke
+    TTS ko aakhri chunk de, phir after() bulaye (VoicePipeline route stage me).
+    """
+
+    def __init__(self, user_text: str, router, brain, chat_history):
+        self.user_text = user_text
+        self.router = router
+        self.brain = brain
+        self.chat_history = chat_history
+        self.reply: Optional[str] = None
+        self._hooks: List[Callable[[], None]] = []
+
+    def __iter__(self) -> Iterator[str]:
+        handle_stream = getattr(self.router, "handle_stream", None)
+        if handle_stream is None:
+            self.reply = _route_reply(self.user_text, self.router, self.brain, self.chat_history)
+            yield self.reply
+            return
+
+        pieces = []
+        try:
+            for piece in handle_stream(self.user_text, brain=self.brain, chat_history=self.chat_history):
+                if piece:
+                    pieces.append(piece)
+                    yield piece
+        except Exception as e:
+            print("[Main] Error in router.handle_stream:", e)
+            if not pieces:
+                fallback = "Mujhe command samajhne mein thoda issue aa gaya."
+                pieces.append(fallback)
+                yield fallback
+
+        reply = "".join(pieces).strip()
+        if not reply:
+            reply = "Mujhe samajh nahi aaya, ek baar phir se bol do."
+            yield reply
+        self.reply = reply
+
+    def then(self, fn: Callable[[], None]) -> "TurnStream":
+        """after() me history ke baad chalne wala hook."""
+        self._hooks.append(fn)
+        return self
+
+    def after(self) -> None:
+        if self.reply is None:
+            # stream poora iterate nahi hua (pipeline stop)
+            return
+        _remember_turn(self.user_text, self.reply, self.brain, self.chat_history)
+        for fn in self._hooks:
+            try:
+                fn()
+            except Exception as e:
+                print("[Main] post-turn hook error:", e)
+
+
+def handle_turn_stream(user_text: str, router, brain, chat_history) -> TurnStream:
+    """
+    handle_turn() ka streaming version: TTS poora reply bane se pehle bolna
+    shuru kar sake. Iterate karne ke baad `.after()` zaroor bulao (history / learning).
+    """
+    return TurnStream(strip_leading_wake_word(user_text), router, brain, chat_history)
+
+
 def main():
+    # mic / speaker wale imports yahin: headless replay (utils.replay) sirf
+    # handle_turn use karta hai aur bina audio stack ke chalna chahiye
+    from stt.whisper_cpp import WhisperSTT
+    from tts.tts_edge import SimpleTTS
+    from utils.voice_pipeline import VoicePipeline
+
     # ---- Init core components ----
-    stt = WhisperSTT()
-    brain = BrainLLM()
+    # Whisper + LLaMA parallel threads me load + dummy inference.
+    # Listening STT ready hote hi shuru; LLaMA ready na ho to pehli LLM call wait karegi.
+    warmup = WarmupManager()
+    warmup.add("stt", WhisperSTT)
+    warmup.add("brain", _make_brain)
+    warmup.start()
+
+    brain = components.proxy("brain")
     router = IntentRouter()
+    router.warm_up()
     tts = SimpleTTS()
+    stt = warmup.wait("stt")
 
     # ---- Background learner (Memory v2) ----
     try:
@@ -35,89 +250,57 @@ def main():
     except Exception as e:
         print("[BackgroundLearner] Failed to start:", e)
 
-    chat_history = []
+    # token-budgeted: purane turns background me summary me fold hote hain
+    chat_history = ChatContext(brain)
 
-    print("🤖 Jarvis: Namaste, main Jarvis hoon, ready for your command.\n")
-    print("Speak your command, or say 'quit' to exit.\n")
+    # pichle run ki baat-cheet (history + KV state) – brain ready hote hi background me
+    session = SessionStore() if SESSION_ENABLED else None
+    if session is not None:
+        session.restore_async(brain, chat_history)
 
-    # announce completed background jobs (if any)
-    try:
-        done = router.jobs.pop_done_messages()
-        for jr in done:
-            msg = jr.message or "Background task done."
-            print(f"🤖 Jarvis: {msg}")
-            try:
-                tts.speak(msg, stt=stt, enable_barge_in=True)
-            except Exception:
-                pass
-    except Exception as e:
-        print("[Main] background announce error:", e)
+    def on_text(user_text: str):
+        user_text = user_text.strip()
+        if is_exit_command(user_text):
+            return None
+        # history / learning / session save: pipeline aakhri sentence TTS ko dene ke baad chalata hai
+        turn = handle_turn_stream(user_text, router, brain, chat_history)
+        if session is not None:
+            turn.then(lambda: session.save(chat_history))
+        return turn
 
+    # ---- Concurrent pipeline: capture | transcribe | route+LLM | TTS ----
+    pipeline = VoicePipeline(
+        stt=stt,
+        tts=tts,
+        handle_text=on_text,
+        listen_seconds=5,
+        early_dispatch=make_early_dispatch(router),
+    )
 
-    # ---- Main loop: 1 turn = 1 command ----
-    while True:
-        print("🎙️ Listening...")
-        user_text = stt.listen_and_transcribe(duration=5)
+    print("🤖 Jarvis: Namaste, main Jarvis hoon, ready for your command.\n")
+    print("Speak your command, or say 'quit' to exit.\n")
 
-        if not user_text or not user_text.strip():
-            msg = "Mujhe kuch samajh nahi aaya, please repeat."
-            print(f"🤖 Jarvis: {msg}\n")
+    # background jobs (book summary, video analysis) complete hone par announce
+    def announce_jobs() -> None:
+        while True:
             try:
-                tts.speak(msg)
+                for jr in router.jobs.pop_done_messages():
+                    pipeline.say(jr.message or "Background task done.")
+                    if jr.status == "done" and jr.output_text:
+                        pipeline.say(jr.output_text)
             except Exception as e:
-                print("[Main] TTS error (empty input):", e)
-            continue
-
-        user_text = user_text.strip()
-        print(f"🗣️ You said: {user_text}")
-        lower = user_text.lower()
-
-        # ---- Exit ----
-        if lower in EXIT_WORDS:
-            bye = "Theek hai, main ab band ho raha hoon. Bye."
-            print(f"🤖 Jarvis: {bye}")
-            try:
-                tts.speak(bye)
-            finally:
-                break
-
-        # ---- Route + Brain reply ----
-        try:
-            reply = router.handle(user_text, brain=brain, chat_history=chat_history)
-        except TypeError:
-            # In case router.handle brain/chat_history accept nahi karta ho
-            reply = router.handle(user_text)
-        except Exception as e:
-            print("[Main] Error in router.handle:", e)
-            reply = "Mujhe command samajhne mein thoda issue aa gaya."
+                print("[Main] background announce error:", e)
+            time.sleep(2.0)
 
-        reply = (reply or "").strip()
-        if not reply:
-            reply = "Mujhe samajh nahi aaya, ek baar phir se bol do."
+    threading.Thread(target=announce_jobs, name="job-announcer", daemon=True).start()
 
-        # ---- Chat history / learning ----
-        chat_history.append({"role": "user", "content": user_text})
-        chat_history.append({"role": "assistant", "content": reply})
-
-        try:
-            brain.learn_from_turn(user_text, reply)
-        except Exception as e:
-            print("[Main] learn_from_turn error:", e)
+    pipeline.run_forever()
 
-        # Auto memory learning
-        try:
-            from skills import memory_skill
-            memory_skill.auto_learn_from_turn(user_text, reply, brain=brain)
-        except Exception as e:
-            print("[Main] auto memory error:", e)
+    if session is not None:
+        session.save(chat_history, brain=brain)
 
-        # ---- Output (text + speech) ----
-        print(f"🤖 Jarvis: {reply}\n")
-        try:
-            # BARGE-IN abhi off rakha hai → simple speak
-            tts.speak(reply)
-        except Exception as e:
-            print("[Main] TTS error:", e)
+    print("\n[Latency] per-stage ms (this session):")
+    print(get_latency_tracker().report())
 
 
 if __name__ == "__main__":
@@ -1,3 +1,3 @@
-from .memory_store import MemoryStore, get_memory_store
+from .memory_store import MemoryStore, get_memory_store, set_memory_store
 
-__all__ = ["MemoryStore", "get_memory_store"]
+__all__ = ["MemoryStore", "get_memory_store", "set_memory_store"]
@@ -6,12 +6,15 @@ import time
 from dataclasses import dataclass, field
 from typing import Callable, Dict, Optional
 
+from brain.cancellation import REASON_TIMEOUT, CancelToken, cancel_scope
+from brain.priority import background_priority
+
 
 @dataclass
 class JobResult:
     job_id: str
     title: str
-    status: str  # "queued" | "running" | "done" | "error"
+    status: str  # "queued" | "running" | "done" | "error" | "cancelled"
     created_ts: float = field(default_factory=lambda: time.time())
     done_ts: float = 0.0
     message: str = ""
@@ -27,6 +30,8 @@ class BackgroundJobManager:
         self._lock = threading.Lock()
         self._jobs: Dict[str, JobResult] = {}
         self._queue: list[tuple[str, Callable[[], str]]] = []
+        self._tokens: Dict[str, CancelToken] = {}
+        self._timeouts: Dict[str, float] = {}
         self._worker = threading.Thread(target=self._loop, daemon=True)
         self._started = False
 
@@ -35,12 +40,36 @@ class BackgroundJobManager:
             self._started = True
             self._worker.start()
 
-    def submit(self, job_id: str, title: str, fn: Callable[[], str]) -> str:
+    def submit(self, job_id: str, title: str, fn: Callable[[], str], timeout_s: Optional[float] = None) -> str:
+        """`timeout_s`: job ke LLM calls ki wall-clock deadline (job shuru hone se)."""
         with self._lock:
             self._jobs[job_id] = JobResult(job_id=job_id, title=title, status="queued")
             self._queue.append((job_id, fn))
+            self._tokens[job_id] = CancelToken()
+            if timeout_s:
+                self._timeouts[job_id] = timeout_s
         return job_id
 
+    def cancel(self, job_id: str) -> bool:
+        """
+        Queued job hata do; running job ki LLM generation agle token pe ruk jaati hai
+        (job ka fn jo partial mila usi ke saath lautega, status "cancelled").
+        """
+        with self._lock:
+            jr = self._jobs.get(job_id)
+            token = self._tokens.get(job_id)
+            if jr is None or jr.status not in ("queued", "running"):
+                return False
+            if jr.status == "queued":
+                self._queue = [(jid, fn) for jid, fn in self._queue if jid != job_id]
+                jr.status = "cancelled"
+                jr.done_ts = time.time()
+                self._tokens.pop(job_id, None)
+                self._timeouts.pop(job_id, None)
+        if token is not None:
+            token.cancel()
+        return True
+
     def get(self, job_id: str) -> Optional[JobResult]:
         with self._lock:
             return self._jobs.get(job_id)
@@ -53,7 +82,7 @@ class BackgroundJobManager:
         out: list[JobResult] = []
         with self._lock:
             for jid, jr in list(self._jobs.items()):
-                if jr.status in ("done", "error") and jr.message:
+                if jr.status in ("done", "error", "cancelled") and jr.message:
                     out.append(jr)
                     # mark as announced
                     jr.message = ""
@@ -71,16 +100,32 @@ class BackgroundJobManager:
                 continue
 
             job_id, fn = job
+            with self._lock:
+                token = self._tokens.get(job_id) or CancelToken()
+                timeout_s = self._timeouts.pop(job_id, None)
+            if timeout_s:
+                # deadline job shuru hone se gino, queue me wait se nahi
+                token.deadline = time.monotonic() + timeout_s
             try:
                 with self._lock:
                     self._jobs[job_id].status = "running"
-                result_text = fn()
+                # job ke LLM calls background class me: voice turn aaye to ruk jaate hain;
+                # cancel() / deadline pe generation agle token pe rukti hai
+                with background_priority(), cancel_scope(token):
+                    result_text = fn()
                 with self._lock:
                     jr = self._jobs[job_id]
-                    jr.status = "done"
                     jr.done_ts = time.time()
                     jr.output_text = result_text
-                    jr.message = f"✅ '{jr.title}' complete."
+                    if token.cancelled:
+                        jr.status = "cancelled"
+                        if token.reason == REASON_TIMEOUT:
+                            jr.message = f"⏱️ '{jr.title}' time limit ({timeout_s:.0f}s) me poora nahi hua."
+                        else:
+                            jr.message = f"⏹️ '{jr.title}' stopped ({token.reason})."
+                    else:
+                        jr.status = "done"
+                        jr.message = f"✅ '{jr.title}' complete."
             except Exception as e:
                 with self._lock:
                     jr = self._jobs[job_id]
@@ -88,3 +133,6 @@ class BackgroundJobManager:
                     jr.done_ts = time.time()
                     jr.output_text = ""
                     jr.message = f"❌ '{jr.title}' failed: {e}"
+            finally:
+                with self._lock:
+                    self._tokens.pop(job_id, None)
@@ -5,6 +5,9 @@ from __future__ import annotations
 import threading
 import time
 
+from brain.cancellation import CancelToken, cancel_scope
+from brain.priority import background_priority
+
 
 class BackgroundLearner(threading.Thread):
     """
@@ -26,6 +29,8 @@ class BackgroundLearner(threading.Thread):
         # safety: at least 60 sec
         self.interval = max(60, int(interval_seconds))
         self._stop_flag = threading.Event()
+        # stop() pe chal rahi tick ki LLM generation bhi beech me ruk jaaye
+        self._token = CancelToken()
 
     # memory/background_learner.py
     def start(self):
@@ -49,7 +54,8 @@ class BackgroundLearner(threading.Thread):
             try:
                 if self.brain is not None and hasattr(self.brain, "background_tick"):
                     # Future ke liye hook: agar tum BrainLLM me yeh method banao
-                    self.brain.background_tick()
+                    with background_priority(), cancel_scope(self._token):
+                        self.brain.background_tick()
                 else:
                     # Abhi ke liye sirf log
                     print("[BackgroundLearner] tick (no background_tick() on brain)")
@@ -60,3 +66,4 @@ class BackgroundLearner(threading.Thread):
 
     def stop(self):
         self._stop_flag.set()
+        self._token.cancel()
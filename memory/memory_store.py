@@ -100,3 +100,12 @@ def get_memory_store() -> MemoryStore:
         _store = MemoryStore(mem_path)
         print(f"[MemoryStore] Using memory file at: {mem_path}")
     return _store
+
+
+def set_memory_store(store: Optional[MemoryStore]) -> None:
+    """
+    Process-wide store badlo (e.g. headless replay me temp file, taaki asli
+    memory_data.json me benchmark turns na bhar jaayein). None => default pe wapas.
+    """
+    global _store
+    _store = store
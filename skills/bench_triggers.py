@@ -0,0 +1,351 @@
+# skills/bench_triggers.py
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from typing import Callable, Dict, List, Optional
+
+from config import INTENT_EXAMPLES_PATH
+
+from . import fuzzy_triggers, triggers
+from .triggers import BROWSER, DESKTOP, MEMORY, ROUTER, VISION, scan
+
+# ---------------- purana implementation (reference) ---------------- #
+# Compiled tables ke saath semantics same rehne chahiye: yeh wahi if-chains hain
+# jo pehle IntentRouter._detect_intent_rules aur skill handlers me the.
+
+
+def legacy_detect_intent(text: str) -> str:
+    if not text:
+        return "chat"
+    t = text.lower().strip()
+    if "download" in t and any(kw in t for kw in ["youtube", "video", "audio", "song", "gana", "mp3"]):
+        return "tasks"
+    if any(kw in t for kw in ["read the screen", "read screen", "screen par", "screen pe", "what's on my screen",
+                              "camera", "webcam", "face detect", "mujhe camera pe"]):
+        return "vision"
+    if any(kw in t for kw in ["scroll", "page down", "page up", "next tab", "previous tab", "new tab",
+                              "naya tab", "close tab", "close this tab", "tab band karo",
+                              "go back", "go forward", "refresh page", "reload page"]):
+        return "browser"
+    if any(kw in t for kw in ["open ", "launch ", "start ", "close ", "band ", "minimize", "maximize", "switch window", "alt tab"]):
+        return "desktop_control"
+    if any(kw in t for kw in ["remember that", "remember this", "yaad rakh", "yaad rakhna"]):
+        return "memory_add"
+    if any(kw in t for kw in ["what do you remember about me", "what do you know about me",
+                              "tum mere bare mein kya jante ho", "tumhe mere baare mein kya yaad hai"]):
+        return "memory_query"
+    if ("who is" in t) or ("who was" in t) or ("what is" in t) or t.startswith("tell me about") or ("kaun hai" in t) or ("kya hai" in t):
+        return "knowledge"
+    if "screen" in t and any(w in t for w in ["read", "padh", "padho", "dekho", "see"]):
+        return "read_screen"
+    if "youtube.com" in t or "youtu.be" in t:
+        return "yt_summary"
+    if any(w in t for w in ["image bana", "photo bana", "wallpaper", "ai image", "image generate"]):
+        return "image"
+    if any(w in t for w in ["video bana", "reel bana", "clip bana", "video generate"]):
+        return "video"
+    if "download" in t or "install" in t:
+        return "download"
+    if any(w in t for w in ["search", "google", "internet pe", "on internet", "online"]):
+        return "web"
+    if "calculate" in t or "calculator" in t:
+        return "calc"
+    if any(kw in t for kw in ["translate", "isko hindi me bolo", "isko english me bolo",
+                              "hindi me translate karo", "english me translate karo"]):
+        return "translate"
+    if "read book" in t or "kitab" in t or ("book" in t and "screen" not in t):
+        return "read_book"
+    return "chat"
+
+
+def legacy_vision(t: str):
+    t = t.lower().strip()
+    if any(kw in t for kw in ["remember my face", "register my face", "meri shakal yaad kar", "meri shakal yaad rakh",
+                              "mera chehra yaad rakh", "mera face yaad rakh", "face register kar"]):
+        return "enroll_face"
+    if any(kw in t for kw in ["who am i", "do you recognize me", "kya tum mujhe pehchante ho",
+                              "mera chehra pehchano", "dekho kaun hai", "do you see me"]):
+        return "recognize_face"
+    if any(kw in t for kw in ["see someone on camera", "camera par koi hai", "kya tumhe koi dikhta hai",
+                              "face detect", "check camera", "camera check karo"]):
+        return "face_presence"
+    if "screen" in t and any(w in t for w in ["read", "padh", "padho", "dekho", "dekh lo", "see"]):
+        return "read_screen"
+    return None
+
+
+def legacy_browser(t: str):
+    t = t.lower().strip()
+    if "scroll" in t or "page down" in t or "page up" in t:
+        return "scroll"
+    for name, words in (
+        ("back", ["go back", "back ja", "peeche ja", "peeche chalo"]),
+        ("forward", ["go forward", "aage ja", "aage chalo"]),
+        ("refresh", ["refresh", "reload", "page reload", "page refresh"]),
+        ("new_tab", ["new tab", "naya tab", "open new tab"]),
+        ("close_tab", ["close this tab", "close tab", "ye tab band karo", "tab band karo"]),
+        ("next_tab", ["next tab", "agli tab", "aage wala tab"]),
+        ("previous_tab", ["previous tab", "pichla tab", "pehle wala tab"]),
+        ("page_top", ["top of page", "page top", "bilkul upar"]),
+        ("page_bottom", ["bottom of page", "page end", "bilkul niche"]),
+        ("address_bar", ["address bar", "url bar", "search bar", "focus url", "focus address bar"]),
+    ):
+        if any(w in t for w in words):
+            return name
+    return None
+
+
+def legacy_desktop(t: str):
+    t = " ".join(t.lower().split())
+    if t.startswith("open ") or t.startswith("launch ") or t.startswith("start ") or " open " in t or "launch " in t:
+        return "open"
+    if t.startswith("close ") or t.startswith("band ") or " close " in t:
+        if any(x in t for x in ["close active", "close this", "close current", "isko band", "isko close", "active band"]):
+            return "close_active"
+        return "close"
+    if any(w in t for w in ["minimize", "minimise", "small", "minim"]):
+        return "minimize"
+    if "maximize" in t or "full screen" in t or "fullscreen" in t:
+        return "maximize"
+    if any(w in t for w in ["switch", "next window", "tab change", "window change", "alt tab"]):
+        return "switch"
+    return None
+
+
+def legacy_memory(t: str):
+    t = t.lower()
+    if any(kw in t for kw in ["remember that", "remember this", "yaad rakh"]):
+        return "remember"
+    if "what do you remember about me" in t or "tum mere bare mein kya jante ho" in t:
+        return "recall"
+    return None
+
+
+_LEGACY_SUB: Dict[str, Callable] = {
+    "vision": legacy_vision,
+    "browser": legacy_browser,
+    "desktop_control": legacy_desktop,
+    "memory_add": legacy_memory,
+}
+_SUB_TABLES = {
+    "vision": VISION,
+    "browser": BROWSER,
+    "desktop_control": DESKTOP,
+    "memory_add": MEMORY,
+}
+
+
+# ---------------- corpus ---------------- #
+
+_FILLER = (
+    "yaar", "please", "abhi", "jaldi se", "thoda", "ok jarvis", "bhai", "zara", "na", "to",
+    "aaj", "kal", "mera", "ye", "wo", "ek baar", "phir se", "actually", "basically", "so",
+)
+
+
+def build_corpus(n: int, seed: int = 0, intents: Optional[set] = None) -> List[str]:
+    """intent_examples.jsonl ke utterances + filler words / joins (lambi utterances bhi)."""
+    rng = random.Random(seed)
+    with open(INTENT_EXAMPLES_PATH, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    base = [r["text"] for r in rows if intents is None or r["intent"] in intents]
+    corpus = []
+    for _ in range(n):
+        parts = [rng.choice(base)]
+        for _ in range(rng.choice((0, 0, 1, 2, 4))):
+            parts.insert(rng.randrange(len(parts) + 1), rng.choice(_FILLER))
+        if rng.random() < 0.2:
+            # Whisper kabhi kabhi do sentences ek saath de deta hai
+            parts.append(rng.choice(base))
+        text = " ".join(parts)
+        corpus.append(text.capitalize() if rng.random() < 0.5 else text)
+    return corpus
+
+
+_VOWEL_SWAPS = (("aa", "a"), ("ee", "i"), ("oo", "u"), ("a", "aa"), ("i", "ee"))
+_ASPIRATES = (("dh", "d"), ("bh", "b"), ("kh", "k"), ("th", "t"), ("d", "dh"), ("b", "bh"), ("k", "kh"))
+
+
+def _misspell(word: str, rng: random.Random) -> str:
+    """Whisper ke Roman Hinglish jaise errors: vowel length, aspirates, suffix, ek letter gaayab."""
+    op = rng.randrange(5)
+    if op == 0:
+        pairs = [p for p in _VOWEL_SWAPS if p[0] in word]
+    elif op == 1:
+        pairs = [p for p in _ASPIRATES if p[0] in word]
+    elif op == 2:
+        return word[:-1] if word[-1] in "aeiou" else word + rng.choice("oa")
+    elif op == 3 and len(word) >= 6:
+        i = rng.randrange(1, len(word) - 1)
+        return word[:i] + word[i + 1:]
+    else:
+        return word + word[-1] if word[-1] not in "aeiou" else word
+    if not pairs:
+        return word
+    a, b = rng.choice(pairs)
+    return word.replace(a, b, 1)
+
+
+def asr_noise(text: str, rng: random.Random) -> str:
+    words = text.split()
+    for i, w in enumerate(words):
+        if w.isalpha() and len(w) >= 3 and rng.random() < 0.4:
+            words[i] = _misspell(w, rng)
+    return " ".join(words)
+
+
+# ---------------- benchmark ---------------- #
+
+def _new_route(text: str):
+    hits = scan(text)
+    intent = ROUTER.first(hits)
+    table = _SUB_TABLES.get(intent)
+    # skill handler same text pe scan() bulata hai => cache hit
+    sub = table.first(scan(text)) if table is not None else None
+    return intent, sub
+
+
+def _legacy_route(text: str):
+    intent = legacy_detect_intent(text)
+    fn = _LEGACY_SUB.get(intent)
+    return intent, fn(text) if fn is not None else None
+
+
+def _time(fn: Callable, corpus: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for text in corpus:
+            fn(text)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(corpus) * 1e6
+
+
+def run_bench(n: int, repeat: int) -> dict:
+    corpus = build_corpus(n)
+    triggers.scan("warm up")  # automaton compile bench ke bahar
+
+    mismatches = [t for t in corpus if _legacy_route(t) != _new_route(t)]
+
+    legacy_detect_us = _time(legacy_detect_intent, corpus, repeat)
+    new_detect_us = _time(lambda t: ROUTER.first(scan(t)), corpus, repeat)
+    legacy_route_us = _time(_legacy_route, corpus, repeat)
+    new_route_us = _time(_new_route, corpus, repeat)
+    return {
+        "utterances": len(corpus),
+        "avg_chars": sum(len(t) for t in corpus) / len(corpus),
+        "phrases": len(triggers.all_phrases()),
+        "legacy_detect_us": legacy_detect_us,
+        "automaton_detect_us": new_detect_us,
+        "legacy_route_dispatch_us": legacy_route_us,
+        "automaton_route_dispatch_us": new_route_us,
+        "mismatches": mismatches,
+    }
+
+
+def _fuzzy_route(text: str) -> str:
+    intent = ROUTER.first(scan(text))
+    if intent != "chat":
+        return intent
+    fixed = fuzzy_triggers.correct(text)
+    return ROUTER.first(scan(fixed)) if fixed is not None else "chat"
+
+
+def run_fuzzy_eval(n: int, repeat: int, seed: int = 0) -> dict:
+    """
+    Noisy commands (asr_noise) jinpe exact rules "chat" dete hain: fuzzy index
+    kitne sahi intent pe wapas laata hai. Saath me saaf chat utterances pe
+    false positives, aur correct() ka time (sirf rule-miss path pe chalta hai).
+    """
+    rng = random.Random(seed)
+    corpus = build_corpus(n, seed)
+    noisy = []
+    for text in corpus:
+        intent = ROUTER.first(scan(text))
+        if intent == "chat":
+            continue
+        bad = asr_noise(text, rng)
+        if ROUTER.first(scan(bad)) == "chat":
+            noisy.append((bad, intent))
+
+    rescued = wrong = 0
+    wrong_examples = []
+    for bad, intent in noisy:
+        got = _fuzzy_route(bad)
+        if got == intent:
+            rescued += 1
+        elif got != "chat":
+            wrong += 1
+            wrong_examples.append((bad, intent, got))
+    # asli chat (label "chat") utterances, thode ASR noise ke saath bhi
+    chats = build_corpus(max(1, n // 5), seed + 1, intents={"chat"})
+    chats += [asr_noise(t, rng) for t in chats]
+    false_pos = [(t, _fuzzy_route(t)) for t in chats if _fuzzy_route(t) != "chat"]
+
+    texts = [bad for bad, _ in noisy] + chats
+    fuzzy_triggers._index = None
+    fuzzy_triggers._phonetic_cache.clear()
+    t0 = time.perf_counter()
+    index = fuzzy_triggers.get_index()
+    build_ms = (time.perf_counter() - t0) * 1e3
+    t0 = time.perf_counter()
+    for t in texts:
+        fuzzy_triggers.correct(t)
+    cold_us = (time.perf_counter() - t0) / max(1, len(texts)) * 1e6
+    warm_us = _time(fuzzy_triggers.correct, texts, repeat) if texts else 0.0
+    return {
+        "noisy_commands": len(noisy),
+        "rescued": rescued,
+        "wrong_intent": wrong,
+        "wrong_examples": wrong_examples,
+        "chat_utterances": len(chats),
+        "false_positives": false_pos,
+        "fuzzy_phrases": len(index),
+        "build_ms": build_ms,
+        "cold_us": cold_us,
+        "warm_us": warm_us,
+    }
+
+
+def print_fuzzy_report(r: dict) -> None:
+    n = max(1, r["noisy_commands"])
+    print(f"{r['fuzzy_phrases']} fuzzy phrases, index build {r['build_ms']:.1f} ms")
+    print(f"noisy commands missed by exact rules: {r['noisy_commands']}")
+    print(f"  rescued to the right intent: {r['rescued']} ({100 * r['rescued'] / n:.1f}%)")
+    print(f"  routed to a wrong skill:     {r['wrong_intent']} ({100 * r['wrong_intent'] / n:.1f}%)")
+    c = max(1, r["chat_utterances"])
+    print(f"chat utterances turned into commands: {len(r['false_positives'])} / {r['chat_utterances']}"
+          f" ({100 * len(r['false_positives']) / c:.2f}%)")
+    print(f"correct() per utterance: {r['cold_us']:.1f} us cold caches, {r['warm_us']:.1f} us warm")
+    for bad, want, got in r["wrong_examples"][:5]:
+        print(f"  wrong: {bad!r}: want {want}, got {got}")
+    for t, got in r["false_positives"][:5]:
+        print(f"  false positive: {t!r} -> {got}")
+
+
+def print_report(r: dict) -> None:
+    print(f"{r['utterances']} utterances (avg {r['avg_chars']:.0f} chars), {r['phrases']} trigger phrases")
+    print(f"{'':<26}{'legacy us':>11}{'automaton us':>14}{'speedup':>9}")
+    for label, a, b in (
+        ("detect_intent", r["legacy_detect_us"], r["automaton_detect_us"]),
+        ("route + sub-command", r["legacy_route_dispatch_us"], r["automaton_route_dispatch_us"]),
+    ):
+        print(f"{label:<26}{a:>11.2f}{b:>14.2f}{a / b:>8.2f}x")
+    print(f"mismatches vs legacy: {len(r['mismatches'])}")
+    for t in r["mismatches"][:10]:
+        print(f"  {t!r}: legacy={_legacy_route(t)} automaton={_new_route(t)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Trigger automaton vs legacy keyword scans")
+    parser.add_argument("-n", type=int, default=20000, help="corpus size")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--fuzzy", action="store_true", help="fuzzy trigger index ka ASR-noise eval")
+    args = parser.parse_args()
+    if args.fuzzy:
+        print_fuzzy_report(run_fuzzy_eval(args.n, args.repeat))
+    else:
+        print_report(run_bench(args.n, args.repeat))
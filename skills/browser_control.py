@@ -6,6 +6,8 @@ from typing import Callable
 
 import pyautogui
 
+from .triggers import BROWSER, BROWSER_SCROLL, scan
+
 # Safety: fail-safe on top-left corner
 pyautogui.FAILSAFE = True
 
@@ -42,19 +44,22 @@ def handle(text: str) -> str:
     if not text:
         return "Mere paas browser command clear nahi aayi."
 
-    t = text.lower().strip()
+    # sub-command + scroll modifiers: skills.triggers (router wala ek hi scan)
+    hits = scan(text)
+    command = BROWSER.first(hits)
 
     # ---------- SCROLLING ---------- #
-    if "scroll" in t or "page down" in t or "page up" in t:
+    if command == "scroll":
         amount = -800  # default down
+        modifiers = BROWSER_SCROLL.matches(hits)
 
-        if "up" in t or "upar" in t or "top" in t:
+        if "up" in modifiers:
             amount = 800  # scroll up
 
         # fine control
-        if any(w in t for w in ["thoda", "little", "kam"]):
+        if "less" in modifiers:
             amount = int(amount / 2)
-        if any(w in t for w in ["zyada", "fast", "bahut"]):
+        if "more" in modifiers:
             amount = amount * 2
 
         err = _safe_action(pyautogui.scroll, amount)
@@ -65,14 +70,14 @@ def handle(text: str) -> str:
         return f"Page ko {direction} scroll kar diya."
 
     # ---------- NAVIGATION: BACK / FORWARD ---------- #
-    if any(w in t for w in ["go back", "back ja", "peeche ja", "peeche chalo"]):
+    if command == "back":
         # Alt + Left
         err = _safe_action(pyautogui.hotkey, "alt", "left")
         if err:
             return "Back jaane me thoda issue aa gaya: " + err
         return "Browser ko ek page peeche kar diya."
 
-    if any(w in t for w in ["go forward", "aage ja", "aage chalo"]):
+    if command == "forward":
         # Alt + Right
         err = _safe_action(pyautogui.hotkey, "alt", "right")
         if err:
@@ -80,70 +85,53 @@ def handle(text: str) -> str:
         return "Browser ko ek page aage kar diya."
 
     # ---------- REFRESH / RELOAD ---------- #
-    if any(w in t for w in ["refresh", "reload", "page reload", "page refresh"]):
+    if command == "refresh":
         err = _safe_action(pyautogui.press, "f5")
         if err:
             return "Page refresh karte waqt problem aa gayi: " + err
         return "Page ko refresh kar diya."
 
     # ---------- NEW TAB / CLOSE TAB ---------- #
-    if any(w in t for w in ["new tab", "naya tab", "open new tab"]):
+    if command == "new_tab":
         err = _safe_action(pyautogui.hotkey, "ctrl", "t")
         if err:
             return "Naya tab open karne me issue aa gaya: " + err
         return "Naya tab open kar diya."
 
-    if any(
-        w in t
-        for w in [
-            "close this tab",
-            "close tab",
-            "ye tab band karo",
-            "tab band karo",
-        ]
-    ):
+    if command == "close_tab":
         err = _safe_action(pyautogui.hotkey, "ctrl", "w")
         if err:
             return "Tab band karte waqt issue aa gaya: " + err
         return "Current tab close kar diya."
 
     # ---------- TAB SWITCHING ---------- #
-    if any(w in t for w in ["next tab", "agli tab", "aage wala tab"]):
+    if command == "next_tab":
         err = _safe_action(pyautogui.hotkey, "ctrl", "tab")
         if err:
             return "Next tab me switch karne me problem aa gayi: " + err
         return "Next tab pe switch kar diya."
 
-    if any(w in t for w in ["previous tab", "pichla tab", "pehle wala tab"]):
+    if command == "previous_tab":
         err = _safe_action(pyautogui.hotkey, "ctrl", "shift", "tab")
         if err:
             return "Previous tab me switch karne me problem aa gayi: " + err
         return "Previous tab pe switch kar diya."
 
     # ---------- TOP / BOTTOM (HOME / END) ---------- #
-    if any(w in t for w in ["top of page", "page top", "bilkul upar"]):
+    if command == "page_top":
         err = _safe_action(pyautogui.press, "home")
         if err:
             return "Page ke top par le jaate waqt problem aa gayi: " + err
         return "Page ke top par le gaya."
 
-    if any(w in t for w in ["bottom of page", "page end", "bilkul niche"]):
+    if command == "page_bottom":
         err = _safe_action(pyautogui.press, "end")
         if err:
             return "Page ke end par le jaate waqt problem aa gayi: " + err
         return "Page ke end par le gaya."
 
     # ---------- ADDRESS BAR FOCUS ---------- #
-    if any(
-        w in t
-        for w in [
-            "address bar",
-            "url bar",
-            "search bar",
-            "focus url",
-            "focus address bar",
-        ]
-    ):
+    if command == "address_bar":
         err = _safe_action(pyautogui.hotkey, "ctrl", "l")
         if err:
             return "Address bar focus karte waqt error aa gaya: " + err
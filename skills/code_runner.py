@@ -214,7 +214,9 @@ def handle(text: str, brain=None) -> str:
     history = [
         {"role": "user", "content": code_prompt}
     ]
-    raw = brain.chat(history)
+    # generated code me identifiers / boilerplate baar baar aate hain: prompt-lookup
+    # decoding unhe prompt + ab tak ke output se draft karta hai
+    raw = brain.chat(history, speculative=True)
     code = _clean_code_fences(raw)
 
     if not code:
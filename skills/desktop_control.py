@@ -10,6 +10,8 @@ from typing import Optional, Tuple, List
 
 import psutil
 
+from .triggers import DESKTOP, scan
+
 # Optional (UI/window control)
 try:
     import pygetwindow as gw
@@ -276,10 +278,11 @@ def handle(text: str) -> str:
         return "Kya open ya close karna hai?"
 
     raw = text.strip()
-    t = _norm(raw)
+    # sub-command: skills.triggers.DESKTOP (router wala scan hi, dobara scan nahi)
+    command = DESKTOP.first(scan(raw))
 
     # ---- OPEN ----
-    if t.startswith("open ") or t.startswith("launch ") or t.startswith("start ") or " open " in t or "launch " in t:
+    if command == "open":
         target = _extract_after_keywords(raw, ["open", "launch", "start"])
         if not target:
             return "Kya open karna hai? App ya folder ka naam bolo."
@@ -335,9 +338,9 @@ def handle(text: str) -> str:
             return f"Main {target} ko open nahi kar paaya. App ka exact naam ya path bolo."
 
     # ---- CLOSE ----
-    if t.startswith("close ") or t.startswith("band ") or " close " in t:
+    if command in ("close", "close_active"):
         # close active
-        if any(x in t for x in ["close active", "close this", "close current", "isko band", "isko close", "active band"]):
+        if command == "close_active":
             title = _get_active_window_title()
             if title:
                 closed = _close_windows_by_title_contains(title)
@@ -368,7 +371,7 @@ def handle(text: str) -> str:
         return f"Mujhe {target} close karne ke liye exact app name nahi mila."
 
     # ---- MINIMIZE / MAXIMIZE / SWITCH ----
-    if any(w in t for w in ["minimize", "minimise", "small", "minim"]):
+    if command == "minimize":
         if gw:
             try:
                 w = gw.getActiveWindow()
@@ -385,7 +388,7 @@ def handle(text: str) -> str:
                 pass
         return "Window minimize nahi ho paayi."
 
-    if "maximize" in t or "full screen" in t or "fullscreen" in t:
+    if command == "maximize":
         if gw:
             try:
                 w = gw.getActiveWindow()
@@ -402,7 +405,7 @@ def handle(text: str) -> str:
                 pass
         return "Window maximize nahi ho paayi."
 
-    if any(w in t for w in ["switch", "next window", "tab change", "window change", "alt tab"]):
+    if command == "switch":
         if pyautogui:
             try:
                 pyautogui.hotkey("alt", "tab")
@@ -138,7 +138,8 @@ def handle(text: str, brain) -> str:
     )
 
     history = [{"role": "user", "content": prompt}]
-    raw_reply = brain.chat(history)
+    # code output copy-heavy hai (request ke naam, repeated identifiers): prompt-lookup decoding
+    raw_reply = brain.chat(history, speculative=True)
 
     if not raw_reply:
         return "Dev agent se koi output nahi aaya, shayad internal error hua."
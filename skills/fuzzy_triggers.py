@@ -0,0 +1,264 @@
+# skills/fuzzy_triggers.py
+from __future__ import annotations
+
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from config import FUZZY_CHARS_PER_EDIT, FUZZY_MAX_EDITS
+
+from . import triggers
+
+# Roman Hinglish ki spelling variations ek hi key pe: aspirates (kh/k, dh/d, bh/b),
+# lambe vowels (aa/a, ee/i, oo/u), c/k/q, w/v, z/j, double letters.
+# "ch" alag rehta hai (marker "C"), warna "chal" aur "kal" ek ho jaate.
+_DIGRAPHS = {
+    "chh": "C", "ch": "C", "sh": "s", "kh": "k", "gh": "g", "jh": "j", "th": "t",
+    "dh": "d", "ph": "f", "bh": "b", "ck": "k", "ee": "i", "oo": "u",
+}
+_DIGRAPH_RE = re.compile("|".join(sorted(_DIGRAPHS, key=len, reverse=True)) + r"|\W")
+_LETTERS = str.maketrans({"c": "k", "q": "k", "w": "v", "z": "j"})
+_REPEAT_RE = re.compile(r"(.)\1+")
+_WORD_RE = re.compile(r"\w+(?:'\w+)*")
+
+_phonetic_cache: Dict[str, str] = {}
+_CACHE_MAX = 4096
+
+
+def phonetic(word: str) -> str:
+    """
+    Ek word ki phonetic key: "bandh" / "band" => "band", "yaad" / "yad" => "yad",
+    "rakho" => "rako". Keys ke beech edit distance hi typo count hai.
+    """
+    key = _phonetic_cache.get(word)
+    if key is None:
+        key = _DIGRAPH_RE.sub(lambda m: _DIGRAPHS.get(m.group(), ""), word.lower())
+        key = _REPEAT_RE.sub(r"\1", key.translate(_LETTERS))
+        if len(key) > 2 and key.endswith("h"):
+            key = key[:-1]      # "yah" / "ya", "hah" / "ha"
+        if len(_phonetic_cache) >= _CACHE_MAX:
+            _phonetic_cache.clear()
+        _phonetic_cache[word] = key
+    return key
+
+
+def _peq(pattern: str) -> Dict[str, int]:
+    peq: Dict[str, int] = {}
+    bit = 1
+    for ch in pattern:
+        peq[ch] = peq.get(ch, 0) | bit
+        bit <<= 1
+    return peq
+
+
+def _distance(peq: Dict[str, int], m: int, text: str) -> int:
+    """
+    Levenshtein(pattern, text), bit-parallel (Myers / Hyyro): pattern ke saare
+    DP cells ek int me, text ke har char pe kuch bit ops. `peq` = _peq(pattern),
+    ek query ke saare BK-tree nodes ke liye ek hi baar banta hai.
+    """
+    if m == 0:
+        return len(text)
+    mask = (1 << m) - 1
+    last = 1 << (m - 1)
+    pv, mv, score = mask, 0, m
+    for ch in text:
+        eq = peq.get(ch, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+    return score
+
+
+def edit_distance(a: str, b: str) -> int:
+    return _distance(_peq(a), len(a), b)
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree (edit distance metric space). Node = [key, {distance: child}].
+    search(q, r) sirf un children me jaata hai jinki edge distance |d - r|..d + r
+    ke andar ho (triangle inequality), to poori vocabulary compare nahi hoti.
+    """
+
+    def __init__(self, keys=()):
+        self.root: Optional[list] = None
+        self.size = 0
+        for k in keys:
+            self.add(k)
+
+    def add(self, key: str) -> None:
+        if self.root is None:
+            self.root = [key, {}]
+            self.size = 1
+            return
+        node = self.root
+        while True:
+            d = edit_distance(key, node[0])
+            if d == 0:
+                return
+            child = node[1].get(d)
+            if child is None:
+                node[1][d] = [key, {}]
+                self.size += 1
+                return
+            node = child
+
+    def search(self, query: str, radius: int) -> List[Tuple[str, int]]:
+        if self.root is None:
+            return []
+        peq, m = _peq(query), len(query)
+        out: List[Tuple[str, int]] = []
+        stack = [self.root]
+        while stack:
+            key, children = stack.pop()
+            d = _distance(peq, m, key)
+            if d <= radius:
+                out.append((key, d))
+            lo, hi = d - radius, d + radius
+            for cd, child in children.items():
+                if lo <= cd <= hi:
+                    stack.append(child)
+        return out
+
+
+def _word_radius(n: int) -> int:
+    # 3 chars tak ke words ("ja", "tab", "kam") me typo allow nahi – sirf phonetic match,
+    # warna "aage jo" bhi "aage ja" ban jaata
+    if n <= 3:
+        return 0
+    return min(FUZZY_MAX_EDITS, 1 if n <= 6 else 2)
+
+
+class FuzzyTriggerIndex:
+    """
+    Trigger phrases (skills.triggers ki saari tables) ka typo-tolerant index.
+
+    - Har phrase word ki phonetic key ek BKTree me; utterance ke har word ke
+      nearby keys (radius _word_radius) search + per-word cache (bolchaal ke
+      words repeat hote hain, to zyada tar lookups dict hit hain).
+    - Phrase tab match jab uske saare words lagataar mile aur total typos
+      phrase ke budget (FUZZY_CHARS_PER_EDIT, FUZZY_MAX_EDITS) ke andar hon.
+    - correct() matched words ko phrase ke asli spelling se badal deta hai;
+      routing phir wahi exact rules karte hain (priorities, all_of, anchors sab same).
+    """
+
+    def __init__(self, phrases):
+        self._phrases: List[Tuple[str, Tuple[str, ...], int]] = []
+        self._by_first: Dict[str, List[int]] = {}
+        vocab = set()
+        for phrase in phrases:
+            words = phrase.split()
+            # URLs / partial words ("youtu.be", "minim") pe fuzzy matching ka matlab nahi
+            if not words or any(not w.replace("'", "").isalpha() for w in words):
+                continue
+            keys = tuple(phonetic(w) for w in words)
+            budget = min(FUZZY_MAX_EDITS, sum(len(k) for k in keys) // FUZZY_CHARS_PER_EDIT)
+            self._by_first.setdefault(keys[0], []).append(len(self._phrases))
+            self._phrases.append((" ".join(words), keys, budget))
+            vocab.update(keys)
+        self.tree = BKTree(sorted(vocab))
+        self._near: Dict[str, Dict[str, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._phrases)
+
+    def near(self, key: str) -> Dict[str, int]:
+        """phrase-word keys jo `key` se typo radius ke andar hain: {key: distance}"""
+        hits = self._near.get(key)
+        if hits is None:
+            hits = dict(self.tree.search(key, _word_radius(len(key))))
+            if len(self._near) >= _CACHE_MAX:
+                self._near.clear()
+            self._near[key] = hits
+        return hits
+
+    def find(self, text: str) -> List[Tuple[int, int, str, int]]:
+        """
+        Non-overlapping fuzzy matches: (start, end, phrase, typos) – char offsets
+        `text` me. Lambe phrase pehle, barabar pe kam typos.
+        """
+        spans = [(m.start(), m.end(), m.group()) for m in _WORD_RE.finditer(text)]
+        if not spans:
+            return []
+        near = [self.near(phonetic(w)) for _, _, w in spans]
+        phrases, by_first = self._phrases, self._by_first
+        found = []
+        for i, first in enumerate(near):
+            for k0, d0 in first.items():
+                for p in by_first.get(k0, ()):
+                    phrase, keys, budget = phrases[p]
+                    j = i + len(keys)
+                    if j > len(spans):
+                        continue
+                    typos = d0
+                    for n in range(1, len(keys)):
+                        d = near[i + n].get(keys[n])
+                        if d is None:
+                            break
+                        typos += d
+                    else:
+                        if typos > budget:
+                            continue
+                        said = " ".join(w for _, _, w in spans[i:j]).lower()
+                        if said != phrase:
+                            found.append((i, j, phrase, typos))
+        if not found:
+            return []
+        found.sort(key=lambda f: (f[0] - f[1], f[3], f[0]))
+        taken = [False] * len(spans)
+        out = []
+        for i, j, phrase, typos in found:
+            if any(taken[i:j]):
+                continue
+            taken[i:j] = [True] * (j - i)
+            out.append((spans[i][0], spans[j - 1][1], phrase, typos))
+        out.sort()
+        return out
+
+    def correct(self, text: str) -> Optional[str]:
+        """Fuzzy matched trigger words ko sahi spelling se badla text; kuch na mile to None."""
+        matches = self.find(text)
+        if not matches:
+            return None
+        parts, pos = [], 0
+        for start, end, phrase, _ in matches:
+            parts.append(text[pos:start])
+            parts.append(phrase)
+            pos = end
+        parts.append(text[pos:])
+        return "".join(parts)
+
+
+_index: Optional[FuzzyTriggerIndex] = None
+_lock = threading.Lock()
+
+
+def get_index() -> FuzzyTriggerIndex:
+    global _index
+    if _index is None:
+        with _lock:
+            if _index is None:
+                _index = FuzzyTriggerIndex(triggers.all_phrases())
+    return _index
+
+
+def correct(text: str) -> Optional[str]:
+    """
+    ASR ke galat spelling wale trigger words theek karke text; None = koi fuzzy
+    match nahi. Router sirf tab use karta hai jab exact rules "chat" dein:
+
+        fixed = correct("yad rakho ki kal meeting hai")   # "yaad rakh ki kal meeting hai"
+    """
+    if not text:
+        return None
+    return get_index().correct(text)
@@ -6,6 +6,8 @@ from typing import Optional
 
 from memory.memory_store import get_memory_store
 
+from .triggers import MEMORY, scan
+
 
 def _clean_after_phrase(text: str, phrase: str) -> str:
     idx = text.lower().find(phrase)
@@ -122,9 +124,9 @@ def auto_learn_from_turn(user_text: str, reply: str, brain=None) -> None:
 
 # Helper if router ever wants a generic handler
 def handle(text: str) -> str:
-    t = text.lower()
-    if any(kw in t for kw in ["remember that", "remember this", "yaad rakh"]):
+    command = MEMORY.first(scan(text))
+    if command == "remember":
         return handle_remember(text)
-    if "what do you remember about me" in t or "tum mere bare mein kya jante ho" in t:
+    if command == "recall":
         return handle_recall()
     return "Memory module ko yeh specific command samajh nahi aayi."
@@ -3,7 +3,8 @@
 from pathlib import Path
 import PyPDF2
 
-from config import BASE_DIR
+from brain.cancellation import REASON_TIMEOUT, current_cancel_token
+from config import BASE_DIR, BOOK_SUMMARY_TIMEOUT_S
 
 BOOKS_DIR = BASE_DIR / "books"
 
@@ -21,10 +22,72 @@ def _find_book(keyword: str):
     return None
 
 
-def read_book_snippet(text: str) -> str:
+_SUMMARY_WORDS = ["summary", "summarize", "summarise", "saar", "saransh"]
+
+
+def _iter_book_text(book_path: Path):
+    """Book ka text pieces me (PDF: page by page), poori file ek saath memory me nahi."""
+    if book_path.suffix.lower() == ".txt":
+        with book_path.open(encoding="utf-8", errors="ignore") as f:
+            buf = []
+            for line in f:
+                buf.append(line)
+                if len(buf) >= 200:
+                    yield "".join(buf)
+                    buf = []
+            if buf:
+                yield "".join(buf)
+    elif book_path.suffix.lower() == ".pdf":
+        reader = PyPDF2.PdfReader(str(book_path))
+        for page in reader.pages:
+            yield page.extract_text() or ""
+
+
+def summarize_book(book_path: Path, brain) -> str:
+    from brain.summarizer import summarize_long_text
+
+    summary = summarize_long_text(
+        brain,
+        _iter_book_text(book_path),
+        instructions="Summarize this book for Abhay in simple Hinglish: main idea, key points, and takeaways.",
+        kind="book",
+    )
+    token = current_cancel_token()
+    if token is not None and token.check() == REASON_TIMEOUT:
+        # deadline pe summarizer jo partial / khaali laaye, woh "extract fail" nahi hai
+        if summary:
+            return f"'{book_path.name}' ka summary time limit me poora nahi hua, ab tak ka hissa:\n{summary}"
+        return f"'{book_path.name}' ka summary time limit me poora nahi ho paya."
+    if not summary:
+        return f"'{book_path.name}' se text extract nahi ho paya."
+    return f"'{book_path.name}' ka summary:\n{summary}"
+
+
+def start_background_book_summary(book_path: Path, brain, jobs) -> str:
+    """
+    Poori book ka summary (dozens of LLM calls) background job me – voice turn
+    ki deadline me nahi aata. Complete hone par main loop announce karta hai.
+    """
+    jobs.start()
+    job_id = f"book_{abs(hash(str(book_path)))}"
+    running = jobs.get(job_id)
+    if running is not None and running.status in ("queued", "running"):
+        # dobara submit karne se chal raha job overwrite (cancel nahi ho paata) aur book do baar
+        return f"'{book_path.name}' ka summary pehle se ban raha hai. Ready hone par bata dunga."
+    jobs.submit(
+        job_id=job_id,
+        title=f"{book_path.stem} summary",
+        fn=lambda: summarize_book(book_path, brain),
+        timeout_s=BOOK_SUMMARY_TIMEOUT_S,
+    )
+    return f"Theek hai, main '{book_path.name}' ka summary background me bana raha hoon. Ready hone par bata dunga."
+
+
+def read_book_snippet(text: str, brain=None, jobs=None) -> str:
     # Try to extract a keyword after "read", "book", etc.
     t = text.lower()
-    for w in ["read", "kitab", "book", "jarvis", "sakha", "please"]:
+    wants_summary = any(w in t for w in _SUMMARY_WORDS)
+    for w in ["read", "kitab", "book", "jarvis", "sakha", "please"] + _SUMMARY_WORDS:
         t = t.replace(w, "")
     keyword = t.strip()
 
@@ -42,6 +105,14 @@ def read_book_snippet(text: str) -> str:
     if not book_path:
         return f"Mujhe '{keyword}' naam se koi book books folder mein nahi mili."
 
+    if wants_summary and brain is not None and book_path.suffix.lower() in (".txt", ".pdf"):
+        try:
+            if jobs is not None:
+                return start_background_book_summary(book_path, brain, jobs)
+            return summarize_book(book_path, brain)
+        except Exception as e:
+            return f"Book ka summary banate waqt error aaya: {e}"
+
     if book_path.suffix.lower() == ".txt":
         data = book_path.read_text(encoding="utf-8", errors="ignore")
         snippet = data[:1500]
@@ -1,102 +1,176 @@
 # skills/router.py
 from __future__ import annotations
 
-from .image_gen_sd import ImageGeneratorSD
-from .video_gen_svd import VideoGeneratorSVD
-
-from . import download_manager
-from . import web_tools
-from . import calculator
-from . import translator
-from . import reader
-from . import screen_tools
-from . import vision_tools
-from . import video_tools
-from . import knowledge_web
-from . import memory_skill
-from . import desktop_control
-from . import tasks
+from typing import Iterator, Tuple
+
+from config import FUZZY_TRIGGERS_ENABLED, INTENT_ROUTER_MIN_CONFIDENCE
+from memory.background_jobs import BackgroundJobManager
+from utils.latency import get_latency_tracker
+from utils.lazy import components
+
+from . import fuzzy_triggers
+from .triggers import ROUTER, scan
+
+# Skill modules lazy hain: pyautogui, cv2, diffusers jaise imports pehli
+# command pe (ya IntentRouter.warm_up() ke background threads me) load hote hain.
+_SKILL_MODULES = (
+    "download_manager",
+    "web_tools",
+    "calculator",
+    "translator",
+    "reader",
+    "screen_tools",
+    "vision_tools",
+    "video_tools",
+    "knowledge_web",
+    "memory_skill",
+    "desktop_control",
+    "browser_control",
+    "tasks",
+)
+for _name in _SKILL_MODULES:
+    components.register_module(f"skills.{_name}")
+
+download_manager = components.proxy("skills.download_manager")
+web_tools = components.proxy("skills.web_tools")
+calculator = components.proxy("skills.calculator")
+translator = components.proxy("skills.translator")
+reader = components.proxy("skills.reader")
+screen_tools = components.proxy("skills.screen_tools")
+vision_tools = components.proxy("skills.vision_tools")
+video_tools = components.proxy("skills.video_tools")
+knowledge_web = components.proxy("skills.knowledge_web")
+memory_skill = components.proxy("skills.memory_skill")
+desktop_control = components.proxy("skills.desktop_control")
+browser_control = components.proxy("skills.browser_control")
+tasks = components.proxy("skills.tasks")
+
+
+def _make_image_generator():
+    from .image_gen_sd import ImageGeneratorSD
+    return ImageGeneratorSD()
+
+
+def _make_video_generator():
+    from .video_gen_svd import VideoGeneratorSVD
+    return VideoGeneratorSVD()
+
+
+def _make_intent_classifier():
+    # model file na ho to pehli baar yahin train hota hai (~2-3 s), isliye warm-up me
+    from brain.intent_classifier import get_intent_classifier
+    return get_intent_classifier()
+
+
+components.register("img_gen", _make_image_generator)
+components.register("vid_gen", _make_video_generator)
+components.register("intent_clf", _make_intent_classifier)
+
+
+def _chat_messages(text: str, chat_history) -> list:
+    # main reply ke baad history me turn append karta hai, isliye current user
+    # text yahin jodna padta hai (warna LLM pichle turn ka jawab deta)
+    if hasattr(chat_history, "messages"):
+        return chat_history.messages(text)
+    return list(chat_history or []) + [{"role": "user", "content": text}]
 
 
 class IntentRouter:
     def __init__(self):
-        self.jobs = []
-        self.img_gen = ImageGeneratorSD()
-        self.vid_gen = VideoGeneratorSVD()
+        # lambe kaam (book summary, video analysis) voice turn ke bahar; main loop announce karta hai
+        self.jobs = BackgroundJobManager()
+        # Stable Diffusion checkpoint pehli "image bana" command pe load hoga
+        self.img_gen = components.proxy("img_gen")
+        self.vid_gen = components.proxy("vid_gen")
+
+    def warm_up(self):
+        """
+        Skill modules ko background threads me import kar do, taaki pehli
+        command pe import cost na lage. SD jaise heavy models isme shamil nahi.
+        """
+        names = [f"skills.{n}" for n in _SKILL_MODULES] + ["intent_clf"]
+        return components.warm_up(names)
 
     def detect_intent(self, text: str) -> str:
-        if not text:
+        return self._route(text)[0]
+
+    def _route(self, text: str) -> Tuple[str, str]:
+        """
+        (intent, text jo skill ko jaaye). Exact keyword rules => fuzzy triggers
+        (ASR spelling errors; skill ko sudhra hua text milta hai, taaki uske apne
+        sub-command triggers bhi match hon) => n-gram classifier => chat.
+        """
+        intent = self._detect_intent_rules(text)
+        if intent != "chat" or not text:
+            return intent, text
+        if FUZZY_TRIGGERS_ENABLED:
+            fixed = fuzzy_triggers.correct(text)
+            if fixed is not None:
+                intent = self._detect_intent_rules(fixed)
+                if intent != "chat":
+                    print(f"[Router] fuzzy trigger: {text!r} -> {fixed!r}")
+                    return intent, fixed
+        return self._detect_intent_model(text), text
+
+    def _detect_intent_model(self, text: str) -> str:
+        # keyword rules miss => local n-gram classifier (LLM round-trip nahi);
+        # sirf high confidence pe skill, warna chat hi
+        try:
+            clf = components.get("intent_clf")
+            if clf is None:
+                return "chat"
+            label, confidence = clf.predict(text)
+        except Exception as e:
+            print("[Router] intent model error:", e)
             return "chat"
-
-        t = text.lower().strip()
-
-        # Tasks (youtube download etc.)
-        if "download" in t and any(kw in t for kw in ["youtube", "video", "audio", "song", "gana", "mp3"]):
-            return "tasks"
-
-        # Vision
-        if any(kw in t for kw in ["read the screen", "read screen", "screen par", "screen pe", "what's on my screen",
-                                  "camera", "webcam", "face detect", "mujhe camera pe"]):
-            return "vision"
-
-        # Desktop control (open/close/minimize/maximize)
-        if any(kw in t for kw in ["open ", "launch ", "start ", "close ", "band ", "minimize", "maximize", "switch window", "alt tab"]):
-            return "desktop_control"
-
-        # Memory: remember
-        if any(kw in t for kw in ["remember that", "remember this", "yaad rakh", "yaad rakhna"]):
-            return "memory_add"
-
-        # Memory: recall
-        if any(kw in t for kw in ["what do you remember about me", "what do you know about me",
-                                  "tum mere bare mein kya jante ho", "tumhe mere baare mein kya yaad hai"]):
-            return "memory_query"
-
-        # Knowledge Q&A
-        if ("who is" in t) or ("who was" in t) or ("what is" in t) or t.startswith("tell me about") or ("kaun hai" in t) or ("kya hai" in t):
-            return "knowledge"
-
-        # Screen reading shortcut
-        if "screen" in t and any(w in t for w in ["read", "padh", "padho", "dekho", "see"]):
-            return "read_screen"
-
-        # YouTube link summary
-        if "youtube.com" in t or "youtu.be" in t:
-            return "yt_summary"
-
-        # Image gen
-        if any(w in t for w in ["image bana", "photo bana", "wallpaper", "ai image", "image generate"]):
-            return "image"
-
-        # Video gen
-        if any(w in t for w in ["video bana", "reel bana", "clip bana", "video generate"]):
-            return "video"
-
-        # Download/install
-        if "download" in t or "install" in t:
-            return "download"
-
-        # Web search
-        if any(w in t for w in ["search", "google", "internet pe", "on internet", "online"]):
-            return "web"
-
-        # Calculator
-        if "calculate" in t or "calculator" in t:
-            return "calc"
-
-        # Translation
-        if any(kw in t for kw in ["translate", "isko hindi me bolo", "isko english me bolo",
-                                  "hindi me translate karo", "english me translate karo"]):
-            return "translate"
-
-        # Book reading
-        if "read book" in t or "kitab" in t or ("book" in t and "screen" not in t):
-            return "read_book"
-
+        if confidence >= INTENT_ROUTER_MIN_CONFIDENCE:
+            return label
         return "chat"
 
+    def _detect_intent_rules(self, text: str) -> str:
+        # skills.triggers.ROUTER: saari keyword rules ek compiled automaton me,
+        # text ek hi pass me; priority wahi purani if-chain wali order
+        if not text:
+            return "chat"
+        return ROUTER.first(scan(text))
+
     def handle(self, text: str, brain=None, chat_history=None) -> str:
-        intent = self.detect_intent(text)
+        tracker = get_latency_tracker()
+        with tracker.span("route"):
+            intent, text = self._route(text)
+        tracker.set_intent(intent)
+
+        with tracker.span("skill"):
+            return self._dispatch(intent, text, brain=brain, chat_history=chat_history)
+
+    def handle_stream(self, text: str, brain=None, chat_history=None) -> Iterator[str]:
+        """
+        handle() ka streaming version. Chat fallback me brain.chat_stream ke
+        tokens seedha yield hote hain (TTS pehla sentence jaldi bol sakta hai);
+        baaki skills ka poora reply ek hi piece me aata hai.
+        """
+        tracker = get_latency_tracker()
+        with tracker.span("route"):
+            intent, text = self._route(text)
+        tracker.set_intent(intent)
+        yield from self._respond_stream(intent, text, brain=brain, chat_history=chat_history)
+
+    def _respond_stream(self, intent: str, text: str, brain=None, chat_history=None) -> Iterator[str]:
+        """Routed (intent, text) ka reply stream – route span ke baad wala hissa."""
+        if intent == "chat" and brain is not None and hasattr(brain, "chat_stream"):
+            hist = _chat_messages(text, chat_history)
+            try:
+                yield from brain.chat_stream(hist)
+            except Exception as e:
+                print("[Router] chat stream error:", e)
+                yield "Mujhe command execute karne me issue aa gaya."
+            return
+
+        with get_latency_tracker().span("skill"):
+            reply = self._dispatch(intent, text, brain=brain, chat_history=chat_history)
+        yield reply
+
+    def _dispatch(self, intent: str, text: str, brain=None, chat_history=None) -> str:
         t = text
 
         try:
@@ -142,15 +216,17 @@ class IntentRouter:
                 return translator.handle(text, brain=brain) if brain else translator.handle(text)
 
             if intent == "read_book":
-                return reader.read_book_snippet(t) or "Book read nahi ho paayi."
+                return reader.read_book_snippet(t, brain=brain, jobs=self.jobs) or "Book read nahi ho paayi."
+
+            if intent == "browser":
+                return browser_control.handle(text) or "Browser command execute kar diya."
 
             if intent == "desktop_control":
                 return desktop_control.handle(text) or "Desktop command execute ho gaya."
 
             # fallback chat
             if brain is not None:
-                # Provide minimal context
-                hist = chat_history or [{"role": "user", "content": text}]
+                hist = _chat_messages(text, chat_history)
                 return brain.chat(hist)
 
             return "Mujhe yeh command samajh nahi aayi."
@@ -116,7 +116,10 @@ def _translate_with_brain(brain, src_text: str, target_lang: str) -> str:
     history = [
         {"role": "user", "content": prompt}
     ]
-    translated = brain.chat(history)
+    # same text + same target => same translation; repeat pe response cache se.
+    # Names / technical words as-is copy hote hain: prompt-lookup decoding se fast.
+    chat = getattr(brain, "chat_deterministic", None)
+    translated = chat(history, speculative=True) if chat is not None else brain.chat(history)
     return translated.strip()
 
 
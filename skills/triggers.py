@@ -0,0 +1,403 @@
+# skills/triggers.py
+from __future__ import annotations
+
+import threading
+from collections import deque
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+# Trigger phrase markup (baaki sab plain substring, purane `kw in t` jaisa):
+#   "^tell me about"  => utterance ki shuruaat me hi
+#   r"\bup\b"         => word boundary (shuru / aakhir me, alag alag bhi)
+_START = "^"
+_WORD = "\\b"
+# word boundary ke liye "word" bytes: ASCII alnum + _ , aur non-ASCII (UTF-8 multibyte
+# chars, e.g. Devanagari) bhi word ka hissa maane jaate hain
+_WORD_BYTE = tuple(chr(b).isalnum() or b == 0x5F or b >= 0x80 for b in range(256))
+
+
+def normalize(text: str) -> str:
+    """Router aur skills ek hi normalized text pe match karte hain (scan cache bhi isi pe)."""
+    t = (text or "").lower().strip()
+    if "  " in t or "\t" in t or "\n" in t:
+        t = " ".join(t.split())
+    return t
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton: saare patterns text ke ek hi left-to-right pass me.
+
+    - UTF-8 bytes pe chalta hai; `bytes.translate` (C me) har byte ko uski
+      alphabet class me badal deta hai (patterns me na aane wale bytes => 0),
+      to transition table chhoti rehti hai.
+    - compile() goto + failure links ko poore DFA me badal deta hai (har state
+      ki row fail state ki row inherit karti hai): har byte pe bas ek list index,
+      failure chain kabhi walk nahi hoti.
+    """
+
+    def __init__(self):
+        self._goto: List[Dict[int, int]] = [{}]
+        self._out: List[List[Tuple[int, int]]] = [[]]   # (value, pattern length in bytes)
+        self._rows: Optional[List[List[int]]] = None
+        self._emit: List[Tuple[Tuple[int, int], ...]] = []
+        self._classes = bytes(256)
+
+    def add(self, pattern: str, value: int) -> None:
+        s = 0
+        data = pattern.encode("utf-8")
+        for b in data:
+            nxt = self._goto[s].get(b)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._out.append([])
+                self._goto[s][b] = nxt
+            s = nxt
+        self._out[s].append((value, len(data)))
+        self._rows = None
+
+    def compile(self) -> "KeywordAutomaton":
+        alphabet = sorted({b for g in self._goto for b in g})
+        if len(alphabet) > 255:
+            raise ValueError("too many distinct bytes in trigger patterns")
+        cls = {b: i + 1 for i, b in enumerate(alphabet)}
+        classes = bytearray(256)
+        for b, c in cls.items():
+            classes[b] = c
+        width = len(alphabet) + 1
+
+        n = len(self._goto)
+        fail = [0] * n
+        rows: List[List[int]] = [[0] * width for _ in range(n)]
+        emit: List[list] = [list(o) for o in self._out]
+        for b, nxt in self._goto[0].items():
+            rows[0][cls[b]] = nxt
+        queue = deque(self._goto[0].values())
+        while queue:
+            s = queue.popleft()
+            # BFS order: fail[s] ki row pehle ban chuki hai
+            row = list(rows[fail[s]])
+            for b, nxt in self._goto[s].items():
+                fail[nxt] = rows[fail[s]][cls[b]]
+                row[cls[b]] = nxt
+                queue.append(nxt)
+            rows[s] = row
+            emit[s].extend(emit[fail[s]])
+
+        self._rows = rows
+        self._emit = [tuple(e) for e in emit]
+        self._classes = bytes(classes)
+        return self
+
+    def finditer(self, data: bytes) -> List[Tuple[int, int, int]]:
+        """UTF-8 `data` me (start, end, value) har match ke liye (byte offsets, overlapping bhi)."""
+        if self._rows is None:
+            self.compile()
+        rows, emit = self._rows, self._emit
+        out: List[Tuple[int, int, int]] = []
+        s = 0
+        for i, c in enumerate(data.translate(self._classes), 1):
+            s = rows[s][c]
+            if emit[s]:
+                out.extend((i - length, i, value) for value, length in emit[s])
+        return out
+
+
+def _parse(phrase: str) -> Tuple[str, bool, bool, bool]:
+    """markup -> (literal, start anchor, left word boundary, right word boundary)"""
+    lit = phrase
+    start = lit.startswith(_START)
+    if start:
+        lit = lit[len(_START):]
+    left = lit.startswith(_WORD)
+    if left:
+        lit = lit[len(_WORD):]
+    right = lit.endswith(_WORD)
+    if right:
+        lit = lit[: -len(_WORD)]
+    return lit, start, left, right
+
+
+class _Rule:
+    __slots__ = ("name", "groups", "none_of", "priority")
+
+    def __init__(self, name: str, groups: List[Tuple[str, ...]], none_of: Tuple[str, ...], priority: int):
+        self.name = name
+        self.groups = groups
+        self.none_of = none_of
+        self.priority = priority
+
+
+class TriggerTable:
+    """
+    Declarative trigger rules: ek rule tab match jab har group ka koi phrase
+    text me ho aur `none_of` ka koi na ho. Kai rules match karein to sabse kam
+    `priority` (default: declaration order) jeetta hai – purani if/elif chain
+    jaisa, bas text ek hi baar scan hota hai (`scan()`, saari tables ka ek automaton).
+
+        ROUTER = TriggerTable("router", default="chat")
+        ROUTER.rule("tasks", all_of=[("download",), ("youtube", "song")])
+        ROUTER.rule("knowledge", "who is", "^tell me about")
+        intent = ROUTER.first(scan(text))
+    """
+
+    def __init__(self, name: str, default: Optional[str] = None):
+        self.name = name
+        self.default = default
+        self._rules: List[_Rule] = []
+        self._index: Optional[Dict[str, List[Tuple[int, int]]]] = None
+        _register(self)
+
+    def rule(
+        self,
+        name: str,
+        *any_of: str,
+        all_of: Sequence[Sequence[str]] = (),
+        none_of: Sequence[str] = (),
+        priority: Optional[int] = None,
+    ) -> "TriggerTable":
+        groups = ([tuple(any_of)] if any_of else []) + [tuple(g) for g in all_of]
+        if not groups:
+            raise ValueError(f"trigger rule {name!r} needs at least one phrase")
+        if priority is None:
+            priority = len(self._rules)
+        self._rules.append(_Rule(name, groups, tuple(none_of), priority))
+        self._index = None
+        _mark_dirty()
+        return self
+
+    def phrases(self) -> List[str]:
+        out = []
+        for r in self._rules:
+            for g in r.groups:
+                out.extend(g)
+            out.extend(r.none_of)
+        return out
+
+    def _compile(self) -> Dict[str, List[Tuple[int, int]]]:
+        # stable sort: barabar priority pe declaration order
+        self._rules.sort(key=lambda r: r.priority)
+        index: Dict[str, List[Tuple[int, int]]] = {}
+        for ri, r in enumerate(self._rules):
+            for gi, group in enumerate(r.groups):
+                for p in group:
+                    index.setdefault(p, []).append((ri, gi))
+            for p in r.none_of:
+                index.setdefault(p, []).append((ri, -1))
+        self._simple_rank: Dict[str, int] = {}
+        self._complex_phrases = set()
+        for ri, r in enumerate(self._rules):
+            if len(r.groups) == 1 and not r.none_of:
+                for p in r.groups[0]:
+                    self._simple_rank.setdefault(p, ri)
+            else:
+                self._complex_phrases.update(p for g in r.groups for p in g)
+        self._index = index
+        return index
+
+    def matches(self, hits: FrozenSet[str]) -> List[str]:
+        """Saare matching rules ke names, priority order me."""
+        return [self._rules[ri].name for ri in self._matching(hits)]
+
+    def _matching(self, hits: FrozenSet[str], limit: Optional[int] = None) -> List[int]:
+        """Matching rules ke ranks (priority order); `limit` se neeche wale hi."""
+        index = self._index or self._compile()
+        if limit is None:
+            limit = len(self._rules)
+        satisfied: Dict[int, set] = {}
+        blocked = set()
+        # sirf mile hue phrases dekhne hain (aam taur pe 0-3), rules ki poori list nahi
+        for p in hits:
+            for ri, gi in index.get(p, ()):
+                if ri >= limit:
+                    continue
+                if gi < 0:
+                    blocked.add(ri)
+                else:
+                    satisfied.setdefault(ri, set()).add(gi)
+        rules = self._rules
+        return [
+            ri
+            for ri in sorted(satisfied)
+            if ri not in blocked and len(satisfied[ri]) == len(rules[ri].groups)
+        ]
+
+    def first(self, hits: FrozenSet[str]) -> Optional[str]:
+        if not hits:
+            return self.default
+        if self._index is None:
+            self._compile()
+        # ek-group rules (zyada tar) ka best rank seedha phrase -> rank map se
+        simple = self._simple_rank
+        best = len(self._rules)
+        for p in hits:
+            r = simple.get(p)
+            if r is not None and r < best:
+                best = r
+        # all_of / none_of wale rules sirf tab jab unka koi phrase mila ho
+        if not self._complex_phrases.isdisjoint(hits):
+            found = self._matching(hits, limit=best)
+            if found:
+                best = found[0]
+        return self._rules[best].name if best < len(self._rules) else self.default
+
+
+# ---------------- shared automaton ---------------- #
+
+_TABLES: List[TriggerTable] = []
+_lock = threading.Lock()
+_automaton: Optional[KeywordAutomaton] = None
+_literals: List[List[Tuple[str, bool, bool, bool]]] = []   # value -> [(markup, start, left, right)]
+_keys: List[str] = []                                       # value -> literal
+# router aur phir skill handler same utterance scan karte hain: dusri baar cache se
+_last: Tuple[Optional[str], FrozenSet[str]] = (None, frozenset())
+
+
+def _register(table: TriggerTable) -> None:
+    with _lock:
+        _TABLES.append(table)
+    _mark_dirty()
+
+
+def _mark_dirty() -> None:
+    global _automaton, _last
+    _automaton = None
+    _last = (None, frozenset())
+
+
+def _build() -> KeywordAutomaton:
+    global _automaton, _literals, _keys
+    with _lock:
+        if _automaton is not None:
+            return _automaton
+        by_literal: Dict[str, List[Tuple[str, bool, bool, bool]]] = {}
+        for table in _TABLES:
+            for markup in table.phrases():
+                lit, start, left, right = _parse(markup)
+                variants = by_literal.setdefault(lit, [])
+                if all(v[0] != markup for v in variants):
+                    variants.append((markup, start, left, right))
+        automaton = KeywordAutomaton()
+        literals = []
+        for value, (lit, variants) in enumerate(by_literal.items()):
+            automaton.add(lit, value)
+            literals.append(variants)
+        _literals = literals
+        _keys = list(by_literal)
+        _automaton = automaton.compile()
+        return _automaton
+
+
+def scan(text: str) -> FrozenSet[str]:
+    """
+    Utterance me mile saare trigger phrases (markup ke saath), saari tables ke
+    liye ek hi pass. Result TriggerTable.first() / matches() ko do.
+    """
+    global _last
+    t = normalize(text)
+    last = _last
+    if last[0] == t:
+        return last[1]
+
+    automaton = _automaton or _build()
+    literals = _literals
+    data = t.encode("utf-8")
+    n = len(data)
+    hits = set()
+    for start, end, value in automaton.finditer(data):
+        for markup, at_start, left, right in literals[value]:
+            if at_start and start != 0:
+                continue
+            if left and start > 0 and _WORD_BYTE[data[start - 1]]:
+                continue
+            if right and end < n and _WORD_BYTE[data[end]]:
+                continue
+            hits.add(markup)
+    result = frozenset(hits)
+    _last = (t, result)
+    return result
+
+
+def all_phrases() -> List[str]:
+    """Saari tables ke trigger phrases (markup hata ke) – fuzzy index / tooling ke liye."""
+    if _automaton is None:
+        _build()
+    return list(_keys)
+
+
+# ================= TRIGGER TABLES ================= #
+# Order = priority (pehla matching rule jeetta hai), jaisa purani if-chains me tha.
+
+ROUTER = TriggerTable("router", default="chat")
+# Tasks (youtube download etc.)
+ROUTER.rule("tasks", all_of=[("download",), ("youtube", "video", "audio", "song", "gana", "mp3")])
+ROUTER.rule("vision", "read the screen", "read screen", "screen par", "screen pe", "what's on my screen",
+            "camera", "webcam", "face detect", "mujhe camera pe")
+# short browser commands desktop_control se pehle, taaki "close tab" app close na samjha jaaye
+ROUTER.rule("browser", "scroll", "page down", "page up", "next tab", "previous tab", "new tab",
+            "naya tab", "close tab", "close this tab", "tab band karo",
+            "go back", "go forward", "refresh page", "reload page")
+ROUTER.rule("desktop_control", "open ", "launch ", "start ", "close ", "band ", "minimize", "maximize",
+            "switch window", "alt tab")
+ROUTER.rule("memory_add", "remember that", "remember this", "yaad rakh", "yaad rakhna")
+ROUTER.rule("memory_query", "what do you remember about me", "what do you know about me",
+            "tum mere bare mein kya jante ho", "tumhe mere baare mein kya yaad hai")
+ROUTER.rule("knowledge", "who is", "who was", "what is", "^tell me about", "kaun hai", "kya hai")
+ROUTER.rule("read_screen", all_of=[("screen",), ("read", "padh", "padho", "dekho", "see")])
+ROUTER.rule("yt_summary", "youtube.com", "youtu.be")
+ROUTER.rule("image", "image bana", "photo bana", "wallpaper", "ai image", "image generate")
+ROUTER.rule("video", "video bana", "reel bana", "clip bana", "video generate")
+ROUTER.rule("download", "download", "install")
+ROUTER.rule("web", "search", "google", "internet pe", "on internet", "online")
+ROUTER.rule("calc", "calculate", "calculator")
+ROUTER.rule("translate", "translate", "isko hindi me bolo", "isko english me bolo",
+            "hindi me translate karo", "english me translate karo")
+ROUTER.rule("read_book", "read book", "kitab")
+ROUTER.rule("read_book", all_of=[("book",)], none_of=("screen",))
+
+VISION = TriggerTable("vision")
+VISION.rule("enroll_face", "remember my face", "register my face", "meri shakal yaad kar",
+            "meri shakal yaad rakh", "mera chehra yaad rakh", "mera face yaad rakh", "face register kar")
+VISION.rule("recognize_face", "who am i", "do you recognize me", "kya tum mujhe pehchante ho",
+            "mera chehra pehchano", "dekho kaun hai", "do you see me")
+VISION.rule("face_presence", "see someone on camera", "camera par koi hai", "kya tumhe koi dikhta hai",
+            "face detect", "check camera", "camera check karo")
+VISION.rule("read_screen", all_of=[("screen",), ("read", "padh", "padho", "dekho", "dekh lo", "see")])
+
+BROWSER = TriggerTable("browser")
+BROWSER.rule("scroll", "scroll", "page down", "page up")
+BROWSER.rule("back", "go back", "back ja", "peeche ja", "peeche chalo")
+BROWSER.rule("forward", "go forward", "aage ja", "aage chalo")
+BROWSER.rule("refresh", "refresh", "reload", "page reload", "page refresh")
+BROWSER.rule("new_tab", "new tab", "naya tab", "open new tab")
+BROWSER.rule("close_tab", "close this tab", "close tab", "ye tab band karo", "tab band karo")
+BROWSER.rule("next_tab", "next tab", "agli tab", "aage wala tab")
+BROWSER.rule("previous_tab", "previous tab", "pichla tab", "pehle wala tab")
+BROWSER.rule("page_top", "top of page", "page top", "bilkul upar")
+BROWSER.rule("page_bottom", "bottom of page", "page end", "bilkul niche")
+BROWSER.rule("address_bar", "address bar", "url bar", "search bar", "focus url", "focus address bar")
+
+# Scroll ke modifiers (saath me kai lag sakte hain => BROWSER_SCROLL.matches())
+BROWSER_SCROLL = TriggerTable("browser_scroll")
+# word boundary: "scroll down to setup" me "up" nahi
+BROWSER_SCROLL.rule("up", r"\bup\b", "upar", r"\btop\b")
+BROWSER_SCROLL.rule("less", "thoda", "little", "kam")
+BROWSER_SCROLL.rule("more", "zyada", "fast", "bahut")
+
+DESKTOP = TriggerTable("desktop")
+DESKTOP.rule("open", "^open ", "^launch ", "^start ", " open ", "launch ")
+DESKTOP.rule(
+    "close_active",
+    all_of=[
+        ("^close ", "^band ", " close "),
+        ("close active", "close this", "close current", "isko band", "isko close", "active band"),
+    ],
+)
+DESKTOP.rule("close", "^close ", "^band ", " close ")
+DESKTOP.rule("minimize", "minimize", "minimise", "small", "minim")
+DESKTOP.rule("maximize", "maximize", "full screen", "fullscreen")
+DESKTOP.rule("switch", "switch", "next window", "tab change", "window change", "alt tab")
+
+MEMORY = TriggerTable("memory")
+MEMORY.rule("remember", "remember that", "remember this", "yaad rakh")
+MEMORY.rule("recall", "what do you remember about me", "tum mere bare mein kya jante ho")
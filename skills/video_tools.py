@@ -65,16 +65,19 @@ def _transcribe_with_whisper_cpp(stt, wav_path: Path) -> str:
 
 
 def _summarize(brain, transcript: str, url: str) -> str:
-    prompt = (
-        "You are Jarvis. Summarize the following YouTube/video transcript clearly.\n"
+    # Lamba transcript 4096-token context me nahi aata: map-reduce summarizer
+    # chunks me summary banata hai aur phir unko reduce karta hai
+    from brain.summarizer import summarize_long_text
+
+    instructions = (
+        "You are Jarvis. Summarize this YouTube/video clearly.\n"
         "Rules:\n"
         "- Hinglish friendly, simple.\n"
         "- Bullet points for key takeaways.\n"
-        "- If transcript is noisy, say 'audio unclear' and still try.\n\n"
-        f"URL: {url}\n\n"
-        f"TRANSCRIPT:\n{transcript}\n"
+        "- If transcript is noisy, say 'audio unclear' and still try.\n"
+        f"URL: {url}"
     )
-    return (brain.chat([{"role": "user", "content": prompt}]) or "").strip()
+    return summarize_long_text(brain, transcript, instructions=instructions, kind="video transcript").strip()
 
 
 def start_background_youtube_audio_summary(
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import threading
 import time
 from pathlib import Path
 from typing import Optional
@@ -14,8 +15,23 @@ import pytesseract
 
 from identity.face_db import FaceIdentityManager
 
-# Global face identity manager
-_FACE_MGR: Optional[FaceIdentityManager] = FaceIdentityManager()
+from .triggers import VISION, scan
+
+# Global face identity manager (lazy: cascade + LBPH model pehli face command pe load)
+_FACE_MGR: Optional[FaceIdentityManager] = None
+_FACE_MGR_LOCK = threading.Lock()
+
+
+def _get_face_mgr() -> Optional[FaceIdentityManager]:
+    global _FACE_MGR
+    with _FACE_MGR_LOCK:
+        if _FACE_MGR is None:
+            try:
+                _FACE_MGR = FaceIdentityManager()
+            except Exception as e:
+                print("[Vision] FaceIdentityManager init failed:", e)
+                return None
+        return _FACE_MGR
 
 
 # ---------------- SCREEN READING ---------------- #
@@ -134,20 +150,22 @@ def enroll_my_face() -> str:
     """
     Default user (Abhay) ka face enroll karega.
     """
-    if _FACE_MGR is None:
+    mgr = _get_face_mgr()
+    if mgr is None:
         return "Face identity manager initialize nahi ho paya."
 
-    return _FACE_MGR.enroll_from_camera(name="Abhay")
+    return mgr.enroll_from_camera(name="Abhay")
 
 
 def recognize_on_camera() -> str:
     """
     Camera se dekh kar try karega ki yeh Abhay hai ya koi aur registered profile.
     """
-    if _FACE_MGR is None:
+    mgr = _get_face_mgr()
+    if mgr is None:
         return "Face identity manager initialize nahi ho paya."
 
-    return _FACE_MGR.recognize_from_camera()
+    return mgr.recognize_from_camera()
 
 
 # ---------------- HIGH-LEVEL HANDLER ---------------- #
@@ -161,55 +179,23 @@ def handle(text: str) -> str:
     if not text:
         return "Vision module ko command clear nahi aayi."
 
-    t = text.lower().strip()
+    # sub-command: skills.triggers.VISION (router wala scan hi, dobara scan nahi)
+    command = VISION.first(scan(text))
 
     # --- Face enroll commands ---
-    if any(
-        kw in t
-        for kw in [
-            "remember my face",
-            "register my face",
-            "meri shakal yaad kar",
-            "meri shakal yaad rakh",
-            "mera chehra yaad rakh",
-            "mera face yaad rakh",
-            "face register kar",
-        ]
-    ):
+    if command == "enroll_face":
         return enroll_my_face()
 
     # --- Face recognize commands ---
-    if any(
-        kw in t
-        for kw in [
-            "who am i",
-            "do you recognize me",
-            "kya tum mujhe pehchante ho",
-            "mera chehra pehchano",
-            "dekho kaun hai",
-            "do you see me",
-        ]
-    ):
+    if command == "recognize_face":
         return recognize_on_camera()
 
     # --- Simple presence check / see someone on camera ---
-    if any(
-        kw in t
-        for kw in [
-            "see someone on camera",
-            "camera par koi hai",
-            "kya tumhe koi dikhta hai",
-            "face detect",
-            "check camera",
-            "camera check karo",
-        ]
-    ):
+    if command == "face_presence":
         return check_face_presence_from_camera(duration_seconds=5)
 
     # --- Screen read (vision intent se bhi) ---
-    if "screen" in t and any(
-        w in t for w in ["read", "padh", "padho", "dekho", "dekh lo", "see"]
-    ):
+    if command == "read_screen":
         return read_screen_now()
 
     # Fallback – generic message
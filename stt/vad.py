@@ -0,0 +1,155 @@
+# stt/vad.py
+from __future__ import annotations
+
+from collections import deque
+from typing import List, Optional
+
+import numpy as np
+
+
+class EnergyVAD:
+    """
+    Simple energy-based voice activity detector (streaming endpointing).
+
+    - Mic blocks `feed()` me daalo (float32 [-1, 1] ya int16, mono).
+    - Speech onset: lagatar `onset_ms` tak energy threshold ke upar.
+    - Utterance end: `silence_ms` tak lagatar silence (hangover), ya `max_utterance_s` limit.
+    - Onset se thoda pehle ka audio (`pre_roll_ms`) bhi rakhte hain taaki pehla syllable na kate.
+
+    Threshold adaptive hai: background noise floor ka running average * `threshold_ratio`.
+    `min_rms` int16 scale me hai (purane configs ke saath compatible).
+
+    Audio ek preallocated float32 buffer me jama hota hai (har utterance pe naya
+    allocation nahi). `feed(copy=False)` buffer ka view deta hai – woh agle
+    feed() tak hi valid hai.
+    """
+
+    def __init__(
+        self,
+        samplerate: int = 16000,
+        frame_ms: int = 30,
+        threshold_ratio: float = 3.0,
+        min_rms: float = 300.0,
+        onset_ms: int = 90,
+        silence_ms: int = 700,
+        max_utterance_s: float = 15.0,
+        pre_roll_ms: int = 300,
+    ):
+        self.samplerate = samplerate
+        self.frame_ms = frame_ms
+        self.frame_len = int(samplerate * frame_ms / 1000)
+        self.threshold_ratio = threshold_ratio
+        self.min_rms = min_rms / 32768.0
+        self.onset_frames = max(1, onset_ms // frame_ms)
+        self.silence_frames = max(1, silence_ms // frame_ms)
+        self.max_frames = int(max_utterance_s * 1000 / frame_ms)
+        self.pre_roll: deque = deque(maxlen=max(1, pre_roll_ms // frame_ms))
+
+        # pre-roll + max utterance, ek hi baar allocate
+        self._buf = np.zeros((self.max_frames + self.pre_roll.maxlen) * self.frame_len, dtype=np.float32)
+        self._rest = np.zeros(0, dtype=np.float32)
+
+        self.noise_rms = self.min_rms / threshold_ratio
+        self.reset()
+
+    def reset(self) -> None:
+        self.in_speech = False
+        self._n = 0               # samples in self._buf
+        self._n_frames = 0        # frames after onset
+        self._voiced_run = 0
+        self._silent_run = 0
+        self.pre_roll.clear()
+
+    # ------------- internals ------------ #
+
+    @staticmethod
+    def _to_float32(block: np.ndarray) -> np.ndarray:
+        block = np.asarray(block).reshape(-1)
+        if block.dtype == np.int16:
+            return block.astype(np.float32) / 32768.0
+        return block.astype(np.float32, copy=False)
+
+    def _is_voiced(self, frame: np.ndarray) -> bool:
+        rms = float(np.sqrt(np.mean(frame * frame)))
+        threshold = max(self.min_rms, self.noise_rms * self.threshold_ratio)
+        voiced = rms > threshold
+        if not voiced and not self.in_speech:
+            # noise floor ko sirf silence frames se update karo
+            self.noise_rms = 0.95 * self.noise_rms + 0.05 * rms
+        return voiced
+
+    def _append(self, frame: np.ndarray) -> None:
+        self._buf[self._n:self._n + len(frame)] = frame
+        self._n += len(frame)
+
+    def _finish(self, copy: bool) -> np.ndarray:
+        audio = self._buf[:self._n]
+        audio = audio.copy() if copy else audio
+        self.reset()
+        return audio
+
+    def _process_frame(self, frame: np.ndarray, copy: bool) -> Optional[np.ndarray]:
+        voiced = self._is_voiced(frame)
+
+        if not self.in_speech:
+            self.pre_roll.append(frame.copy())
+            self._voiced_run = self._voiced_run + 1 if voiced else 0
+            if self._voiced_run >= self.onset_frames:
+                self.in_speech = True
+                for f in self.pre_roll:
+                    self._append(f)
+                self.pre_roll.clear()
+                self._silent_run = 0
+            return None
+
+        self._append(frame)
+        self._n_frames += 1
+        self._silent_run = 0 if voiced else self._silent_run + 1
+
+        if self._silent_run >= self.silence_frames:
+            # trailing silence decode karne ka koi fayda nahi
+            self._n -= max(0, self._silent_run - 2) * self.frame_len
+            return self._finish(copy)
+
+        if self._n_frames >= self.max_frames:
+            return self._finish(copy)
+        return None
+
+    # ------------- public API ------------ #
+
+    def feed(self, block: np.ndarray, copy: bool = True) -> List[np.ndarray]:
+        """
+        Ek mic block process karo. Jitni utterances is block me complete hui,
+        unki float32 arrays return hoti hain (mostly empty list).
+        """
+        data = self._to_float32(block)
+        if len(self._rest):
+            data = np.concatenate([self._rest, data])
+        done: List[np.ndarray] = []
+
+        n_full = len(data) // self.frame_len
+        for i in range(n_full):
+            frame = data[i * self.frame_len:(i + 1) * self.frame_len]
+            utt = self._process_frame(frame, copy)
+            if utt is not None and len(utt):
+                done.append(utt)
+
+        self._rest = data[n_full * self.frame_len:].copy()
+        return done
+
+    @property
+    def trailing_silence_ms(self) -> int:
+        """Chal rahi utterance me aakhri voiced frame ke baad kitni silence (user ruka hai)."""
+        return self._silent_run * self.frame_ms if self.in_speech else 0
+
+    @property
+    def current(self) -> np.ndarray:
+        """Abhi tak ki chal rahi utterance (view, copy nahi)."""
+        return self._buf[:self._n]
+
+    def flush(self, copy: bool = True) -> Optional[np.ndarray]:
+        """Stream band hone par adhuri utterance (agar speech chal rahi thi)."""
+        if not self.in_speech:
+            self.reset()
+            return None
+        return self._finish(copy)
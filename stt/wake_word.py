@@ -0,0 +1,301 @@
+# stt/wake_word.py
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from config import (
+    WAKE_WORD,
+    WAKE_WORD_ARMED_S,
+    WAKE_WORD_TEMPLATES,
+    WAKE_WORD_THRESHOLD,
+)
+from utils.latency import span
+
+
+# ---------------- MFCC features (pure numpy) ---------------- #
+
+def _mel_filterbank(n_mels: int, n_fft: int, samplerate: int) -> np.ndarray:
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def mel_to_hz(mel):
+        return 700.0 * (10 ** (mel / 2595.0) - 1.0)
+
+    mels = np.linspace(hz_to_mel(0), hz_to_mel(samplerate / 2), n_mels + 2)
+    bins = np.floor((n_fft + 1) * mel_to_hz(mels) / samplerate).astype(int)
+
+    fb = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for m in range(1, n_mels + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        for k in range(left, center):
+            fb[m - 1, k] = (k - left) / max(1, center - left)
+        for k in range(center, right):
+            fb[m - 1, k] = (right - k) / max(1, right - center)
+    return fb
+
+
+def _dct_matrix(n_out: int, n_in: int) -> np.ndarray:
+    n = np.arange(n_in)
+    k = np.arange(n_out)[:, None]
+    return np.cos(np.pi / n_in * (n + 0.5) * k).astype(np.float32)
+
+
+_FB_CACHE: dict = {}
+
+
+def mfcc(
+    audio: np.ndarray,
+    samplerate: int = 16000,
+    n_mfcc: int = 13,
+    n_mels: int = 26,
+    frame_ms: int = 25,
+    hop_ms: int = 10,
+    n_fft: int = 512,
+) -> np.ndarray:
+    """
+    Chhota MFCC implementation (librosa ki zarurat nahi).
+    Return shape: (n_frames, n_mfcc - 1) – c0 (loudness) drop, aur per-utterance
+    mean/variance normalised (CMVN) taaki mic gain se farak na pade.
+    """
+    audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+    frame_len = int(samplerate * frame_ms / 1000)
+    hop = int(samplerate * hop_ms / 1000)
+    if len(audio) < frame_len:
+        audio = np.pad(audio, (0, frame_len - len(audio)))
+
+    emphasized = np.append(audio[0], audio[1:] - 0.97 * audio[:-1])
+    n_frames = 1 + (len(emphasized) - frame_len) // hop
+    idx = np.arange(frame_len)[None, :] + hop * np.arange(n_frames)[:, None]
+    frames = emphasized[idx] * np.hamming(frame_len).astype(np.float32)
+
+    power = (np.abs(np.fft.rfft(frames, n_fft)) ** 2) / n_fft
+
+    key = (n_mels, n_fft, samplerate, n_mfcc)
+    if key not in _FB_CACHE:
+        _FB_CACHE[key] = (_mel_filterbank(n_mels, n_fft, samplerate), _dct_matrix(n_mfcc, n_mels))
+    fb, dct = _FB_CACHE[key]
+
+    log_mel = np.log(power @ fb.T + 1e-10)
+    feats = (log_mel @ dct.T)[:, 1:]
+    feats = (feats - feats.mean(axis=0)) / (feats.std(axis=0) + 1e-5)
+    return feats.astype(np.float32)
+
+
+# ---------------- DTW template matching ---------------- #
+
+def dtw_prefix_match(template: np.ndarray, feats: np.ndarray) -> Tuple[float, int]:
+    """
+    Open-end DTW: template ko `feats` ke *shuru* wale hisse se align karta hai.
+    Return: (path-length normalised cost, feats me match khatam hone ka frame index).
+
+    "jarvis open chrome" ek saans me bola ho to bhi wake word ka end mil jaata hai,
+    aur uske baad ka audio seedha command ke roop me aage bhej sakte hain.
+    """
+    n, m = len(template), len(feats)
+    if n == 0 or m == 0:
+        return float("inf"), 0
+
+    # sirf template ke ~2x length tak dekhna kaafi hai
+    m = min(m, 2 * n)
+    feats = feats[:m]
+    dist = np.sqrt(((template[:, None, :] - feats[None, :, :]) ** 2).sum(axis=2))
+
+    cost = np.full((n + 1, m + 1), np.inf, dtype=np.float32)
+    cost[0, 0] = 0.0
+    for i in range(1, n + 1):
+        row = dist[i - 1]
+        prev = cost[i - 1]
+        # diagonal / vertical steps vectorised, horizontal step sequential
+        best = np.minimum(prev[:-1], prev[1:])
+        cur = cost[i]
+        for j in range(1, m + 1):
+            cur[j] = row[j - 1] + min(best[j - 1], cur[j - 1])
+
+    # path length ~ (n + j); normalise karke best end chuno
+    ends = np.arange(1, m + 1)
+    scores = cost[n, 1:] / (n + ends)
+    # bahut chhote alignments (template ka aadha bhi nahi) ignore
+    scores[: max(0, n // 2 - 1)] = np.inf
+    j = int(np.argmin(scores))
+    return float(scores[j]), j + 1
+
+
+class WakeWordDetector:
+    """
+    Template-matching keyword spotter (MFCC + DTW).
+
+    Templates user ki apni awaaz me `python -m stt.wake_word enroll` se record hote
+    hain aur WAKE_WORD_TEMPLATES (.npz) me save hote hain.
+    """
+
+    def __init__(self, templates_path: Path = WAKE_WORD_TEMPLATES, threshold: float = WAKE_WORD_THRESHOLD):
+        self.templates_path = Path(templates_path)
+        self.threshold = threshold
+        self.templates: List[np.ndarray] = []
+        self._load()
+
+    def _load(self) -> None:
+        if not self.templates_path.exists():
+            return
+        try:
+            data = np.load(self.templates_path)
+            self.templates = [data[k] for k in sorted(data.files)]
+            print(f"[WakeWord] Loaded {len(self.templates)} template(s) from {self.templates_path}")
+        except Exception as e:
+            print("[WakeWord] Failed to load templates:", e)
+            self.templates = []
+
+    @property
+    def ready(self) -> bool:
+        return bool(self.templates)
+
+    def enroll(self, samples: List[np.ndarray], samplerate: int = 16000) -> int:
+        self.templates = [mfcc(s, samplerate) for s in samples if len(s)]
+        self.templates_path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(self.templates_path, **{f"t{i}": t for i, t in enumerate(self.templates)})
+        return len(self.templates)
+
+    def match(self, audio: np.ndarray, samplerate: int = 16000) -> Optional[int]:
+        """
+        Agar utterance wake word se shuru hota hai to wake word ke end ka
+        sample index return karta hai, warna None.
+        """
+        if not self.templates:
+            return None
+        feats = mfcc(audio, samplerate)
+        best_score, best_end = float("inf"), 0
+        for tpl in self.templates:
+            score, end = dtw_prefix_match(tpl, feats)
+            if score < best_score:
+                best_score, best_end = score, end
+        if best_score > self.threshold:
+            return None
+        hop = int(samplerate * 0.010)
+        return min(len(audio), best_end * hop + int(samplerate * 0.015))
+
+
+class WakeWordGate:
+    """
+    Mic utterances aur mehenge WhisperSTT model ke beech ka gate.
+
+    - Jab tak "armed" nahi hai, har VAD utterance sirf sasta wake word check
+      (MFCC + DTW) se guzarta hai; main model idle rehta hai.
+    - Wake word ke baad same utterance me command bhi hai ("jarvis open youtube"
+      ek saans me) => poori utterance main model ko; transcript ka wake word
+      main.strip_leading_wake_word hatata hai ("jarvis stop" exit bhi isi se pakda jaata hai).
+    - Sirf wake word => WAKE_WORD_ARMED_S seconds ke liye armed; agli utterance main model ko.
+    - Templates na hon to fallback: faster-whisper "tiny" model se chhota decode
+      aur text me config.WAKE_WORD dhoondhna (phir bhi main model se kaafi sasta).
+    """
+
+    def __init__(self, detector: Optional[WakeWordDetector] = None, armed_seconds: float = WAKE_WORD_ARMED_S):
+        self.detector = detector or WakeWordDetector()
+        self.armed_seconds = armed_seconds
+        self._armed_until = 0.0
+        self._tiny = None
+
+    @property
+    def armed(self) -> bool:
+        return time.monotonic() < self._armed_until
+
+    def arm(self) -> None:
+        self._armed_until = time.monotonic() + self.armed_seconds
+
+    def keep_alive(self) -> None:
+        """Armed state me user bol raha ho to window badhate raho (lambi command cut na ho)."""
+        if self.armed:
+            self.arm()
+
+    def disarm(self) -> None:
+        self._armed_until = 0.0
+
+    def _tiny_model_match(self, audio: np.ndarray, samplerate: int = 16000) -> Optional[int]:
+        """Wake word wale word ka end (sample index), ya None."""
+        if self._tiny is None:
+            from faster_whisper import WhisperModel
+
+            print("[WakeWord] No templates; using faster-whisper 'tiny' as wake word spotter.")
+            self._tiny = WhisperModel("tiny", device="cpu", compute_type="int8")
+
+        # wake word utterance ki shuruat me hota hai; 2 sec kaafi hai
+        segments, _ = self._tiny.transcribe(
+            audio[: 2 * samplerate],
+            beam_size=1,
+            word_timestamps=True,
+            condition_on_previous_text=False,
+        )
+        wake = WAKE_WORD.lower()
+        for seg in segments:
+            for word in seg.words or ():
+                if wake in word.word.lower():
+                    return min(len(audio), int(word.end * samplerate))
+        return None
+
+    def filter(self, audio: np.ndarray, samplerate: int = 16000) -> Optional[np.ndarray]:
+        """
+        Utterance ko main model tak jaane de ya nahi.
+        Return: main model ko bhejne wala audio, ya None (drop).
+        """
+        if self.armed:
+            self.disarm()
+            return audio
+
+        with span("wake_word"):
+            if self.detector.ready:
+                end = self.detector.match(audio, samplerate)
+            else:
+                end = self._tiny_model_match(audio, samplerate)
+
+        if end is None:
+            return None
+
+        print("[WakeWord] Wake word detected.")
+        if len(audio) - end > int(0.4 * samplerate):
+            # "jarvis <command>" ek hi saans me: poori utterance, taaki detector ka
+            # approximate cut command ka pehla syllable na kaate
+            return audio
+        self.arm()
+        return None
+
+
+# ---------------- enrollment CLI ---------------- #
+
+def _enroll_cli(count: int, seconds: float) -> None:
+    import sounddevice as sd
+
+    from .vad import EnergyVAD
+
+    samplerate = 16000
+    samples: List[np.ndarray] = []
+    for i in range(count):
+        input(f"[{i + 1}/{count}] Enter dabao aur '{WAKE_WORD}' bolo...")
+        audio = sd.rec(int(seconds * samplerate), samplerate=samplerate, channels=1, dtype="float32")
+        sd.wait()
+
+        vad = EnergyVAD(samplerate=samplerate, silence_ms=300, pre_roll_ms=60)
+        utts = vad.feed(audio[:, 0]) or [vad.flush()]
+        utts = [u for u in utts if u is not None and len(u)]
+        if not utts:
+            print("Kuch sunai nahi diya, dobara try karo.")
+            continue
+        samples.append(max(utts, key=len))
+
+    n = WakeWordDetector().enroll(samples, samplerate)
+    print(f"{n} template(s) saved to {WAKE_WORD_TEMPLATES}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Wake word template enrollment")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_enroll = sub.add_parser("enroll", help="record wake word templates from the mic")
+    p_enroll.add_argument("--count", type=int, default=4)
+    p_enroll.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    if args.cmd == "enroll":
+        _enroll_cli(args.count, args.seconds)
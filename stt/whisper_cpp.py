@@ -1,10 +1,26 @@
-import tempfile
+import queue
+import threading
+import time
+from typing import Callable, Iterator, Optional, Tuple
 
+import numpy as np
 import sounddevice as sd
-import soundfile as sf
+import ctranslate2
 from faster_whisper import WhisperModel
 
-from config import DEVICE
+from config import (
+    STT_EARLY_DISPATCH_PAUSE_MS,
+    STT_PARTIAL_INTERVAL_MS,
+    STT_PARTIAL_WINDOW_S,
+    STT_VAD_ENABLED,
+    STT_VAD_MAX_UTTERANCE_S,
+    STT_VAD_MIN_RMS,
+    STT_VAD_SILENCE_MS,
+    WAKE_WORD_ENABLED,
+)
+from utils.latency import span
+from .vad import EnergyVAD
+from .wake_word import WakeWordGate
 
 
 class WhisperSTT:
@@ -13,45 +29,322 @@ class WhisperSTT:
     Works offline, supports Hindi + English, works on CPU and CUDA.
     """
 
-    def __init__(self, lang: str = "auto", model_size: str = "small"):
+    def __init__(self, lang: str = "auto", model_size: str = "small", wake_word: Optional[bool] = None):
         self.lang = lang
 
-        device = DEVICE  # "cuda" if available else "cpu"
+        # CTranslate2 se hi CUDA check – torch import karne ki zarurat nahi
+        device = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
         # int8 is fine for both CPU and GPU, keeps memory usage low.
         compute_type = "int8"
 
         print(f"[faster-whisper] Loading model '{model_size}' on device '{device}'...")
         self.model = WhisperModel(model_size, device=device, compute_type=compute_type)
 
-    def record_to_wav(self, duration: int = 5, samplerate: int = 16000) -> str:
+        # fixed-duration recording ke liye reusable capture buffer (float32, 16 kHz)
+        self._capture_buf = np.zeros(int(STT_VAD_MAX_UTTERANCE_S * 16000), dtype=np.float32)
+        self._vad: Optional[EnergyVAD] = None
+
+        # continuous listening (pipeline) me sirf wake word ke baad ka audio decode hoga
+        use_wake = WAKE_WORD_ENABLED if wake_word is None else wake_word
+        self.wake_gate: Optional[WakeWordGate] = WakeWordGate() if use_wake else None
+
+    def warm_up(self) -> None:
+        """
+        Dummy decode (1 sec silence) taaki CTranslate2 kernels / weights pehle se
+        ready hon. Wake word ka tiny fallback model bhi yahin load ho jaata hai.
+        """
+        silence = np.zeros(16000, dtype=np.float32)
+        list(self.model.transcribe(silence, beam_size=1, without_timestamps=True)[0])
+        if self.wake_gate is not None and not self.wake_gate.detector.ready:
+            self.wake_gate.filter(silence)
+
+    def record_to_array(self, duration: int = 5, samplerate: int = 16000) -> np.ndarray:
+        """
+        Fixed-duration recording seedha preallocated float32 buffer me.
+        Return value buffer ka view hai – agle record tak hi valid.
+        """
         print("🎙️ Listening...")
-        audio = sd.rec(
-            int(duration * samplerate),
+        n = int(duration * samplerate)
+        if n > len(self._capture_buf):
+            self._capture_buf = np.zeros(n, dtype=np.float32)
+        out = self._capture_buf[:n].reshape(-1, 1)
+        sd.rec(out=out, samplerate=samplerate, channels=1)
+        sd.wait()
+        return self._capture_buf[:n]
+
+    def _make_vad(self, samplerate: int) -> EnergyVAD:
+        return EnergyVAD(
             samplerate=samplerate,
-            channels=1,
-            dtype="int16",
+            silence_ms=STT_VAD_SILENCE_MS,
+            max_utterance_s=STT_VAD_MAX_UTTERANCE_S,
+            min_rms=STT_VAD_MIN_RMS,
         )
-        sd.wait()
-        tmp = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-        sf.write(tmp.name, audio, samplerate)
-        return tmp.name
 
-    def transcribe_file(self, wav_path: str) -> str:
+    def _iter_mic_blocks(
+        self,
+        samplerate: int = 16000,
+        stop_event: Optional[threading.Event] = None,
+        poll: float = 0.2,
+    ) -> Iterator[Optional[np.ndarray]]:
+        """
+        Ek InputStream khol ke float32 mic blocks yield karta hai.
+        Agar `poll` seconds tak koi block na aaye to None yield hota hai
+        (caller ko timeout / stop check karne ka mauka milta hai).
+        """
+        blocks: "queue.Queue" = queue.Queue()
+
+        def _callback(indata, frames, time_info, status):
+            if status:
+                print("[faster-whisper] input stream status:", status)
+            blocks.put(indata[:, 0].copy())
+
+        with sd.InputStream(
+            samplerate=samplerate,
+            channels=1,
+            dtype="float32",
+            blocksize=int(samplerate * 0.03),
+            callback=_callback,
+        ):
+            while stop_event is None or not stop_event.is_set():
+                try:
+                    yield blocks.get(timeout=poll)
+                except queue.Empty:
+                    yield None
+
+    def record_utterance(
+        self,
+        timeout: float = 5.0,
+        samplerate: int = 16000,
+    ) -> Optional[np.ndarray]:
+        """
+        VAD endpointing: speech start hone par recording shuru, silence hangover
+        ke baad band. `timeout` seconds tak koi speech na mile to None.
+
+        Float32 array return hota hai (VAD ke preallocated buffer ka view,
+        agle record tak valid) – koi temp file nahi.
+        """
+        print("🎙️ Listening...")
+        if self._vad is None or self._vad.samplerate != samplerate:
+            self._vad = self._make_vad(samplerate)
+        vad = self._vad
+        vad.reset()
+        started = time.monotonic()
+
+        for block in self._iter_mic_blocks(samplerate):
+            if block is not None:
+                done = vad.feed(block, copy=False)
+                if done:
+                    return done[0]
+            if not vad.in_speech and time.monotonic() - started > timeout:
+                return None
+        return None
+
+    def iter_recordings(
+        self,
+        duration: int = 5,
+        samplerate: int = 16000,
+        stop_event: Optional[threading.Event] = None,
+        vad: Optional[bool] = None,
+    ) -> Iterator[np.ndarray]:
+        """
+        Continuous mic capture: ek hi InputStream khula rehta hai, do recordings
+        ke beech mic kabhi band nahi hota (pipeline ke liye).
+
+        - vad=True  -> har spoken utterance (VAD endpointing) ek float32 array
+        - vad=False -> har `duration` seconds ka fixed window ek float32 array
+
+        Yielded arrays caller ke hain (copies), isliye queue me daalna safe hai.
+        VAD mode me wake word gate (agar on hai) bhi lagta hai.
+        """
+        use_vad = STT_VAD_ENABLED if vad is None else vad
+        detector = self._make_vad(samplerate) if use_vad else None
+        frames_per_window = int(duration * samplerate)
+        pending: list = []
+        pending_frames = 0
+
+        for block in self._iter_mic_blocks(samplerate, stop_event=stop_event):
+            if block is None:
+                continue
+
+            if detector is not None:
+                if self.wake_gate is not None and detector.in_speech:
+                    self.wake_gate.keep_alive()
+                for utt in detector.feed(block, copy=True):
+                    if self.wake_gate is not None:
+                        utt = self.wake_gate.filter(utt, samplerate)
+                    if utt is not None:
+                        yield utt
+                continue
+
+            pending.append(block)
+            pending_frames += len(block)
+            if pending_frames < frames_per_window:
+                continue
+
+            audio = np.concatenate(pending)
+            window, rest = audio[:frames_per_window], audio[frames_per_window:]
+            pending = [rest] if len(rest) else []
+            pending_frames = len(rest)
+            yield window
+
+    def iter_transcripts(
+        self,
+        on_partial: Optional[Callable[[str], bool]] = None,
+        samplerate: int = 16000,
+        stop_event: Optional[threading.Event] = None,
+        idle_timeout: Optional[float] = None,
+        use_wake_word: bool = True,
+    ) -> Iterator[Tuple[str, bool]]:
+        """
+        Streaming transcription: VAD utterances + partial hypotheses.
+
+        Utterance ke beech user STT_EARLY_DISPATCH_PAUSE_MS se zyada ruke to har
+        STT_PARTIAL_INTERVAL_MS me rolling window ka fast decode hota hai aur
+        `on_partial(text)` call hota hai. Agar woh True return kare (e.g. "scroll
+        down" jaisi clear command), to utterance wahin khatam aur
+        `(partial_text, True)` yield – VAD hangover + final decode ka wait nahi.
+        Warna utterance end par `(final_text, False)` yield hota hai.
+
+        `on_partial.reset()` (agar ho) har naye utterance ki shuruaat pe, aur pause ke
+        baad user phir bolne lage tab call hota hai – callback ki state (e.g. pichla
+        partial) agle utterance / agle pause me na jaaye.
+
+        `idle_timeout`: itni der tak koi speech start na ho to generator ruk jaata hai.
+
+        Wake word gate on ho to un-armed state me na partials decode hote hain na
+        final – sirf sasta wake word check chalta hai.
+        """
+        gate = self.wake_gate if use_wake_word else None
+        detector = self._make_vad(samplerate)
+        interval = STT_PARTIAL_INTERVAL_MS / 1000.0
+        last_partial = 0.0
+        idle_since = time.monotonic()
+        reset_partial = getattr(on_partial, "reset", None)
+        in_utterance = False
+        in_pause = False
+
+        for block in self._iter_mic_blocks(samplerate, stop_event=stop_event):
+            now = time.monotonic()
+            if block is not None:
+                for utt in detector.feed(block, copy=False):
+                    idle_since = time.monotonic()
+                    if gate is not None:
+                        utt = gate.filter(utt, samplerate)
+                        if utt is None:
+                            continue
+                    yield self.transcribe_array(utt), False
+
+            if not detector.in_speech:
+                in_utterance = in_pause = False
+                if idle_timeout is not None and now - idle_since > idle_timeout:
+                    return
+                continue
+
+            paused = detector.trailing_silence_ms >= STT_EARLY_DISPATCH_PAUSE_MS
+            if not in_utterance or (in_pause and not paused):
+                # naya utterance, ya pause ke baad user phir bolne laga ("scroll ... up")
+                in_utterance = True
+                if reset_partial is not None:
+                    reset_partial()
+            in_pause = paused
+            idle_since = now
+            if gate is not None:
+                gate.keep_alive()
+            if on_partial is None or not paused or now - last_partial < interval:
+                continue
+            if gate is not None and not gate.armed:
+                continue
+
+            last_partial = now
+            partial = self.transcribe_partial(detector.current)
+            if partial and on_partial(partial):
+                detector.reset()
+                in_utterance = in_pause = False
+                if gate is not None:
+                    gate.disarm()
+                yield partial, True
+
+    def listen_streaming(
+        self,
+        on_partial: Optional[Callable[[str], bool]] = None,
+        timeout: float = 5.0,
+    ) -> str:
+        """
+        listen_and_transcribe ka streaming version: early dispatch ho to partial
+        text hi final maana jaata hai.
+        """
+        print("🎙️ Listening...")
+        for text, _early in self.iter_transcripts(
+            on_partial=on_partial, idle_timeout=timeout, use_wake_word=False
+        ):
+            print(f"🗣️ You said: {text}")
+            return text
+        return ""
+
+    def transcribe_partial(self, audio: np.ndarray, samplerate: int = 16000) -> str:
+        """
+        Partial hypothesis ke liye fast decode: sirf last STT_PARTIAL_WINDOW_S
+        seconds, greedy (beam 1), bina timestamps ke.
+        """
+        audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+        audio = audio[-int(STT_PARTIAL_WINDOW_S * samplerate):]
+        if not len(audio):
+            return ""
+
+        language = None if self.lang == "auto" else self.lang
+        with span("transcribe_partial"):
+            segments, info = self.model.transcribe(
+                audio,
+                language=language,
+                beam_size=1,
+                without_timestamps=True,
+                condition_on_previous_text=False,
+            )
+            return " ".join(seg.text for seg in segments).strip()
+
+    def _transcribe(self, audio) -> str:
         # language=None → autodetect; else e.g. "hi" or "en"
         language = None if self.lang == "auto" else self.lang
 
-        segments, info = self.model.transcribe(
-            wav_path,
-            language=language,
-            beam_size=5,
-        )
+        with span("transcribe"):
+            segments, info = self.model.transcribe(
+                audio,
+                language=language,
+                beam_size=5,
+            )
 
-        texts = [seg.text for seg in segments]
+            # segments lazy generator hai – asli decoding yahin hoti hai
+            texts = [seg.text for seg in segments]
         full_text = " ".join(texts).strip()
         return full_text
 
-    def listen_and_transcribe(self, duration: int = 5) -> str:
-        wav = self.record_to_wav(duration=duration)
-        text = self.transcribe_file(wav)
+    def transcribe_file(self, wav_path: str) -> str:
+        """Disk pe rakhi audio file (e.g. video_tools ke WAVs) transcribe karo."""
+        return self._transcribe(wav_path)
+
+    def transcribe_array(self, audio: np.ndarray) -> str:
+        """
+        In-memory path: 16 kHz mono float32 buffer seedha faster-whisper ko.
+        Na disk write, na read-back.
+        """
+        audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+        if not len(audio):
+            return ""
+        return self._transcribe(audio)
+
+    def listen_and_transcribe(self, duration: int = 5, vad: Optional[bool] = None) -> str:
+        """
+        vad=True (default: config.STT_VAD_ENABLED): `duration` ab speech start ka
+        wait timeout hai; recording speech khatam hote hi ruk jaati hai.
+        vad=False: purana behaviour, fixed `duration` seconds record.
+        """
+        use_vad = STT_VAD_ENABLED if vad is None else vad
+        if use_vad:
+            audio = self.record_utterance(timeout=duration)
+            if audio is None:
+                return ""
+        else:
+            audio = self.record_to_array(duration=duration)
+        text = self.transcribe_array(audio)
         print(f"🗣️ You said: {text}")
         return text
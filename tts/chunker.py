@@ -0,0 +1,65 @@
+# tts/chunker.py
+from __future__ import annotations
+
+import re
+from typing import Iterable, Iterator, List, Optional
+
+# Sentence end: . ! ? । (Devanagari danda) ya newline – aur uske baad whitespace.
+# "3.14" ya "v1.2" jaise cases isliye nahi tootte.
+_SENTENCE_END = re.compile(r"([.!?।]+[\"')\]]*|\n)(\s+)")
+# Lambi sentence ho to clause pe todna (comma / semicolon / colon / dash)
+_CLAUSE_END = re.compile(r"([,;:]|\s[-–—])(\s+)")
+
+
+class SentenceChunker:
+    """
+    LLM token stream ko bolne layak chunks (sentence / clause) me todta hai.
+
+    - `feed(token)` – jitne chunks complete hue woh list me milte hain.
+    - `flush()` – stream khatam hone par bacha hua text.
+
+    `min_chars` se chhote sentences agle ke saath jud jaate hain (TTS per-chunk
+    overhead kam). `max_chars` se lamba buffer clause boundary pe toot jaata hai
+    taaki pehla audio jaldi shuru ho.
+    """
+
+    def __init__(self, min_chars: int = 24, max_chars: int = 160):
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._buf = ""
+
+    def _split_at(self, pattern: re.Pattern) -> Optional[str]:
+        for m in pattern.finditer(self._buf):
+            end = m.end(1)
+            if end < self.min_chars:
+                continue
+            chunk, self._buf = self._buf[:end], self._buf[m.end():]
+            return chunk.strip()
+        return None
+
+    def feed(self, token: str) -> List[str]:
+        if not token:
+            return []
+        self._buf += token
+        out: List[str] = []
+        while True:
+            chunk = self._split_at(_SENTENCE_END)
+            if chunk is None and len(self._buf) > self.max_chars:
+                chunk = self._split_at(_CLAUSE_END)
+            if chunk is None:
+                break
+            if chunk:
+                out.append(chunk)
+        return out
+
+    def flush(self) -> Optional[str]:
+        rest, self._buf = self._buf.strip(), ""
+        return rest or None
+
+    def chunks(self, tokens: Iterable[str]) -> Iterator[str]:
+        """Poore token stream ko chunks me convert karne wala generator."""
+        for tok in tokens:
+            yield from self.feed(tok)
+        rest = self.flush()
+        if rest:
+            yield rest
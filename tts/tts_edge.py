@@ -4,13 +4,16 @@ from __future__ import annotations
 
 import asyncio
 import os
+import queue
 import tempfile
 import threading
-from typing import Optional
+from typing import Iterable, Optional
 
 import edge_tts
 import playsound
 
+from utils.latency import span
+
 
 class SimpleTTS:
     """
@@ -92,8 +95,84 @@ class SimpleTTS:
             self._current_thread = t
             t.start()
 
+    async def _synthesize(self, text: str) -> Optional[str]:
+        """Text -> temp MP3 path (edge-tts). Error par None."""
+        fd, tmp_path = tempfile.mkstemp(suffix=".mp3")
+        os.close(fd)
+        try:
+            communicate = edge_tts.Communicate(text, self.voice)
+            await communicate.save(tmp_path)
+            return tmp_path
+        except Exception as e:
+            print("[TTS] edge-tts error:", e)
+            try:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            except Exception:
+                pass
+            return None
+
+    def _play_queue(self, paths: "queue.Queue[Optional[str]]"):
+        # streaming playback: paths ek ek karke bajao; stop() ke baad baaki skip
+        try:
+            while True:
+                path = paths.get()
+                if path is None:
+                    break
+                with self._lock:
+                    skip = self._stop_flag
+                if not skip:
+                    try:
+                        playsound.playsound(path, block=True)
+                    except Exception as e:
+                        print("[TTS] playsound error:", e)
+                try:
+                    if os.path.exists(path):
+                        os.remove(path)
+                except Exception:
+                    pass
+        finally:
+            with self._lock:
+                self._speaking = False
+
     # ------------- public API ------------ #
 
+    def speak_stream(self, chunks: Iterable[str]) -> str:
+        """
+        Streaming speech: har chunk (sentence / clause) synthesize hote hi play
+        queue me chala jaata hai. Jab tak pehla chunk bol raha hai, agla
+        synthesize hota rehta hai – LLM abhi generate hi kar raha ho tab bhi.
+
+        Sab chunks synthesize hone par return karta hai (playback chalta rehta hai,
+        is_speaking() se check karo). Return: jitna text bola gaya.
+        """
+        with self._lock:
+            self._stop_flag = False
+            self._speaking = True
+
+        paths: "queue.Queue[Optional[str]]" = queue.Queue()
+        player = threading.Thread(target=self._play_queue, args=(paths,), daemon=True)
+        self._current_thread = player
+        player.start()
+
+        spoken = []
+        try:
+            for chunk in chunks:
+                chunk = (chunk or "").strip()
+                if not chunk:
+                    continue
+                with self._lock:
+                    if self._stop_flag:
+                        break
+                with span("tts"):
+                    path = asyncio.run(self._synthesize(chunk))
+                if path:
+                    spoken.append(chunk)
+                    paths.put(path)
+        finally:
+            paths.put(None)
+        return " ".join(spoken)
+
     def speak(self, text: str, stt=None, enable_barge_in: bool = False):
         """
         main.py isse call karta hai:
@@ -103,7 +182,8 @@ class SimpleTTS:
         real barge-in logic main.py me hai (loop + is_speaking + stop).
         """
         try:
-            asyncio.run(self._speak_async(text))
+            with span("tts"):
+                asyncio.run(self._speak_async(text))
         except RuntimeError:
             # agar already event loop chal raha ho (rare case),
             # fallback thread me run kara sakte hain
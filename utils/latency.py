@@ -0,0 +1,218 @@
+# utils/latency.py
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Deque, Dict, Iterable, List, Optional
+
+from config import LATENCY_LOG_MAX_MB, LATENCY_LOG_PATH, LATENCY_LOG_TEXT
+
+_turn_ids = itertools.count(1)
+
+
+@dataclass
+class Turn:
+    """Ek voice turn ke saare stage timings (milliseconds)."""
+    turn_id: int = field(default_factory=lambda: next(_turn_ids))
+    intent: str = ""
+    text: str = ""
+    spans: Dict[str, float] = field(default_factory=dict)
+    started: float = field(default_factory=time.perf_counter)
+    ts: float = field(default_factory=time.time)
+
+    def add(self, name: str, ms: float) -> None:
+        # same stage ek turn me do baar chale (e.g. partial decodes) to jod do
+        self.spans[name] = self.spans.get(name, 0.0) + ms
+
+    def to_dict(self, include_text: bool = False) -> dict:
+        out = {
+            "ts": self.ts,
+            "turn_id": self.turn_id,
+            "intent": self.intent or "unknown",
+            "spans_ms": {k: round(v, 2) for k, v in self.spans.items()},
+        }
+        if include_text:
+            out["text"] = self.text[:200]
+        return out
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    vals = sorted(values)
+    k = (len(vals) - 1) * q / 100.0
+    lo, hi = int(k), min(int(k) + 1, len(vals) - 1)
+    return vals[lo] + (vals[hi] - vals[lo]) * (k - lo)
+
+
+def summarize(samples: Dict[str, Iterable[float]]) -> Dict[str, dict]:
+    out = {}
+    for name, vals in sorted(samples.items()):
+        vals = list(vals)
+        out[name] = {
+            "count": len(vals),
+            "p50": round(percentile(vals, 50), 1),
+            "p95": round(percentile(vals, 95), 1),
+            "p99": round(percentile(vals, 99), 1),
+            "sum": round(sum(vals), 1),
+        }
+    return out
+
+
+def format_summary(summary: Dict[str, dict]) -> str:
+    lines = [f"{'stage':<32}{'n':>6}{'p50':>10}{'p95':>10}{'p99':>10}"]
+    for name, s in summary.items():
+        lines.append(f"{name:<32}{s['count']:>6}{s['p50']:>10.1f}{s['p95']:>10.1f}{s['p99']:>10.1f}")
+    return "\n".join(lines)
+
+
+class LatencyTracker:
+    """
+    Span-based latency instrumentation.
+
+    - `start_turn()` se naya Turn, `bind(turn)` se current thread ka turn set.
+      (Pipeline me turn queue ke saath stage-to-stage jaata hai, har stage bind karta hai.)
+    - `with tracker.span("llm"):` – duration current turn me add hoti hai aur
+      rolling histogram (last `window` samples) me bhi, stage aur stage@intent dono keys pe.
+    - `end_turn(turn)` – per-turn record JSONL file me append. Sirf timings + intent
+      (utterance text tabhi jab `log_text`); file `max_bytes` se badi ho to `.1` pe rotate.
+    """
+
+    def __init__(self, log_path: Optional[Path] = LATENCY_LOG_PATH, window: int = 500,
+                 log_text: bool = LATENCY_LOG_TEXT, max_bytes: int = LATENCY_LOG_MAX_MB << 20):
+        self.log_path = Path(log_path) if log_path else None
+        self.log_text = log_text
+        self.max_bytes = max_bytes
+        self.window = window
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=self.window))
+
+    # ------------- turn binding ------------ #
+
+    def start_turn(self, text: str = "") -> Turn:
+        return Turn(text=text)
+
+    def bind(self, turn: Optional[Turn]) -> None:
+        self._local.turn = turn
+
+    def current(self) -> Optional[Turn]:
+        return getattr(self._local, "turn", None)
+
+    def set_intent(self, intent: str) -> None:
+        turn = self.current()
+        if turn is not None:
+            turn.intent = intent
+
+    # ------------- recording ------------ #
+
+    def record(self, name: str, ms: float, turn: Optional[Turn] = None) -> None:
+        turn = turn or self.current()
+        if turn is not None:
+            turn.add(name, ms)
+        with self._lock:
+            self._samples[name].append(ms)
+
+    @contextmanager
+    def span(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - t0) * 1000.0)
+
+    def end_turn(self, turn: Optional[Turn] = None) -> None:
+        turn = turn or self.current()
+        if turn is None:
+            return
+        total = (time.perf_counter() - turn.started) * 1000.0
+        turn.spans["total"] = total
+
+        with self._lock:
+            self._samples["total"].append(total)
+            if turn.intent:
+                for name, ms in turn.spans.items():
+                    self._samples[f"{name}@{turn.intent}"].append(ms)
+
+        if self.log_path is None:
+            return
+        line = json.dumps(turn.to_dict(include_text=self.log_text), ensure_ascii=False) + "\n"
+        try:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            with self._lock:
+                self._rotate_if_full()
+                with self.log_path.open("a", encoding="utf-8") as f:
+                    f.write(line)
+        except Exception as e:
+            print("[Latency] Failed to write turn log:", e)
+
+    def _rotate_if_full(self) -> None:
+        # lambe chalne wale install pe log bina limit ke na badhe: ek purani file rakho
+        if not self.max_bytes:
+            return
+        try:
+            size = self.log_path.stat().st_size
+        except FileNotFoundError:
+            return
+        if size >= self.max_bytes:
+            self.log_path.replace(self.log_path.with_name(self.log_path.name + ".1"))
+
+    # ------------- reporting ------------ #
+
+    def summary(self) -> Dict[str, dict]:
+        with self._lock:
+            snapshot = {k: list(v) for k, v in self._samples.items()}
+        return summarize(snapshot)
+
+    def report(self) -> str:
+        return format_summary(self.summary())
+
+
+_tracker: Optional[LatencyTracker] = None
+
+
+def get_latency_tracker() -> LatencyTracker:
+    global _tracker
+    if _tracker is None:
+        _tracker = LatencyTracker()
+    return _tracker
+
+
+def span(name: str):
+    """Shortcut: `with latency.span("tts"): ...`"""
+    return get_latency_tracker().span(name)
+
+
+# ---------------- offline report (releases compare karne ke liye) ---------------- #
+
+def load_jsonl(path: Path) -> Dict[str, List[float]]:
+    samples: Dict[str, List[float]] = defaultdict(list)
+    with Path(path).open(encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            rec = json.loads(line)
+            intent = rec.get("intent") or "unknown"
+            for name, ms in (rec.get("spans_ms") or {}).items():
+                samples[name].append(float(ms))
+                samples[f"{name}@{intent}"].append(float(ms))
+    return samples
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-stage latency percentiles from a turn log")
+    parser.add_argument("logs", nargs="*", default=[str(LATENCY_LOG_PATH)], help="latency JSONL file(s)")
+    args = parser.parse_args()
+
+    for p in args.logs:
+        print(f"== {p}")
+        print(format_summary(summarize(load_jsonl(Path(p)))))
+        print()
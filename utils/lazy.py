@@ -0,0 +1,98 @@
+# utils/lazy.py
+from __future__ import annotations
+
+import importlib
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+class LazyRegistry:
+    """
+    Heavy components (models, skill modules) ka lazy registry.
+
+    - `register(name, factory)` – sirf recipe save hoti hai, kuch load nahi hota.
+    - `get(name)` – pehli baar factory chalti hai, phir cached instance.
+      Thread-safe: do threads ek saath maange to bhi factory ek hi baar chalegi.
+    - `warm_up(names)` – background daemon threads me pehle se load kar do.
+    - `proxy(name)` – LazyProxy, jo pehle attribute access pe load karta hai
+      (isliye purana code `obj.method()` bina badle chalta rehta hai).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        with self._lock:
+            self._factories[name] = factory
+            self._locks.setdefault(name, threading.Lock())
+
+    def register_module(self, module_name: str) -> None:
+        self.register(module_name, lambda: importlib.import_module(module_name))
+
+    def is_loaded(self, name: str) -> bool:
+        with self._lock:
+            return name in self._instances
+
+    def get(self, name: str) -> Any:
+        with self._lock:
+            if name in self._instances:
+                return self._instances[name]
+            if name not in self._factories:
+                raise KeyError(f"Unknown component: {name}")
+            factory = self._factories[name]
+            comp_lock = self._locks[name]
+
+        # per-component lock: ek component load ho raha ho to baaki blocked nahi
+        with comp_lock:
+            with self._lock:
+                if name in self._instances:
+                    return self._instances[name]
+            instance = factory()
+            with self._lock:
+                self._instances[name] = instance
+            return instance
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> List[threading.Thread]:
+        names = list(names) if names is not None else list(self._factories)
+        threads = []
+        for name in names:
+            def _load(n=name):
+                try:
+                    self.get(n)
+                except Exception as e:
+                    print(f"[Lazy] warm-up failed for {n}:", e)
+
+            t = threading.Thread(target=_load, name=f"warmup-{name}", daemon=True)
+            t.start()
+            threads.append(t)
+        return threads
+
+    def proxy(self, name: str) -> "LazyProxy":
+        return LazyProxy(self, name)
+
+
+class LazyProxy:
+    """Attribute access pe underlying component load karke forward karta hai."""
+
+    __slots__ = ("_registry", "_name")
+
+    def __init__(self, registry: LazyRegistry, name: str):
+        object.__setattr__(self, "_registry", registry)
+        object.__setattr__(self, "_name", name)
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._registry.get(self._name), attr)
+
+    def __setattr__(self, attr: str, value: Any) -> None:
+        setattr(self._registry.get(self._name), attr, value)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._registry.is_loaded(self._name) else "lazy"
+        return f"<LazyProxy {self._name} ({state})>"
+
+
+# Process-wide registry (skills + heavy models)
+components = LazyRegistry()
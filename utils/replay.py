@@ -0,0 +1,364 @@
+# utils/replay.py
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from brain.context import ChatContext
+from main import handle_turn, handle_turn_stream, is_exit_command
+from tts.chunker import SentenceChunker
+from utils.latency import format_summary, get_latency_tracker, span
+
+
+@dataclass
+class CorpusItem:
+    text: str = ""                  # utterance (ya WAV ka reference transcript)
+    audio_path: Optional[Path] = None
+    intent: str = ""                # expected intent (optional, accuracy ke liye)
+    source: str = ""
+
+
+# ---------------- corpus loading ---------------- #
+
+_TEXT_KEYS = ("text", "utterance", "transcript")
+
+
+def _sidecar_text(wav: Path) -> str:
+    txt = wav.with_suffix(".txt")
+    return txt.read_text(encoding="utf-8").strip() if txt.exists() else ""
+
+
+def _load_jsonl(path: Path) -> Iterator[CorpusItem]:
+    with path.open(encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError as e:
+                print(f"[Replay] {path}:{n} invalid JSON, skipped:", e)
+                continue
+            text = next((str(rec[k]) for k in _TEXT_KEYS if rec.get(k)), "")
+            audio = rec.get("wav") or rec.get("audio")
+            if audio:
+                audio = Path(audio)
+                if not audio.is_absolute():
+                    audio = path.parent / audio
+            if not text and not audio:
+                continue
+            yield CorpusItem(
+                text=text,
+                audio_path=audio or None,
+                intent=str(rec.get("intent") or ""),
+                source=f"{path.name}:{n}",
+            )
+
+
+def load_corpus(paths: List[str]) -> List[CorpusItem]:
+    """
+    Corpus formats:
+      - .txt   – har line ek utterance (khaali aur '#' wali lines skip)
+      - .jsonl – {"text": ..., "intent": ..., "wav": ...} per line
+      - .wav   – audio; reference transcript same naam ki .txt me (optional)
+      - directory – andar ke saare .txt / .jsonl / .wav (sorted)
+    """
+    items: List[CorpusItem] = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            files = sorted(
+                f for f in p.iterdir()
+                if f.suffix in (".jsonl", ".wav")
+                or (f.suffix == ".txt" and not f.with_suffix(".wav").exists())
+            )
+        else:
+            files = [p]
+
+        for f in files:
+            if f.suffix == ".jsonl":
+                items.extend(_load_jsonl(f))
+            elif f.suffix == ".wav":
+                items.append(CorpusItem(text=_sidecar_text(f), audio_path=f, source=f.name))
+            else:
+                for n, line in enumerate(f.read_text(encoding="utf-8").splitlines(), 1):
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        items.append(CorpusItem(text=line, source=f"{f.name}:{n}"))
+    return items
+
+
+# ---------------- deterministic stand-ins ---------------- #
+
+class TranscriptSTT:
+    """
+    STT stand-in: WAV ka reference transcript (.txt sidecar / corpus text) lauta deta hai.
+    Model file ya mic ki zarurat nahi.
+    """
+
+    def __init__(self):
+        self.reference: dict = {}
+
+    def transcribe_file(self, wav_path: str) -> str:
+        with span("transcribe"):
+            return self.reference.get(str(wav_path)) or _sidecar_text(Path(wav_path))
+
+
+class EchoBrain:
+    """
+    LLM stand-in: same input => same reply. `token_ms` diya ho to har word pe
+    utna sleep (generation speed simulate karne ke liye), warna instant.
+    BrainLLM ka public API (chat / chat_stream / classify_intent / learn_from_turn).
+    """
+
+    def __init__(self, token_ms: float = 0.0):
+        self.token_ms = token_ms
+
+    def _reply(self, history) -> str:
+        last = next(
+            (m.get("content", "") for m in reversed(history or []) if m.get("role") == "user"),
+            "",
+        )
+        return f"Theek hai. Aapne kaha: {last.strip()}. Main is par kaam kar raha hoon."
+
+    def chat(self, history) -> str:
+        with span("llm"):
+            words = self._reply(history).split(" ")
+            if self.token_ms:
+                time.sleep(self.token_ms * len(words) / 1000.0)
+            return " ".join(words)
+
+    def chat_stream(self, history) -> Iterator[str]:
+        tracker = get_latency_tracker()
+        t0 = time.perf_counter()
+        try:
+            for i, word in enumerate(self._reply(history).split(" ")):
+                if self.token_ms:
+                    time.sleep(self.token_ms / 1000.0)
+                if i == 0:
+                    tracker.record("llm_first_token", (time.perf_counter() - t0) * 1000.0)
+                yield word if i == 0 else " " + word
+        finally:
+            tracker.record("llm", (time.perf_counter() - t0) * 1000.0)
+
+    def classify_intent(self, text: str, allowed_intents: list[str]) -> str:
+        return "chat"
+
+    def learn_from_turn(self, user_text: str, reply: str) -> None:
+        # asli BrainLLM jaisa hi memory write, taaki memory path bhi benchmark ho
+        from memory.memory_store import get_memory_store
+
+        get_memory_store().add(
+            text=f"user: {user_text.strip()}\nassistant: {reply.strip()}",
+            category="conversation",
+            source="auto",
+            tags=["turn_pair"],
+        )
+
+
+class NullTTS:
+    """TTS stand-in: kuch bajta nahi. `chars_per_s` diya ho to playback time simulate."""
+
+    def __init__(self, chars_per_s: float = 0.0):
+        self.chars_per_s = chars_per_s
+
+    def speak(self, text: str, **_):
+        with span("tts"):
+            if self.chars_per_s:
+                time.sleep(len(text) / self.chars_per_s)
+
+    def is_speaking(self) -> bool:
+        return False
+
+
+class DryRunRouter:
+    """
+    Asli IntentRouter ka detect_intent, lekin non-chat skills execute nahi hote
+    (CI box pe apps kholna / downloads / web calls nahi chahiye). Chat intent
+    asli router se hi brain tak jaata hai.
+    """
+
+    def __init__(self, router):
+        self.router = router
+
+    def detect_intent(self, text: str) -> str:
+        return self.router.detect_intent(text)
+
+    def handle(self, text: str, brain=None, chat_history=None) -> str:
+        return "".join(self.handle_stream(text, brain=brain, chat_history=chat_history))
+
+    def handle_stream(self, text: str, brain=None, chat_history=None) -> Iterator[str]:
+        # route sirf ek baar, "route" span ke andar (fuzzy correction bhi isi me)
+        tracker = get_latency_tracker()
+        with tracker.span("route"):
+            intent, text = self.router._route(text)
+        tracker.set_intent(intent)
+        if intent == "chat":
+            yield from self.router._respond_stream(intent, text, brain=brain, chat_history=chat_history)
+            return
+        yield f"[dry-run] {intent}"
+
+
+# ---------------- runner ---------------- #
+
+class ReplayRunner:
+    """
+    main.main() wala per-turn logic (main.handle_turn / handle_turn_stream) bina
+    mic / speaker ke chalata hai. Har turn LatencyTracker me record hota hai,
+    end me per-stage latency percentiles + throughput report.
+    """
+
+    def __init__(self, stt, router, brain, tts, stream: bool = False):
+        self.stt = stt
+        self.router = router
+        self.brain = brain
+        self.tts = tts
+        self.stream = stream
+        self.tracker = get_latency_tracker()
+        self.chat_history = ChatContext(brain)
+        self.turns = 0
+        self.intent_hits = 0
+        self.intent_total = 0
+        self.wall_s = 0.0
+
+    def _speak(self, text: str) -> None:
+        self.tts.speak(text)
+
+    def run_item(self, item: CorpusItem) -> Optional[str]:
+        turn = self.tracker.start_turn()
+        self.tracker.bind(turn)
+        try:
+            text = item.text
+            if item.audio_path is not None:
+                if isinstance(self.stt, TranscriptSTT) and item.text:
+                    self.stt.reference[str(item.audio_path)] = item.text
+                text = self.stt.transcribe_file(str(item.audio_path)) or ""
+            text = text.strip()
+            turn.text = text
+            if not text or is_exit_command(text):
+                return None
+
+            # transcript ready => yahin se perceived latency (pipeline jaisa)
+            turn.started = time.perf_counter()
+            if self.stream:
+                parts = []
+                first = True
+                pieces = handle_turn_stream(text, self.router, self.brain, self.chat_history)
+                for chunk in SentenceChunker().chunks(pieces):
+                    if first:
+                        self.tracker.record("response", (time.perf_counter() - turn.started) * 1000.0)
+                        first = False
+                    parts.append(chunk)
+                    self._speak(chunk)
+                pieces.after()
+                reply = " ".join(parts)
+            else:
+                reply = handle_turn(text, self.router, self.brain, self.chat_history)
+                self.tracker.record("response", (time.perf_counter() - turn.started) * 1000.0)
+                self._speak(reply)
+
+            if item.intent:
+                self.intent_total += 1
+                self.intent_hits += int(turn.intent == item.intent)
+                if turn.intent != item.intent:
+                    print(f"[Replay] intent mismatch ({item.source}): {text!r} -> {turn.intent}, expected {item.intent}")
+            return reply
+        finally:
+            self.tracker.end_turn(turn)
+            self.tracker.bind(None)
+            self.turns += 1
+
+    def run(self, items: List[CorpusItem], repeat: int = 1, verbose: bool = False) -> None:
+        t0 = time.perf_counter()
+        for _ in range(max(1, repeat)):
+            for item in items:
+                reply = self.run_item(item)
+                if verbose and reply is not None:
+                    print(f"[{item.source}] {item.text} -> {reply}")
+        self.wall_s += time.perf_counter() - t0
+
+    def report(self) -> str:
+        summary = self.tracker.summary()
+        lines = [format_summary(summary), ""]
+        lines.append(f"{'stage':<32}{'n':>6}{'busy_s':>10}{'ops/s':>10}")
+        for name, s in summary.items():
+            if "@" in name:
+                continue
+            busy = s["sum"] / 1000.0
+            ops = s["count"] / busy if busy else 0.0
+            lines.append(f"{name:<32}{s['count']:>6}{busy:>10.3f}{ops:>10.1f}")
+        rate = self.turns / self.wall_s if self.wall_s else 0.0
+        lines.append("")
+        lines.append(f"turns={self.turns} wall={self.wall_s:.2f}s throughput={rate:.1f} turns/s")
+        if self.intent_total:
+            lines.append(f"intent accuracy={self.intent_hits}/{self.intent_total}")
+        return "\n".join(lines)
+
+
+def _build(args):
+    from skills.router import IntentRouter
+    from utils.lazy import components
+
+    if args.stt == "whisper":
+        from stt.whisper_cpp import WhisperSTT
+        stt = WhisperSTT()
+        stt.warm_up()
+    else:
+        stt = TranscriptSTT()
+
+    if args.llm == "llama":
+        from main import _make_brain
+        brain = _make_brain()
+        brain.warm_up()
+    else:
+        brain = EchoBrain(token_ms=args.token_ms)
+
+    if args.tts == "edge":
+        from tts.tts_edge import SimpleTTS
+        tts = SimpleTTS()
+    else:
+        tts = NullTTS(chars_per_s=args.tts_chars_per_s)
+
+    router = IntentRouter()
+    # lazy intent_clf (pehli baar file na ho to training) pehle measured turn me na gine
+    components.get("intent_clf")
+    if not args.skills:
+        router = DryRunRouter(router)
+    return stt, router, brain, tts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless turn replay + per-stage benchmark")
+    parser.add_argument("corpus", nargs="+", help=".txt / .jsonl / .wav files or directories")
+    parser.add_argument("--stt", choices=["transcript", "whisper"], default="transcript")
+    parser.add_argument("--llm", choices=["echo", "llama"], default="echo")
+    parser.add_argument("--tts", choices=["null", "edge"], default="null")
+    parser.add_argument("--skills", action="store_true", help="non-chat skills sach me execute karo")
+    parser.add_argument("--stream", action="store_true", help="streaming turn path (handle_turn_stream)")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--token-ms", type=float, default=0.0, help="echo LLM: simulated ms per token")
+    parser.add_argument("--tts-chars-per-s", type=float, default=0.0, help="null TTS: simulated speech rate")
+    parser.add_argument("--memory", default="", help="memory JSON path (default: temp file)")
+    parser.add_argument("--log", default="", help="per-turn latency JSONL (default: none)")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    from memory.memory_store import MemoryStore, set_memory_store
+
+    tmp = tempfile.TemporaryDirectory(prefix="jarvis-replay-")
+    set_memory_store(MemoryStore(Path(args.memory) if args.memory else Path(tmp.name) / "memory_data.json"))
+    get_latency_tracker().log_path = Path(args.log) if args.log else None
+
+    items = load_corpus(args.corpus)
+    if not items:
+        raise SystemExit("Corpus me koi utterance nahi mila.")
+    print(f"[Replay] {len(items)} utterance(s), stt={args.stt} llm={args.llm} tts={args.tts}")
+
+    runner = ReplayRunner(*_build(args), stream=args.stream)
+    runner.run(items, repeat=args.repeat, verbose=args.verbose)
+    print(runner.report())
+    tmp.cleanup()
@@ -0,0 +1,375 @@
+# utils/voice_pipeline.py
+from __future__ import annotations
+
+import difflib
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, Optional, Union
+
+from brain.cancellation import REASON_BARGE_IN, CancelToken, cancel_scope
+from config import LLM_TURN_TIMEOUT_S
+from tts.chunker import SentenceChunker
+
+from utils.latency import Turn, get_latency_tracker
+
+
+@dataclass
+class Utterance:
+    audio: object          # stage-1 output (float32 numpy array)
+    heard_while_speaking: bool = False
+    turn: Optional[Turn] = None
+
+
+@dataclass
+class SpeechItem:
+    text: str
+    final: bool = False    # True => isko bolne ke baad pipeline band
+    turn: Optional[Turn] = None
+    stream: Optional["ChunkStream"] = None   # streaming reply (text tab khaali)
+
+
+class ChunkStream:
+    """
+    Route stage -> speak stage ke beech ek reply ke sentence chunks.
+    Producer `put()` / `close()` karta hai, consumer iterate karta hai.
+    """
+
+    def __init__(self):
+        self._q: "queue.Queue[Optional[str]]" = queue.Queue()
+        self.parts: list[str] = []
+
+    def put(self, chunk: str) -> None:
+        self._q.put(chunk)
+
+    def close(self) -> None:
+        self._q.put(None)
+
+    def __iter__(self) -> Iterator[str]:
+        while True:
+            chunk = self._q.get()
+            if chunk is None:
+                return
+            self.parts.append(chunk)
+            yield chunk
+
+
+def _looks_like_echo(heard: str, spoken: str) -> bool:
+    """
+    Mic TTS ke time bhi on rehta hai, to kabhi kabhi Jarvis apni hi awaaz sun leta hai.
+    Agar transcript bole gaye reply se kaafi milta julta hai to usko echo maan lo.
+    """
+    a = (heard or "").lower().strip()
+    b = (spoken or "").lower().strip()
+    if not a or not b:
+        return False
+    if a in b:
+        return True
+    return difflib.SequenceMatcher(None, a, b).ratio() > 0.6
+
+
+class VoicePipeline:
+    """
+    Concurrent voice loop:
+
+        mic capture -> transcription -> routing / LLM -> TTS
+
+    Har stage apne daemon thread me chalta hai aur stages ke beech queue.Queue hai.
+    Isse jab Jarvis bol raha hota hai tab bhi mic sun raha hota hai, aur jab LLM
+    soch raha hota hai tab pichla reply bola ja sakta hai – turns ke beech koi
+    "deaf gap" nahi rehta.
+
+    `handle_text(user_text)` reply string return karta hai, ya None agar user ne
+    exit bola (tab `exit_reply` bol kar pipeline band ho jaati hai). Reply text
+    pieces ka iterator bhi ho sakta hai (LLM token stream): tab SentenceChunker
+    har complete sentence ko turant TTS ko deta hai jab tak generation chal rahi hai.
+    Aise reply ka `after()` ho (main.TurnStream: history / learning) to woh aakhri
+    chunk TTS ko jaane ke baad, isi route stage me (turn ki cancel scope ke bahar) chalta hai.
+
+    `early_dispatch(partial_text) -> bool` diya ho (aur STT streaming support kare)
+    to capture + transcription ek hi streaming stage ban jaate hain: partial
+    hypotheses pe hi clear commands route ho jaati hain, final transcript ka wait nahi.
+
+    Har turn `handle_text` ek CancelToken ki cancel_scope me chalta hai
+    (`turn_timeout_s` deadline ke saath). Reply generate hote waqt user phir
+    bole (barge-in) to woh token cancel: LLM agle token pe ruk kar naye turn ke
+    liye free ho jaata hai.
+    """
+
+    def __init__(
+        self,
+        stt,
+        tts,
+        handle_text: Callable[[str], Union[str, Iterable[str], None]],
+        listen_seconds: int = 5,
+        exit_reply: str = "Theek hai, main ab band ho raha hoon. Bye.",
+        early_dispatch: Optional[Callable[[str], bool]] = None,
+        turn_timeout_s: Optional[float] = LLM_TURN_TIMEOUT_S,
+    ):
+        self.stt = stt
+        self.tts = tts
+        self.handle_text = handle_text
+        self.listen_seconds = listen_seconds
+        self.exit_reply = exit_reply
+        self.early_dispatch = early_dispatch
+        self.streaming = early_dispatch is not None and hasattr(stt, "iter_transcripts")
+        self.turn_timeout_s = turn_timeout_s
+        self._turn_token: Optional[CancelToken] = None
+
+        self._stop = threading.Event()
+        self._audio_q: "queue.Queue[Optional[Utterance]]" = queue.Queue(maxsize=8)
+        self._text_q: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._speech_q: "queue.Queue[Optional[SpeechItem]]" = queue.Queue()
+
+        self.tracker = get_latency_tracker()
+        self._spoken_lock = threading.Lock()
+        self._last_spoken = ""
+        self._threads: list[threading.Thread] = []
+
+    # ------------- stages ------------ #
+
+    def _capture_stage(self) -> None:
+        try:
+            for audio in self.stt.iter_recordings(duration=self.listen_seconds, stop_event=self._stop):
+                if self._stop.is_set():
+                    break
+                speaking = self._tts_busy()
+                turn = self.tracker.start_turn()
+                # record span = utterance ki audio length
+                self.tracker.record("record", len(audio) / 16.0, turn=turn)
+                try:
+                    self._audio_q.put(
+                        Utterance(audio=audio, heard_while_speaking=speaking, turn=turn), timeout=1
+                    )
+                except queue.Full:
+                    # transcription peeche chal raha hai; purana audio drop karna better hai
+                    print("[Pipeline] transcription backlog, dropping audio window")
+        except Exception as e:
+            print("[Pipeline] capture error:", e)
+        finally:
+            self._audio_q.put(None)
+
+    def _streaming_capture_stage(self) -> None:
+        # capture + partial/final transcription ek saath (stt.iter_transcripts).
+        # STT spans (wake word, partials, final decode) is thread ke bound turn me jaate hain.
+        turn = self.tracker.start_turn()
+        self.tracker.bind(turn)
+        try:
+            for text, early in self.stt.iter_transcripts(
+                on_partial=self.early_dispatch, stop_event=self._stop
+            ):
+                if self._stop.is_set():
+                    break
+                turn.started = time.perf_counter()
+                self._accept_text((text or "").strip(), heard_while_speaking=self._tts_busy(), turn=turn)
+                turn = self.tracker.start_turn()
+                self.tracker.bind(turn)
+        except Exception as e:
+            print("[Pipeline] streaming capture error:", e)
+        finally:
+            self._text_q.put(None)
+
+    def _accept_text(self, text: str, heard_while_speaking: bool, turn: Optional[Turn] = None) -> None:
+        if not text:
+            return
+        if heard_while_speaking:
+            with self._spoken_lock:
+                spoken = self._last_spoken
+            if _looks_like_echo(text, spoken):
+                return
+        self._cancel_turn(REASON_BARGE_IN)
+        self._text_q.put((text, turn))
+
+    def _cancel_turn(self, reason: str) -> None:
+        # chal rahi reply generation (agar koi hai) ab kisi kaam ki nahi
+        token = self._turn_token
+        if token is not None and not token.cancelled:
+            print(f"[Pipeline] cancelling in-flight reply ({reason})")
+            token.cancel(reason)
+
+    def _transcribe_stage(self) -> None:
+        while True:
+            utt = self._audio_q.get()
+            if utt is None or self._stop.is_set():
+                break
+            self.tracker.bind(utt.turn)
+            try:
+                text = (self.stt.transcribe_array(utt.audio) or "").strip()
+            except Exception as e:
+                print("[Pipeline] transcription error:", e)
+                continue
+
+            self._accept_text(text, heard_while_speaking=utt.heard_while_speaking, turn=utt.turn)
+        self._text_q.put(None)
+
+    def _route_stage(self) -> None:
+        while True:
+            item = self._text_q.get()
+            if item is None or self._stop.is_set():
+                break
+            text, turn = item
+            if turn is None:
+                turn = self.tracker.start_turn()
+            turn.text = text
+            self.tracker.bind(turn)
+
+            print(f"🗣️ You said: {text}")
+            token = CancelToken(timeout_s=self.turn_timeout_s)
+            self._turn_token = token
+            # streaming reply ke tokens bhi isi thread me (isi scope me) generate hote hain
+            with cancel_scope(token):
+                try:
+                    reply = self.handle_text(text)
+                except Exception as e:
+                    print("[Pipeline] Error in handle_text:", e)
+                    reply = "Mujhe command samajhne mein thoda issue aa gaya."
+
+                if reply is None:
+                    self._turn_token = None
+                    self._speech_q.put(SpeechItem(self.exit_reply, final=True, turn=turn))
+                    break
+
+                if isinstance(reply, str):
+                    self._speech_q.put(SpeechItem(reply, turn=turn))
+                else:
+                    self._stream_reply(reply, turn)
+            self._turn_token = None
+
+            # barge-in / deadline history update ko nahi rokte
+            after = getattr(reply, "after", None)
+            if after is not None:
+                try:
+                    after()
+                except Exception as e:
+                    print("[Pipeline] Error after reply:", e)
+        self._speech_q.put(None)
+
+    def _stream_reply(self, pieces: Iterable[str], turn: Optional[Turn]) -> None:
+        # tokens isi (route) thread me generate hote hain; complete sentences
+        # speak stage ko chunk stream se jaate hain
+        stream = ChunkStream()
+        self._speech_q.put(SpeechItem("", turn=turn, stream=stream))
+        try:
+            for chunk in SentenceChunker().chunks(pieces):
+                if self._stop.is_set():
+                    break
+                stream.put(chunk)
+        except Exception as e:
+            print("[Pipeline] Error while streaming reply:", e)
+        finally:
+            stream.close()
+
+    def _speak_stage(self) -> None:
+        while True:
+            item = self._speech_q.get()
+            if item is None:
+                break
+
+            turn = item.turn
+            self.tracker.bind(turn)
+            try:
+                if item.stream is not None:
+                    self._speak_stream(item.stream, turn)
+                else:
+                    self._speak_text(item.text, turn)
+            except Exception as e:
+                print("[Pipeline] TTS error:", e)
+            if turn is not None:
+                self.tracker.end_turn(turn)
+
+            if item.final:
+                self.stop()
+                break
+
+    def _mark_response(self, turn: Optional[Turn]) -> None:
+        if turn is not None:
+            # perceived latency: transcript ready -> Jarvis bolna shuru kare
+            self.tracker.record("response", (time.perf_counter() - turn.started) * 1000.0)
+
+    def _speak_text(self, text: str, turn: Optional[Turn]) -> None:
+        print(f"🤖 Jarvis: {text}\n")
+        with self._spoken_lock:
+            self._last_spoken = text
+        self._mark_response(turn)
+        self.tts.speak(text)
+        self._wait_tts_done()
+
+    def _speak_stream(self, stream: ChunkStream, turn: Optional[Turn]) -> None:
+        first = True
+
+        def _chunks() -> Iterator[str]:
+            nonlocal first
+            for chunk in stream:
+                if first:
+                    self._mark_response(turn)
+                    print("🤖 Jarvis: ", end="", flush=True)
+                    first = False
+                print(chunk, end=" ", flush=True)
+                with self._spoken_lock:
+                    self._last_spoken = " ".join(stream.parts)
+                yield chunk
+
+        speak_stream = getattr(self.tts, "speak_stream", None)
+        if speak_stream is not None:
+            speak_stream(_chunks())
+            self._wait_tts_done()
+        else:
+            for chunk in _chunks():
+                self.tts.speak(chunk)
+                self._wait_tts_done()
+        if not first:
+            print("\n")
+
+    # ------------- helpers ------------ #
+
+    def _tts_busy(self) -> bool:
+        is_speaking = getattr(self.tts, "is_speaking", None)
+        try:
+            return bool(is_speaking()) if is_speaking else False
+        except Exception:
+            return False
+
+    def _wait_tts_done(self, poll: float = 0.05) -> None:
+        # SimpleTTS.speak playback ko alag thread me chalata hai;
+        # next reply se pehle uske khatam hone ka wait karte hain
+        while self._tts_busy() and not self._stop.is_set():
+            time.sleep(poll)
+
+    # ------------- public API ------------ #
+
+    def say(self, text: str) -> None:
+        """Pipeline ke bahar se kuch bolwana ho (e.g. background job announce)."""
+        if text:
+            self._speech_q.put(SpeechItem(text))
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        if self.streaming:
+            stages = [("capture", self._streaming_capture_stage)]
+        else:
+            stages = [("capture", self._capture_stage), ("transcribe", self._transcribe_stage)]
+        stages += [("route", self._route_stage), ("speak", self._speak_stage)]
+
+        for name, target in stages:
+            t = threading.Thread(target=target, name=f"pipeline-{name}", daemon=True)
+            self._threads.append(t)
+            t.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._cancel_turn("shutdown")
+
+    def is_running(self) -> bool:
+        return bool(self._threads) and not self._stop.is_set()
+
+    def run_forever(self) -> None:
+        """Blocking: start karo aur exit / Ctrl+C tak chalne do."""
+        self.start()
+        print("🎙️ Listening...")
+        try:
+            while not self._stop.is_set():
+                time.sleep(0.2)
+        except KeyboardInterrupt:
+            self.stop()
@@ -0,0 +1,111 @@
+# utils/warmup.py
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from utils.lazy import LazyRegistry, components
+
+
+@dataclass
+class ComponentStatus:
+    name: str
+    state: str = "pending"   # "pending" | "loading" | "warming" | "ready" | "error"
+    load_s: float = 0.0
+    warm_s: float = 0.0
+    error: str = ""
+
+
+class WarmupManager:
+    """
+    Startup models (Whisper, LLaMA, ...) ko parallel threads me load + warm karta hai.
+
+    - `add(name, factory, warm)` – component ko LazyRegistry me register karta hai.
+      Factory ke baad ek dummy inference chalti hai (default: `obj.warm_up()` agar ho),
+      taaki weights page-in ho jaayein aur pehla real turn cold-start cost na de.
+    - Instance registry me *warm hone ke baad* hi publish hota hai, isliye
+      `components.proxy(name)` wale callers warm-up inference ke saath
+      kabhi concurrently model use nahi karte.
+    - `wait(name)` – us component ke ready hone tak block (e.g. STT ready => listening).
+    """
+
+    def __init__(self, registry: LazyRegistry = components):
+        self.registry = registry
+        self._lock = threading.Lock()
+        self._status: Dict[str, ComponentStatus] = {}
+        self._ready: Dict[str, threading.Event] = {}
+
+    def add(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        warm: Optional[Callable[[Any], None]] = None,
+    ) -> None:
+        with self._lock:
+            self._status[name] = ComponentStatus(name=name)
+            self._ready[name] = threading.Event()
+
+        def _build():
+            st = self._status[name]
+            try:
+                st.state = "loading"
+                t0 = time.perf_counter()
+                obj = factory()
+                st.load_s = time.perf_counter() - t0
+
+                st.state = "warming"
+                t0 = time.perf_counter()
+                warm_fn = warm or getattr(obj, "warm_up", None)
+                if warm_fn is not None:
+                    try:
+                        warm_fn(obj) if warm is not None else warm_fn()
+                    except Exception as e:
+                        # warm-up fail hona fatal nahi – model phir bhi use ho sakta hai
+                        print(f"[Warmup] {name} dummy inference failed:", e)
+                st.warm_s = time.perf_counter() - t0
+
+                st.state = "ready"
+                print(f"[Warmup] {name} ready (load {st.load_s:.1f}s, warm {st.warm_s:.1f}s)")
+                return obj
+            except Exception as e:
+                st.state = "error"
+                st.error = str(e)
+                print(f"[Warmup] {name} failed to load:", e)
+                raise
+            finally:
+                self._ready[name].set()
+
+        self.registry.register(name, _build)
+
+    def start(self, names: Optional[Iterable[str]] = None) -> None:
+        """Saare (ya diye gaye) components ek saath background threads me load karo."""
+        self.registry.warm_up(list(names) if names is not None else list(self._status))
+
+    def is_ready(self, name: str) -> bool:
+        st = self._status.get(name)
+        return st is not None and st.state == "ready"
+
+    def wait(self, name: str, timeout: Optional[float] = None) -> Any:
+        """
+        Component ready hone tak wait karke instance return karo.
+        Load fail hua ho to exception (registry.get dobara try karta hai).
+        """
+        ev = self._ready.get(name)
+        if ev is not None and not ev.wait(timeout):
+            raise TimeoutError(f"{name} is not ready after {timeout}s")
+        return self.registry.get(name)
+
+    def status(self) -> Dict[str, ComponentStatus]:
+        with self._lock:
+            return dict(self._status)
+
+    def report(self) -> str:
+        lines = []
+        for st in self.status().values():
+            line = f"{st.name:<10} {st.state:<8} load={st.load_s:.1f}s warm={st.warm_s:.1f}s"
+            if st.error:
+                line += f" error={st.error}"
+            lines.append(line)
+        return "\n".join(lines)